@@ -0,0 +1,216 @@
+import json
+import logging
+import time
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from redis.exceptions import LockNotOwnedError
+
+logger = logging.getLogger("order")
+logger_error = logging.getLogger("order_error")
+
+OUTBOX_KEY = "email_outbox"
+PROCESSING_KEY = "email_outbox:processing"
+FLUSH_LOCK_KEY = "email_outbox:flush"
+
+
+def serialize(message):
+    return json.dumps(
+        {
+            "subject": message.subject,
+            "body": message.body,
+            "from_email": message.from_email,
+            "to": message.to,
+            "cc": message.cc,
+            "bcc": message.bcc,
+            "reply_to": message.reply_to,
+            "headers": message.extra_headers,
+            "attempts": 0,
+        }
+    )
+
+
+def deserialize(raw):
+    data = json.loads(raw)
+    attempts = data.pop("attempts")
+    return EmailMessage(**data), attempts
+
+
+def delivery_connection(**kwargs):
+    return get_connection(settings.EMAIL_DELIVERY_BACKEND, **kwargs)
+
+
+class EmailOutbox:
+    """
+    Antrian email di Redis list. Pengirim cukup RPUSH (tanpa buka koneksi
+    SMTP); flush() yang dijadwalkan beat mengirim isi antrian lewat SATU
+    koneksi ke EMAIL_DELIVERY_BACKEND per run, bukan satu koneksi per email.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def push(self, messages):
+        if messages:
+            self.client.rpush(OUTBOX_KEY, *(serialize(message) for message in messages))
+        return len(messages)
+
+    def flush(self, batch_size=None):
+        """
+        Kirim email yang ada di antrian saat flush dimulai, batch demi batch
+        lewat satu koneksi. Tiap batch di-claim atomik dengan LMOVE ke list
+        processing dan baru dihapus dari sana setelah terkirim (at least
+        once: worker mati di tengah batch -> batch itu dikembalikan ke depan
+        antrian oleh flush berikutnya).
+
+        Lock mencegah dua flush berjalan bersamaan dan diperpanjang tiap
+        batch; satu flush berhenti mengambil batch baru setelah
+        EMAIL_OUTBOX_FLUSH_BUDGET detik, sisanya dikirim run berikutnya.
+
+        Email yang gagal dikirim ditaruh lagi di belakang antrian sampai
+        EMAIL_OUTBOX_MAX_ATTEMPTS, setelah itu dibuang dan di-log.
+        """
+        batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        stats = {"sent": 0, "retried": 0, "dropped": 0}
+
+        lock = self.client.lock(
+            FLUSH_LOCK_KEY, timeout=settings.EMAIL_OUTBOX_LOCK_TIMEOUT
+        )
+        if not lock.acquire(blocking=False):
+            return stats
+
+        try:
+            self.requeue_processing()
+
+            # email yang masuk selama flush menunggu run berikutnya
+            remaining = self.client.llen(OUTBOX_KEY)
+            if not remaining:
+                return stats
+
+            deadline = time.monotonic() + settings.EMAIL_OUTBOX_FLUSH_BUDGET
+            with delivery_connection() as connection:
+                while remaining > 0 and time.monotonic() < deadline:
+                    raw_messages = self.claim(min(batch_size, remaining))
+                    if not raw_messages:
+                        break
+                    retry = self.send_batch(connection, raw_messages, stats)
+
+                    pipe = self.client.pipeline()
+                    pipe.delete(PROCESSING_KEY)
+                    if retry:
+                        pipe.rpush(OUTBOX_KEY, *retry)
+                    pipe.execute()
+                    remaining -= len(raw_messages)
+                    try:
+                        lock.reacquire()
+                    except LockNotOwnedError:
+                        # lock sudah expired, flush lain bisa jadi sudah
+                        # jalan: jangan claim batch lagi
+                        break
+        finally:
+            try:
+                lock.release()
+            except LockNotOwnedError:
+                logger_error.warning(
+                    "Lock flush email outbox sudah expired sebelum flush selesai",
+                    extra={"event_type": "email"},
+                )
+
+        if any(stats.values()):
+            logger.info(
+                f"Flush email outbox: {stats['sent']} terkirim, "
+                f"{stats['retried']} diulang, {stats['dropped']} dibuang",
+                extra={"event_type": "email", **stats},
+            )
+        return stats
+
+    def claim(self, count):
+        """Pindahkan maksimal count email dari depan antrian ke list processing."""
+        pipe = self.client.pipeline()
+        for _ in range(count):
+            pipe.lmove(OUTBOX_KEY, PROCESSING_KEY, "LEFT", "RIGHT")
+        return [raw for raw in pipe.execute() if raw is not None]
+
+    def requeue_processing(self):
+        # sisa batch dari flush yang mati di tengah jalan, urutan dipertahankan
+        while self.client.lmove(PROCESSING_KEY, OUTBOX_KEY, "RIGHT", "LEFT"):
+            pass
+
+    def send_batch(self, connection, raw_messages, stats):
+        retry = []
+        for raw in raw_messages:
+            message, attempts = deserialize(raw)
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                attempts += 1
+                if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                    stats["dropped"] += 1
+                    logger_error.error(
+                        f"Email dibuang setelah {attempts} percobaan: {e}",
+                        extra={"event_type": "email", "to": message.to},
+                    )
+                else:
+                    data = json.loads(raw)
+                    data["attempts"] = attempts
+                    retry.append(json.dumps(data))
+                    stats["retried"] += 1
+            else:
+                stats["sent"] += 1
+        return retry
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """
+    EMAIL_BACKEND saat EMAIL_OUTBOX_ENABLED: send()/send_mail() hanya
+    menaruh email di EmailOutbox. Kalau Redis tidak bisa dihubungi, email
+    langsung dikirim lewat EMAIL_DELIVERY_BACKEND supaya tidak hilang.
+
+    Attachment dan alternatif HTML tidak diserialisasi, email seperti itu
+    juga langsung dikirim.
+    """
+
+    def send_messages(self, email_messages):
+        buffered, direct = [], []
+        for message in email_messages:
+            if message.attachments or getattr(message, "alternatives", None):
+                direct.append(message)
+            else:
+                buffered.append(message)
+
+        sent = 0
+        try:
+            sent += get_email_outbox().push(buffered)
+        except redis.RedisError as e:
+            logger_error.warning(
+                f"Email outbox tidak tersedia, kirim langsung: {e}",
+                extra={"event_type": "email"},
+            )
+            direct += buffered
+
+        if direct:
+            sent += (
+                delivery_connection(fail_silently=self.fail_silently).send_messages(
+                    direct
+                )
+                or 0
+            )
+        return sent
+
+
+@lru_cache(maxsize=None)
+def _for_url(url):
+    client = redis.Redis.from_url(
+        url,
+        decode_responses=True,
+        socket_connect_timeout=0.5,
+        socket_timeout=0.5,
+    )
+    return EmailOutbox(client)
+
+
+def get_email_outbox():
+    return _for_url(settings.EMAIL_OUTBOX_REDIS_URL)
@@ -1,91 +1,118 @@
-import json
 import logging
-import traceback
 
 from django.core.serializers.json import DjangoJSONEncoder
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Field tambahan per event_type, dari atribut `extra` record:
+#     (nama, selalu ditulis?, konversi)
+# selalu ditulis -> None kalau atribut tidak ada; selain itu dilewati.
+# Urutan di sini = urutan key di output.
+EVENT_FIELDS = {
+    "login": (
+        ("user_id", True, None),
+        ("email", True, None),
+        ("ip_address", True, None),
+        ("user_agent", True, None),
+    ),
+    "token_refresh": (
+        ("status", True, None),
+        ("user_id", True, None),
+        ("ip_address", True, None),
+        ("user_agent", True, None),
+    ),
+    "shippingrates": (
+        ("checkout_id", False, str),
+        ("order_id", False, None),
+        ("item_value", True, None),
+        ("weight", True, None),
+    ),
+    "transaction": (
+        ("order_id", True, None),
+        ("payload", False, None),
+        ("status_code", False, None),
+        ("transaction_status", False, None),
+        ("fraud_status", False, None),
+        ("response", False, None),
+        ("checkout_id", False, str),
+    ),
+    "refund": (
+        ("order_id", False, None),
+        ("refund_request_id", False, None),
+        ("reason", False, None),
+        ("payment_status", False, None),
+        ("reduced_stock", False, None),
+    ),
+    "perf": (
+        ("method", True, None),
+        ("path", True, None),
+        ("view", True, None),
+        ("status_code", True, None),
+        ("duration_ms", True, None),
+        ("db_ms", True, None),
+        ("db_queries", True, None),
+        ("provider_ms", True, None),
+        ("render_ms", True, None),
+    ),
+}
+
+_MISSING = object()
+
 
 class JSONFormatter(logging.Formatter):
+    """
+    Satu baris JSON per record: timestamp, logger, level, event, lalu field
+    EVENT_FIELDS sesuai event_type.
+
+    use_orjson=True (LOG_JSON_ORJSON) serialisasi lewat orjson kalau
+    terinstall. Isinya sama, tapi tanpa spasi setelah ':'/',' dan non-ASCII
+    tidak di-escape, jadi tidak byte-identik dengan output json stdlib.
+    """
+
+    def __init__(self, *args, use_orjson=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encoder = DjangoJSONEncoder()
+        self.use_orjson = use_orjson and orjson is not None
+        self._time_cache = (None, None)
+
+    def formatTime(self, record, datefmt=None):
+        # datefmt tanpa milidetik -> cukup strftime sekali per detik
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        second, timestamp = self._time_cache
+        if second != int(record.created):
+            timestamp = super().formatTime(record, datefmt)
+            self._time_cache = (int(record.created), timestamp)
+        return timestamp
+
     def format(self, record):
-        # Field dasar (untuk semua event)
         log_record = {
             "timestamp": self.formatTime(record, self.datefmt),
             "logger": record.name,
             "level": record.levelname,
             "event": record.msg,
-            # "method": getattr(record, "method", None),
-            # "path": getattr(record, "path", None),
         }
 
-        event_type = getattr(record, "event_type", None)
-
-        # ---- LOGIN EVENT ----
-        if event_type == "login":
-            log_record.update(
-                {
-                    "user_id": getattr(record, "user_id", None),
-                    "email": getattr(record, "email", None),
-                    "ip_address": getattr(record, "ip_address", None),
-                    "user_agent": getattr(record, "user_agent", None),
-                }
-            )
-
-        # ---- REFRESH TOKEN EVENT ----
-        elif event_type == "token_refresh":
-            log_record.update(
-                {
-                    "status": getattr(record, "status", None),
-                    "user_id": getattr(record, "user_id", None),
-                    "ip_address": getattr(record, "ip_address", None),
-                    "user_agent": getattr(record, "user_agent", None),
-                }
-            )
-
-        elif event_type == "shippingrates":
-            if hasattr(record, "checkout_id"):
-                log_record["checkout_id"] = str(record.checkout_id)
-            if hasattr(record, "order_id"):
-                log_record["order_id"] = record.order_id
-
-            log_record.update(
-                {
-                    "item_value": getattr(record, "item_value", None),
-                    "weight": getattr(record, "weight", None),
-                }
-            )
-
-        elif event_type == "transaction":
-            if "order_id" not in log_record:
-                log_record["order_id"] = getattr(record, "order_id", None)
-
-            if hasattr(record, "payload"):
-                log_record["payload"] = record.payload
-
-            if hasattr(record, "status_code"):
-                log_record["status_code"] = record.status_code
-
-            if hasattr(record, "transaction_status"):
-                log_record["transaction_status"] = record.transaction_status
-
-            if hasattr(record, "fraud_status"):
-                log_record["fraud_status"] = record.fraud_status
-
-            if hasattr(record, "response"):
-                log_record["response"] = record.response
-
-            if hasattr(record, "checkout_id"):
-                log_record["checkout_id"] = str(record.checkout_id)
-
-        elif event_type == "refund":
-            if hasattr(record, "order_id"):
-                log_record["order_id"] = record.order_id
-            if hasattr(record, "refund_request_id"):
-                log_record["refund_request_id"] = record.refund_request_id
-            if hasattr(record, "reason"):
-                log_record["reason"] = record.reason
-            if hasattr(record, "payment_status"):
-                log_record["payment_status"] = record.payment_status
-            if hasattr(record, "reduced_stock"):
-                log_record["reduced_stock"] = record.reduced_stock
-                
-        return json.dumps(log_record, cls=DjangoJSONEncoder)
+        attrs = record.__dict__
+        for name, always, convert in EVENT_FIELDS.get(attrs.get("event_type"), ()):
+            value = attrs.get(name, _MISSING)
+            if value is _MISSING:
+                if always:
+                    log_record[name] = None
+            elif convert is not None:
+                log_record[name] = convert(value)
+            else:
+                log_record[name] = value
+
+        if self.use_orjson:
+            return orjson.dumps(
+                log_record,
+                default=self.encoder.default,
+                # datetime lewat DjangoJSONEncoder (milidetik) seperti path stdlib
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            ).decode()
+        return self.encoder.encode(log_record)
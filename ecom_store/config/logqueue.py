@@ -0,0 +1,271 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler yang bisa menulis banyak record sekaligus: format
+    semua record, cek rollover sekali, lalu satu write + flush per batch
+    (RotatingFileHandler biasa seek/write/flush dan format dua kali per
+    record).
+    """
+
+    def emit_batch(self, records):
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+
+        data = "".join(lines)
+        with self.lock:
+            try:
+                if self.stream is None:
+                    self.stream = self._open()
+                if self.maxBytes > 0:
+                    position = self.stream.seek(0, 2)
+                    if position and position + len(data) >= self.maxBytes:
+                        self.doRollover()
+                self.stream.write(data)
+                self.stream.flush()
+            except Exception:
+                self.handleError(records[0])
+
+
+class BatchQueueListener(QueueListener):
+    """
+    Satu thread per proses untuk semua QueuedHandler. Isi queue adalah
+    (handler, record); listener mengambil sampai batch_size item sekaligus,
+    mengelompokkannya per handler tujuan, lalu menulisnya per batch.
+    """
+
+    def __init__(self, queue, batch_size):
+        super().__init__(queue)
+        self.batch_size = batch_size
+
+    def _monitor(self):
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = self._sentinel in batch
+            self.handle_batch([item for item in batch if item is not self._sentinel])
+            for _ in batch:
+                q.task_done()
+            if stop:
+                break
+
+    def handle_batch(self, items):
+        grouped = {}
+        for handler, record in items:
+            grouped.setdefault(handler, []).append(record)
+
+        for handler, records in grouped.items():
+            dropped = handler.take_dropped()
+            if dropped:
+                records.append(handler.dropped_record(dropped))
+            handler.write(records)
+
+    def enqueue_sentinel(self):
+        # queue bisa penuh; sentinel tetap harus masuk supaya thread berhenti
+        self.queue.put(self._sentinel, timeout=1)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        try:
+            self.enqueue_sentinel()
+        except queue.Full:
+            return
+        self._thread.join(timeout=5)
+        self._thread = None
+
+
+class LogPipeline:
+    """
+    Bounded queue + BatchQueueListener yang dipakai semua QueuedHandler.
+
+    Thread tidak ikut ter-fork (gunicorn/celery prefork): di proses anak
+    queue dan listener dibuat ulang lewat os.register_at_fork.
+    """
+
+    def __init__(self, maxsize, batch_size, block_timeout):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self.handlers = []
+        self._lock = threading.Lock()
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self.stop)
+
+    def _reset(self):
+        self.queue = queue.Queue(maxsize=self.maxsize)
+        self.listener = BatchQueueListener(self.queue, self.batch_size)
+        self._lock = threading.Lock()
+        for handler in self.handlers:
+            handler.reset_counters()
+
+    def _ensure_started(self):
+        if self.listener._thread is None:
+            with self._lock:
+                if self.listener._thread is None:
+                    self.listener.start()
+
+    def put(self, handler, record):
+        """
+        Return False kalau record dibuang. Queue penuh: record di bawah
+        ERROR langsung dibuang supaya thread request tidak pernah menunggu;
+        ERROR ke atas menunggu paling lama LOG_QUEUE_BLOCK_TIMEOUT dulu.
+        """
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((handler, record))
+        except queue.Full:
+            if record.levelno < logging.ERROR or not self.block_timeout:
+                return False
+            try:
+                self.queue.put((handler, record), timeout=self.block_timeout)
+            except queue.Full:
+                return False
+        return True
+
+    def stop(self):
+        """Tulis sisa isi queue lalu hentikan listener (dipanggil atexit)."""
+        self.listener.stop()
+
+    def flush(self):
+        """Tunggu sampai semua record yang sudah masuk queue ditulis."""
+        if self.listener._thread is not None:
+            self.queue.join()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_log_pipeline():
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = LogPipeline(
+                    settings.LOG_QUEUE_SIZE,
+                    settings.LOG_QUEUE_BATCH_SIZE,
+                    settings.LOG_QUEUE_BLOCK_TIMEOUT,
+                )
+    return _pipeline
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Handler untuk LOGGING: thread pemanggil hanya menaruh record di
+    LogPipeline, format (JSONFormatter) dan I/O ke `target` dijalankan
+    thread listener.
+
+        "file_order": {
+            "()": QueuedHandler,
+            "target": "config.logqueue.BatchRotatingFileHandler",
+            "formatter": "json",
+            "filename": ...,   # sisa key diteruskan ke target
+        }
+
+    Record yang dibuang karena queue penuh dihitung di `dropped` (total
+    sejak proses start) dan dilaporkan sebagai satu record WARNING di
+    target begitu listener sempat menulis lagi.
+    """
+
+    def __init__(self, target, **kwargs):
+        self.pipeline = get_log_pipeline()
+        super().__init__(self.pipeline.queue)
+        self.target = import_string(target)(**kwargs)
+        self.reset_counters()
+        self.pipeline.handlers.append(self)
+
+    def reset_counters(self):
+        self.queued = 0
+        self.dropped = 0
+        self._unreported = 0
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # QueueHandler.prepare memformat record di thread pemanggil; di sini
+        # cukup gabungkan msg + args (objek di args bisa berubah setelah
+        # request selesai), format tetap di listener
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.pipeline.put(self, record):
+            self.queued += 1
+        else:
+            self.dropped += 1
+            self._unreported += 1
+
+    def take_dropped(self):
+        # dipanggil listener; += di enqueue bisa balapan, selisih kecil
+        # masuk laporan berikutnya
+        dropped, self._unreported = self._unreported, 0
+        return dropped
+
+    def dropped_record(self, dropped):
+        return logging.makeLogRecord(
+            {
+                "name": "logqueue",
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"{dropped} log record dibuang karena queue logging penuh",
+                "event_type": "log_dropped",
+                "dropped": dropped,
+            }
+        )
+
+    def write(self, records):
+        try:
+            if hasattr(self.target, "emit_batch"):
+                self.target.emit_batch(records)
+            else:
+                for record in records:
+                    self.target.handle(record)
+        except Exception:
+            self.handleError(records[0])
+
+    def flush(self):
+        self.pipeline.flush()
+
+    def close(self):
+        self.pipeline.stop()
+        self.target.close()
+        super().close()
+
+
+def log_queue_stats():
+    """Counter per handler: {nama: {"queued", "dropped"}} + ukuran queue."""
+    pipeline = get_log_pipeline()
+    return {
+        "queue_size": pipeline.queue.qsize(),
+        "handlers": {
+            handler.name: {"queued": handler.queued, "dropped": handler.dropped}
+            for handler in pipeline.handlers
+        },
+    }
@@ -1,7 +1,13 @@
 import midtransclient
 from django.conf import settings
 
+from .providers import midtrans
+
 snap = midtransclient.Snap(
     is_production=settings.MIDTRANS_IS_PRODUCTION,
     server_key=settings.MIDTRANS_SERVER_KEY,
 )
+# HttpClient midtransclient memanggil modul `requests` langsung (koneksi baru
+# tiap call, tanpa timeout); ganti dengan session provider yang keep-alive,
+# punya timeout, dan tercatat di config.perf
+snap.http_client.http_client = midtrans
@@ -0,0 +1,270 @@
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger("perf")
+
+# metrik request yang sedang berjalan di thread/context ini
+_current = contextvars.ContextVar("perf_metrics", default=None)
+
+UNRESOLVED_VIEW = "<unresolved>"
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.provider_time = {}
+        self.render_time = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+def record_provider(name, elapsed):
+    """Dipanggil ProviderSession tiap request HTTP keluar (RajaOngkir, Midtrans)."""
+    if not settings.PERF_ENABLED:
+        return
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.provider_time[name] = metrics.provider_time.get(name, 0.0) + elapsed
+    get_registry().observe_provider(name, elapsed)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # index terakhir = +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PerfRegistry:
+    """
+    Histogram per view (durasi, waktu DB, jumlah query) dan per provider,
+    disimpan in-process. Tiap worker gunicorn punya registry sendiri; scrape
+    per worker atau agregasi di Prometheus.
+    """
+
+    METRICS = (
+        ("http_request_duration_seconds", "Durasi request per view", "duration"),
+        ("http_request_db_seconds", "Waktu query DB per request", "db"),
+        ("http_request_db_queries", "Jumlah query DB per request", "queries"),
+    )
+
+    def __init__(self, buckets, query_buckets):
+        self.buckets = buckets
+        self.query_buckets = query_buckets
+        self.lock = threading.Lock()
+        self.views = {}
+        self.requests = {}
+        self.providers = {}
+
+    def observe_request(self, view, method, status_code, duration, metrics):
+        with self.lock:
+            histograms = self.views.get((view, method))
+            if histograms is None:
+                histograms = self.views[(view, method)] = {
+                    "duration": Histogram(self.buckets),
+                    "db": Histogram(self.buckets),
+                    "queries": Histogram(self.query_buckets),
+                }
+            histograms["duration"].observe(duration)
+            histograms["db"].observe(metrics.db_time)
+            histograms["queries"].observe(metrics.db_queries)
+
+            key = (view, method, status_code)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def observe_provider(self, name, elapsed):
+        with self.lock:
+            histogram = self.providers.get(name)
+            if histogram is None:
+                histogram = self.providers[name] = Histogram(self.buckets)
+            histogram.observe(elapsed)
+
+    def render(self):
+        """Format text exposition Prometheus (text/plain; version=0.0.4)."""
+        lines = []
+        with self.lock:
+            lines += [
+                "# HELP http_requests_total Jumlah request per view dan status",
+                "# TYPE http_requests_total counter",
+            ]
+            for (view, method, status_code), count in sorted(self.requests.items()):
+                lines.append(
+                    f'http_requests_total{{view="{_label(view)}",method="{method}",'
+                    f'status="{status_code}"}} {count}'
+                )
+
+            for name, help_text, key in self.METRICS:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (view, method), histograms in sorted(self.views.items()):
+                    labels = f'view="{_label(view)}",method="{method}"'
+                    lines += histograms[key].lines(name, labels)
+
+            name = "provider_request_duration_seconds"
+            lines += [
+                f"# HELP {name} Durasi request HTTP ke provider eksternal",
+                f"# TYPE {name} histogram",
+            ]
+            for provider, histogram in sorted(self.providers.items()):
+                lines += histogram.lines(name, f'provider="{_label(provider)}"')
+        return "\n".join(lines) + "\n"
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PerfRegistry(
+                    settings.PERF_HISTOGRAM_BUCKETS, settings.PERF_QUERY_BUCKETS
+                )
+    return _registry
+
+
+class PerfMiddleware:
+    """
+    Ukur tiap request: total durasi, waktu + jumlah query DB (lewat
+    connection.execute_wrapper), waktu request ke provider (ProviderSession
+    memanggil record_provider) dan waktu render response DRF/template.
+
+    Hasilnya ditulis sebagai record event_type="perf" ke logger "perf",
+    masuk histogram PerfRegistry (endpoint metrics_view), dan saat DEBUG
+    juga sebagai header Server-Timing.
+
+    Pasang paling atas di MIDDLEWARE supaya middleware lain ikut terukur.
+    Tidak aktif kalau PERF_ENABLED=False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        duration = time.perf_counter() - metrics.start
+        self.report(request, response, metrics, duration)
+        return response
+
+    def process_template_response(self, request, response):
+        # dipanggil tepat sebelum response.render() (Response DRF juga):
+        # waktu render = serialisasi body oleh renderer
+        metrics = _current.get()
+        if metrics is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                metrics.render_time += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, metrics, duration):
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED_VIEW
+        if view == "perf_metrics":
+            return
+
+        get_registry().observe_request(
+            view, request.method, response.status_code, duration, metrics
+        )
+
+        provider_ms = {
+            name: round(elapsed * 1000, 2)
+            for name, elapsed in metrics.provider_time.items()
+        }
+        logger.info(
+            f"{request.method} {view} {response.status_code}",
+            extra={
+                "event_type": "perf",
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status_code": response.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "db_ms": round(metrics.db_time * 1000, 2),
+                "db_queries": metrics.db_queries,
+                "provider_ms": provider_ms,
+                "render_ms": round(metrics.render_time * 1000, 2),
+            },
+        )
+
+        if settings.DEBUG:
+            timings = [
+                f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.db_queries} queries"',
+                *(f"{name};dur={ms:.2f}" for name, ms in provider_ms.items()),
+                f"render;dur={metrics.render_time * 1000:.2f}",
+                f"total;dur={duration * 1000:.2f}",
+            ]
+            response["Server-Timing"] = ", ".join(timings)
+
+
+def metrics_view(request):
+    """
+    Endpoint scrape Prometheus. Butuh header `Authorization: Bearer
+    <PERF_METRICS_TOKEN>`; tanpa token hanya terbuka saat DEBUG.
+    """
+    if not settings.PERF_ENABLED:
+        return HttpResponse(status=404)
+
+    token = settings.PERF_METRICS_TOKEN
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        if not constant_time_compare(authorization, f"Bearer {token}"):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        get_registry().render(), content_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,72 @@
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import perf
+
+
+class ProviderSession(requests.Session):
+    """
+    requests.Session dengan timeout default per provider. Session dipakai
+    ulang seumur proses, jadi koneksi TCP+TLS ke provider tetap keep-alive
+    di connection pool dan tidak handshake ulang tiap request.
+
+    Durasi tiap request (termasuk retry) dicatat ke config.perf atas nama
+    provider-nya.
+    """
+
+    def __init__(self, timeout, name=None):
+        super().__init__()
+        self.timeout = timeout
+        self.name = name
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            return super().request(method, url, **kwargs)
+        finally:
+            perf.record_provider(self.name, time.perf_counter() - start)
+
+
+def build_session(timeout, retries, backoff, pool_size, name=None):
+    """
+    Retry hanya untuk 429/5xx dan gagal connect, dengan backoff + jitter
+    (Retry-After dari provider dihormati). POST tidak di-retry karena
+    tidak idempotent (mis. create order pengiriman). Setelah retry habis,
+    response terakhir tetap dikembalikan apa adanya (raise_on_status=False),
+    jadi caller yang cek status_code (mis. 429) tetap jalan seperti biasa.
+    """
+    retry = Retry(
+        total=retries,
+        read=0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        backoff_factor=backoff,
+        backoff_jitter=backoff,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size
+    )
+
+    session = ProviderSession(timeout, name)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _from_settings(name):
+    return build_session(**settings.PROVIDER_HTTP[name], name=name)
+
+
+# API Komerce collaborator: tarif, destination search, create order
+rajaongkir_delivery = _from_settings("rajaongkir_delivery")
+
+# API RajaOngkir (rajaongkir.komerce.id): data wilayah untuk seed
+rajaongkir_cost = _from_settings("rajaongkir_cost")
+
+# API Midtrans Snap, dipasang ke client midtransclient (config/midtrans.py)
+midtrans = _from_settings("midtrans")
@@ -17,6 +17,7 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 from .jsonlog import JSONFormatter
+from .logqueue import QueuedHandler
 
 load_dotenv()
 
@@ -68,6 +69,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # paling luar supaya seluruh request terukur, lihat config/perf.py
+    "config.perf.PerfMiddleware",
     # "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -224,6 +227,16 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 PHONENUMBER_DEFAULT_REGION = "ID"
 
+# queue bersama semua QueuedHandler; penuh -> record di bawah ERROR dibuang
+# (dihitung di log_queue_stats), ERROR ke atas menunggu maksimal
+# LOG_QUEUE_BLOCK_TIMEOUT detik
+LOG_QUEUE_SIZE = 10_000
+LOG_QUEUE_BATCH_SIZE = 200
+LOG_QUEUE_BLOCK_TIMEOUT = 0.05
+# True: JSONFormatter serialisasi lewat orjson kalau terinstall (lebih cepat,
+# tapi output compact: tidak byte-identik dengan json stdlib)
+LOG_JSON_ORJSON = os.environ.get("LOG_JSON_ORJSON") == "True"
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -235,29 +248,40 @@ LOGGING = {
         "json": {
             "()": JSONFormatter,
             "datefmt": "%Y-%m-%d %H:%M:%S",
+            "use_orjson": LOG_JSON_ORJSON,
         },
     },
+    # Semua handler lewat QueuedHandler: thread request/worker hanya menaruh
+    # record di queue, format + tulis file dikerjakan satu thread listener
+    # per proses (lihat config/logqueue.py)
     "handlers": {
-        "console": {"class": "logging.StreamHandler", "formatter": "simple"},
+        "console": {
+            "()": QueuedHandler,
+            "target": "logging.StreamHandler",
+            "formatter": "simple",
+        },
         "file_auth": {
+            "()": QueuedHandler,
+            "target": "config.logqueue.BatchRotatingFileHandler",
             "level": "INFO",
-            "class": "logging.handlers.RotatingFileHandler",
             "filename": os.path.join(BASE_DIR.parent, "logs", "auth_audit.log"),
             "formatter": "json",
             "maxBytes": 1024 * 1024 * 5,  # 5 MB
             "backupCount": 3,
         },
         "file_order": {
+            "()": QueuedHandler,
+            "target": "config.logqueue.BatchRotatingFileHandler",
             "level": "INFO",
-            "class": "logging.handlers.RotatingFileHandler",
             "filename": os.path.join(BASE_DIR.parent, "logs", "order_checkout.log"),
             "formatter": "json",
             "maxBytes": 1024 * 1024 * 5,  # 5 MB
             "backupCount": 3,
         },
         "file_order_error": {
+            "()": QueuedHandler,
+            "target": "config.logqueue.BatchRotatingFileHandler",
             "level": "ERROR",
-            "class": "logging.handlers.RotatingFileHandler",
             "filename": os.path.join(
                 BASE_DIR.parent, "logs", "order_error_checkout.log"
             ),
@@ -265,6 +289,15 @@ LOGGING = {
             "maxBytes": 1024 * 1024 * 5,  # 5 MB
             "backupCount": 3,
         },
+        "file_perf": {
+            "()": QueuedHandler,
+            "target": "config.logqueue.BatchRotatingFileHandler",
+            "level": "INFO",
+            "filename": os.path.join(BASE_DIR.parent, "logs", "perf.log"),
+            "formatter": "json",
+            "maxBytes": 1024 * 1024 * 5,  # 5 MB
+            "backupCount": 3,
+        },
     },
     "loggers": {
         "auth.audit": {
@@ -282,13 +315,55 @@ LOGGING = {
             "level": "ERROR",
             "propagate": True,
         },
+        # satu record per request dari PerfMiddleware, tidak ke console
+        "perf": {
+            "handlers": ["file_perf"],
+            "level": "INFO",
+            "propagate": True,
+        },
     },
 }
 
+# instrumentasi per request (config/perf.py): log event_type=perf, histogram
+# di /metrics/ (Authorization: Bearer PERF_METRICS_TOKEN), Server-Timing
+# header saat DEBUG
+PERF_ENABLED = os.environ.get("PERF_ENABLED") == "True"
+PERF_METRICS_TOKEN = os.environ.get("PERF_METRICS_TOKEN")
+# detik, dipakai untuk durasi request, waktu DB dan provider
+PERF_HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PERF_QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
 API_KEY_RAJA_ONGKIR_SHIPPING_COST = os.environ.get("API_KEY_RAJA_ONGKIR_SHIPPING_COST")
 API_KEY_RAJA_ONGKIR_SHIPPING_DELIVERY = os.environ.get(
     "API_KEY_RAJA_ONGKIR_SHIPPING_DELIVERY"
 )
+# timeout (connect, read) dan retry per provider, lihat config/providers.py
+PROVIDER_HTTP = {
+    "rajaongkir_delivery": {
+        "timeout": (3.05, 10),
+        "retries": 2,
+        "backoff": 0.3,
+        "pool_size": 10,
+    },
+    "rajaongkir_cost": {
+        "timeout": (3.05, 30),
+        "retries": 5,
+        "backoff": 1,
+        "pool_size": 4,
+    },
+    # create transaction Snap (POST) tidak pernah di-retry
+    "midtrans": {
+        "timeout": (3.05, 30),
+        "retries": 0,
+        "backoff": 0,
+        "pool_size": 10,
+    },
+}
+
+# base URL API tarif & order Komerce; bisa diarahkan ke stub server lokal
+RAJA_ONGKIR_DELIVERY_BASE_URL = os.environ.get(
+    "RAJA_ONGKIR_DELIVERY_BASE_URL", "https://api-sandbox.collaborator.komerce.id"
+)
 
 MIDTRANS_SERVER_KEY = os.environ.get("MIDTRANS_SERVER_KEY")
 MIDTRANS_CLIENT_KEY = os.environ.get("MIDTRANS_CLIENT_KEY")
@@ -296,7 +371,22 @@ MIDTRANS_IS_PRODUCTION = os.environ.get("MIDTRANS_IS_PRODUCTION") == "True"
 # MIDTRANS_FINISH_URL = "http://127.0.0.1:5000/payment/finish"
 
 DEFAULT_FROM_EMAIL = os.environ.get("EMAIL_HOST_USER")
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# backend yang benar-benar mengirim; untuk lokal bisa
+# django.core.mail.backends.console.EmailBackend atau .filebased.EmailBackend
+EMAIL_DELIVERY_BACKEND = os.environ.get(
+    "EMAIL_DELIVERY_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_FILE_PATH = os.environ.get(
+    "EMAIL_FILE_PATH", os.path.join(BASE_DIR.parent, "logs", "emails")
+)
+# True: email ditampung di Redis dan dikirim per batch oleh task
+# flush_email_outbox lewat satu koneksi SMTP (lihat config/email.py)
+EMAIL_OUTBOX_ENABLED = os.environ.get("EMAIL_OUTBOX_ENABLED") == "True"
+EMAIL_BACKEND = (
+    "config.email.OutboxEmailBackend"
+    if EMAIL_OUTBOX_ENABLED
+    else EMAIL_DELIVERY_BACKEND
+)
 EMAIL_HOST = os.environ.get("EMAIL_HOST", "smtp.gmail.com")
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -305,5 +395,85 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # read-through cache untuk endpoint product/category, lihat product/cache.py
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "catalog",
+        "OPTIONS": {
+            # Redis mati tidak boleh bikin request product menggantung
+            "socket_connect_timeout": 0.5,
+            "socket_timeout": 0.5,
+        },
+    },
+    # cache tarif ongkir per rute, lihat order/rate_cache.py
+    "shipping": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "shipping",
+        "OPTIONS": {
+            "socket_connect_timeout": 0.5,
+            "socket_timeout": 0.5,
+        },
+    },
+}
+
+CATALOG_CACHE_TIMEOUT = 60 * 15  # 15 menit
+
+SHIPPING_RATE_CACHE_TIMEOUT = 60 * 30  # 30 menit
+# lebih lama dari timeout request RajaOngkir (10 detik)
+SHIPPING_RATE_LOCK_TIMEOUT = 15
+SHIPPING_RATE_WEIGHT_BUCKET_GRAMS = 100
+SHIPPING_RATE_ITEM_VALUE_BUCKET = 1_000
+
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
+
+# jalankan worker dengan beat: celery -A config worker -B (atau proses beat terpisah)
+CELERY_BEAT_SCHEDULE = {
+    "sweep-expired-checkouts": {
+        "task": "order.tasks.sweep_expired_checkouts",
+        "schedule": 60.0,
+    },
+    "reconcile-flash-stock": {
+        "task": "order.tasks.reconcile_flash_stock",
+        "schedule": 5.0,
+    },
+    "flush-email-outbox": {
+        "task": "order.tasks.flush_email_outbox",
+        "schedule": 10.0,
+    },
+}
+
+EMAIL_OUTBOX_REDIS_URL = os.environ.get("EMAIL_OUTBOX_REDIS_URL", REDIS_URL)
+EMAIL_OUTBOX_BATCH_SIZE = 100
+# percobaan kirim sebelum email dibuang (di-log ke order_error)
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+# lock flush dilepas paksa kalau worker mati di tengah flush
+EMAIL_OUTBOX_LOCK_TIMEOUT = 300
+# satu flush berhenti mengambil batch baru setelah sekian detik, jauh di
+# bawah EMAIL_OUTBOX_LOCK_TIMEOUT; sisa antrian dikirim run berikutnya
+EMAIL_OUTBOX_FLUSH_BUDGET = 60
+
+# True: MidtransWebhookView hanya validasi signature + simpan event lalu balas
+# 200; transisi status diterapkan worker (order.tasks.process_midtrans_events).
+# Jalankan worker untuk queue-nya: celery -A config worker -Q webhooks
+MIDTRANS_WEBHOOK_ASYNC = os.environ.get("MIDTRANS_WEBHOOK_ASYNC") == "True"
+CELERY_TASK_ROUTES = {
+    "order.tasks.process_midtrans_events": {"queue": "webhooks"},
+}
+
+# stok produk flash sale di counter Redis, lihat order/services/flash_stock.py
+FLASH_SALE_ENABLED = os.environ.get("FLASH_SALE_ENABLED") == "True"
+FLASH_SALE_REDIS_URL = os.environ.get("FLASH_SALE_REDIS_URL", REDIS_URL)
+# mutasi Redis yang transaksinya tidak commit dalam waktu ini dianggap rollback
+FLASH_SALE_JOURNAL_TIMEOUT = 60
+
+CHECKOUT_SWEEP_BATCH_SIZE = 500
+# Snap transaction Midtrans default kedaluwarsa 24 jam; order yang sudah sampai
+# Snap ditunggu dulu webhook expire-nya sebelum di-sweep
+CHECKOUT_SNAP_EXPIRY_GRACE = timedelta(days=1)
@@ -21,6 +21,7 @@ Including another URLconf
 #     SpectacularRedocView,
 # )
 from accounts.views import CustomTokenRefreshView, CustomVerifyEmailAPIView
+from config.perf import metrics_view
 from dj_rest_auth.urls import urlpatterns as dj_rest_auth_urls
 from dj_rest_auth.views import PasswordResetConfirmView
 from django.contrib import admin
@@ -51,6 +52,7 @@ urlpatterns = [
     path("api/address/", include("shipping_address.urls")),
     path("api/order/", include("order.urls")),
     path("api/comment/", include("comment.urls")),
+    path("metrics/", metrics_view, name="perf_metrics"),
 ]
 
 
@@ -2,10 +2,20 @@ import json
 
 from config.admin import ReadOnlyForStaffMixin
 from django.contrib import admin
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
-from .models import CheckoutSession, Order, OrderItem, OrderShipping, ShippingInsurance, RefundRequest
-from .services.refund import RefundService
+from .models import (
+    CheckoutSession,
+    MidtransWebhookEvent,
+    Order,
+    OrderItem,
+    OrderShipping,
+    RefundRequest,
+    ShippingInsurance,
+)
+from .services.refund import BulkRefundService
+
 
 # Register your models here.
 @admin.register(ShippingInsurance)
@@ -69,6 +79,7 @@ class OrderItemAdmin(ReadOnlyForStaffMixin):
         "product_price",
         "qty",
         "subtotal",
+        "is_refunded",
     ]
     list_filter = ["is_archived", "created_at"]
     search_fields = ["product__name"]
@@ -85,9 +96,15 @@ class OrderItemAdmin(ReadOnlyForStaffMixin):
 
     product_name.short_description = "Product Name"
 
+    def is_refunded(self, obj):
+        return obj.is_refunded
+
+    is_refunded.short_description = "Refunded"
+    is_refunded.boolean = True
+
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related("order", "product")
+        return qs.select_related("order", "product").with_refund_state()
 
 
 @admin.register(Order)
@@ -102,6 +119,7 @@ class OrderAdmin(ReadOnlyForStaffMixin):
         "grand_total_display",
         "net_income_display",
         "actual_net_income_display",
+        "refund_status",
         "created_at",
     ]
     list_filter = [
@@ -124,6 +142,8 @@ class OrderAdmin(ReadOnlyForStaffMixin):
         "grand_total",
         "net_income",
         "actual_net_income",
+        "items_subtotal",
+        "total_weight",
         "delivered_at",
         "created_at",
         "updated_at",
@@ -155,9 +175,15 @@ class OrderAdmin(ReadOnlyForStaffMixin):
 
     actual_net_income_display.short_description = "Actual Net Income"
 
+    def refund_status(self, obj):
+        return obj.refund_status or "-"
+
+    refund_status.short_description = "Refund"
+
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related("user", "store", "shipping")
+        # refund_status dibaca dari annotation, bukan query per item
+        return qs.select_related("user", "store", "shipping").with_refund_state()
 
 
 @admin.register(OrderShipping)
@@ -226,15 +252,38 @@ class OrderShippingAdmin(ReadOnlyForStaffMixin):
         return qs.select_related("order", "order__user", "order__store")
 
 
+@admin.register(MidtransWebhookEvent)
+class MidtransWebhookEventAdmin(ReadOnlyForStaffMixin):
+    list_display = [
+        "order_id",
+        "transaction_status",
+        "status",
+        "attempts",
+        "processed_at",
+        "created_at",
+    ]
+    list_filter = ["status", "transaction_status", "created_at"]
+    search_fields = ["order_id", "transaction_id"]
+    readonly_fields = ["show_json_payload", "created_at", "updated_at"]
+    exclude = ["payload"]
+    date_hierarchy = "created_at"
+
+    def show_json_payload(self, obj):
+        # payload datang dari luar, di-escape lewat format_html
+        return format_html("<pre>{}</pre>", json.dumps(obj.payload, indent=2))
+
+    show_json_payload.short_description = "Payload"
+
+
 @admin.register(RefundRequest)
 class RefundRequestAdmin(admin.ModelAdmin):
     list_display = ["id", "order_item", "amount", "reason", "status", "requested_at"]
     list_filter = ["status", "reason"]
     actions = ["approve_selected", "reject_selected", "complete_selected"]
-    
+
     def has_add_permission(self, request):
         return False
-        
+
     def get_readonly_fields(self, request, obj=None):
         base_readonly = ["requested_at", "approved_at", "completed_at"]
         if obj and obj.status == RefundRequest.Status.COMPLETED:
@@ -242,25 +291,48 @@ class RefundRequestAdmin(admin.ModelAdmin):
         return base_readonly
 
     def approve_selected(self, request, queryset):
-        for refund_request in queryset.filter(status=RefundRequest.Status.REQUESTED):
-            try:
-                RefundService(refund_request).approve()
-            except Exception as e:
-                self.message_user(request, f"Gagal approve {refund_request}: {e}", level="error")
+        ids = queryset.filter(status=RefundRequest.Status.REQUESTED).values_list(
+            "pk", flat=True
+        )
+        self.report_results(request, "approve", BulkRefundService(ids).approve())
+
     approve_selected.short_description = "Approve refund request terpilih"
 
     def reject_selected(self, request, queryset):
-        for refund_request in queryset.filter(status=RefundRequest.Status.REQUESTED):
-            try:
-                RefundService(refund_request).reject()
-            except Exception as e:
-                self.message_user(request, f"Gagal reject {refund_request}: {e}", level="error")
+        ids = queryset.filter(status=RefundRequest.Status.REQUESTED).values_list(
+            "pk", flat=True
+        )
+        self.report_results(request, "reject", BulkRefundService(ids).reject())
+
     reject_selected.short_description = "Reject refund request terpilih"
 
     def complete_selected(self, request, queryset):
-        for refund_request in queryset.filter(status=RefundRequest.Status.APPROVED):
-            try:
-                RefundService(refund_request).complete()
-            except Exception as e:
-                self.message_user(request, f"Gagal complete {refund_request}: {e}", level="error")
-    complete_selected.short_description = "Complete refund request terpilih (restore stock)"
\ No newline at end of file
+        ids = queryset.filter(status=RefundRequest.Status.APPROVED).values_list(
+            "pk", flat=True
+        )
+        self.report_results(request, "complete", BulkRefundService(ids).complete())
+
+    complete_selected.short_description = (
+        "Complete refund request terpilih (restore stock)"
+    )
+
+    def report_results(self, request, action, results):
+        failed = {
+            pk: reason
+            for pk, reason in results.items()
+            if reason != BulkRefundService.OK
+        }
+        succeeded = len(results) - len(failed)
+        if succeeded:
+            self.message_user(
+                request, f"{succeeded} refund request berhasil di-{action}"
+            )
+        # satu pesan per item, dibatasi supaya halaman admin tetap terbaca
+        for pk, reason in list(failed.items())[:20]:
+            self.message_user(
+                request, f"Gagal {action} refund #{pk}: {reason}", level="error"
+            )
+        if len(failed) > 20:
+            self.message_user(
+                request, f"... dan {len(failed) - 20} gagal lainnya", level="error"
+            )
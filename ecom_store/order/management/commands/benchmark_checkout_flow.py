@@ -0,0 +1,505 @@
+import hashlib
+import json
+import math
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from cart.models import Cart
+from config.midtrans import snap
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from order.models import CheckoutSession, MidtransWebhookEvent, Order
+from product.models import Category, Product
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from shipping_address.models import (
+    City,
+    District,
+    Province,
+    ShippingAddress,
+    SubDistrict,
+)
+from store.models import Store, StoreShippingOption
+
+User = get_user_model()
+
+STEPS = ("checkout", "shipping_rates", "transaction", "webhook")
+# ro_id wilayah benchmark, jauh dari ro_id RajaOngkir asli
+BENCHMARK_RO_ID = 990_001
+BENCHMARK_SERVER_KEY = "benchmark-server-key"
+
+
+def rate_option(shipping_name, service_name, cost, weight):
+    return {
+        "shipping_name": shipping_name,
+        "service_name": service_name,
+        "weight": weight,
+        "is_cod": True,
+        "shipping_cost": cost,
+        "shipping_cashback": 0,
+        "shipping_cost_net": cost,
+        "grandtotal": cost,
+        "service_fee": 0,
+        "net_income": cost,
+        "etd": "2-3 day",
+    }
+
+
+class StubProviderHandler(BaseHTTPRequestHandler):
+    """
+    Stub RajaOngkir (GET /tariff/api/v1/calculate) dan Midtrans Snap
+    (POST /snap/v1/transactions) dengan latency buatan.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if not self.path.startswith("/tariff/api/v1/calculate"):
+            return self.reply(404, {"meta": {"status": "error"}})
+        self.server.count("rajaongkir")
+        time.sleep(self.server.rajaongkir_latency)
+        self.reply(
+            200,
+            {
+                "meta": {"status": "success"},
+                "data": {
+                    "calculate_reguler": [
+                        rate_option("JNE", "REG", 10_000, 1),
+                        rate_option("SICEPAT", "REG", 11_000, 1),
+                    ],
+                    "calculate_cargo": [],
+                    "calculate_instant": [],
+                },
+            },
+        )
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/snap/v1/transactions":
+            return self.reply(404, {"error_messages": ["not found"]})
+        self.server.count("midtrans")
+        time.sleep(self.server.midtrans_latency)
+        token = uuid.uuid4().hex
+        self.reply(
+            201,
+            {"token": token, "redirect_url": f"http://stub/snap/v2/vtweb/{token}"},
+        )
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rajaongkir_latency, midtrans_latency):
+        super().__init__(("127.0.0.1", 0), StubProviderHandler)
+        self.rajaongkir_latency = rajaongkir_latency
+        self.midtrans_latency = midtrans_latency
+        self.calls = {"rajaongkir": 0, "midtrans": 0}
+        self.lock = threading.Lock()
+
+    def count(self, provider):
+        with self.lock:
+            self.calls[provider] += 1
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+def percentile(samples, pct):
+    # nearest-rank
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark flow checkout -> shipping-rates -> transaction -> webhook Midtrans "
+        "dengan N user paralel. RajaOngkir dan Midtrans Snap diganti stub HTTP lokal, "
+        "fixture dibuat dengan bulk_create dan dihapus setelah selesai. Output JSON: "
+        "throughput, latency p50/p95/p99 dan jumlah query per step. Jalankan di "
+        "MySQL dev DB (SQLite mengunci seluruh DB saat write)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--items", type=int, default=3, help="Item cart per user.")
+        parser.add_argument("--products", type=int, default=20)
+        parser.add_argument("--rajaongkir-latency", type=float, default=0.05)
+        parser.add_argument("--midtrans-latency", type=float, default=0.1)
+        parser.add_argument("--output", help="Tulis hasil JSON ke file ini.")
+        parser.add_argument(
+            "--baseline",
+            help="Hasil JSON run sebelumnya; gagal kalau query per step naik "
+            "atau p95 lebih lambat dari --tolerance.",
+        )
+        parser.add_argument("--tolerance", type=float, default=0.25)
+        parser.add_argument(
+            "--keep", action="store_true", help="Jangan hapus data benchmark."
+        )
+
+    def handle(self, *args, **options):
+        if options["items"] > options["products"]:
+            raise CommandError("--items tidak boleh lebih besar dari --products")
+
+        self.prefix = f"bench{uuid.uuid4().hex[:6]}"
+        self.created = {}
+        server = StubProviderServer(
+            options["rajaongkir_latency"], options["midtrans_latency"]
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            seed_start = time.perf_counter()
+            users = self.seed(options)
+            seed_elapsed = time.perf_counter() - seed_start
+
+            with override_settings(
+                RAJA_ONGKIR_DELIVERY_BASE_URL=server.base_url,
+                MIDTRANS_SERVER_KEY=BENCHMARK_SERVER_KEY,
+            ), patch.object(
+                snap.api_config,
+                "get_snap_base_url",
+                return_value=f"{server.base_url}/snap/v1",
+            ):
+                result = self.run(users, options)
+        finally:
+            server.shutdown()
+            server.server_close()
+            if not options["keep"]:
+                self.cleanup()
+
+        result["seed_s"] = round(seed_elapsed, 3)
+        result["provider_calls"] = server.calls
+
+        output = json.dumps(result, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+        if options["baseline"]:
+            self.compare(result, options["baseline"], options["tolerance"])
+
+    # ------------------------------------------------------------------ #
+    #  Fixture                                                             #
+    # ------------------------------------------------------------------ #
+
+    def seed(self, options):
+        ro_id = BENCHMARK_RO_ID
+        province, _ = Province.objects.get_or_create(
+            ro_id=ro_id, defaults={"name": "BENCHMARK"}
+        )
+        city, _ = City.objects.get_or_create(
+            ro_id=ro_id, defaults={"name": "BENCHMARK", "province": province}
+        )
+        district, _ = District.objects.get_or_create(
+            ro_id=ro_id, defaults={"name": "BENCHMARK", "city": city}
+        )
+        subdistrict, _ = SubDistrict.objects.get_or_create(
+            ro_id=ro_id,
+            defaults={"name": "BENCHMARK", "zip_code": "00000", "district": district},
+        )
+        location = {
+            "province": province,
+            "city": city,
+            "district": district,
+            "subdistrict": subdistrict,
+        }
+
+        if not Store.objects.filter(is_active=True).exists():
+            raise CommandError(
+                "Butuh satu store aktif (lihat order/tests/helper_setup.set_store)."
+            )
+        if not StoreShippingOption.objects.filter(
+            shipping_name="JNE", is_active=True
+        ).exists():
+            option = StoreShippingOption.objects.create(
+                store=Store.objects.get(is_active=True), shipping_name="JNE"
+            )
+            self.created["shipping_option"] = option.pk
+
+        # password di-hash sekali; token JWT dibuat langsung, tanpa endpoint login
+        password = make_password(None)
+        phone_base = int(uuid.uuid4().int % 10**7) * 10
+        users = User.objects.bulk_create(
+            User(
+                username=f"{self.prefix}_{i}",
+                email=f"{self.prefix}_{i}@example.com",
+                password=password,
+                phone_number=f"+62899{phone_base + i:08d}",
+            )
+            for i in range(options["users"])
+        )
+        # bulk_create tidak mengisi pk di MySQL
+        users = list(
+            User.objects.filter(username__startswith=f"{self.prefix}_").order_by("id")
+        )
+        self.created["users"] = [user.pk for user in users]
+
+        ShippingAddress.objects.bulk_create(
+            ShippingAddress(
+                user=user,
+                street_address="Jl. Benchmark",
+                is_default=True,
+                destination_id=ro_id,
+                latitude=-8.5899,
+                longitude=116.1107,
+                **location,
+            )
+            for user in users
+        )
+
+        category, _ = Category.objects.get_or_create(
+            name="Benchmark Category", defaults={"desc": "Benchmark"}
+        )
+        Product.objects.bulk_create(
+            Product(
+                name=f"{self.prefix} product {i}",
+                variant_name="Benchmark",
+                category=category,
+                price=10_000 + i * 1_000,
+                stock=options["users"] * options["items"] + 100,
+                weight=250,
+                width=10,
+                height=5,
+                length=15,
+            )
+            for i in range(options["products"])
+        )
+        products = list(
+            Product.objects.filter(name__startswith=f"{self.prefix} ").order_by("id")
+        )
+        self.created["products"] = [product.pk for product in products]
+
+        # produk digilir antar user supaya ada kontensi di produk yang sama
+        Cart.objects.bulk_create(
+            Cart(user=user, product=products[(i + k) % len(products)], qty=1)
+            for i, user in enumerate(users)
+            for k in range(options["items"])
+        )
+        carts = {}
+        for user_id, cart_id in Cart.objects.filter(user__in=users).values_list(
+            "user_id", "id"
+        ):
+            carts.setdefault(user_id, []).append(cart_id)
+
+        return [(user, carts[user.pk]) for user in users]
+
+    def cleanup(self):
+        user_ids = self.created.get("users", [])
+        orders = Order.objects.filter(user_id__in=user_ids)
+        order_ids = [
+            str(order_id) for order_id in orders.values_list("order_id", flat=True)
+        ]
+        MidtransWebhookEvent.objects.filter(order_id__in=order_ids).delete()
+        CheckoutSession.objects.filter(user_id__in=user_ids).delete()
+        orders.delete()
+        Cart.objects.filter(user_id__in=user_ids).delete()
+        ShippingAddress.objects.filter(user_id__in=user_ids).delete()
+        User.objects.filter(pk__in=user_ids).hard_delete()
+        Product.objects.filter(pk__in=self.created.get("products", [])).delete()
+        if "shipping_option" in self.created:
+            StoreShippingOption.objects.filter(
+                pk=self.created["shipping_option"]
+            ).delete()
+
+    # ------------------------------------------------------------------ #
+    #  Flow                                                                #
+    # ------------------------------------------------------------------ #
+
+    def run(self, users, options):
+        samples = {step: [] for step in STEPS}
+        errors = []
+        lock = threading.Lock()
+
+        def worker(user, cart_ids):
+            try:
+                rows, error = self.flow(user, cart_ids)
+            finally:
+                # tiap thread punya koneksi DB sendiri
+                connection.close()
+            with lock:
+                for step, row in rows:
+                    samples[step].append(row)
+                if error:
+                    errors.append(error)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            for user, cart_ids in users:
+                executor.submit(worker, user, cart_ids)
+        elapsed = time.perf_counter() - start
+
+        completed = len(samples["webhook"])
+        return {
+            "config": {
+                key: options[key]
+                for key in (
+                    "users",
+                    "workers",
+                    "items",
+                    "products",
+                    "rajaongkir_latency",
+                    "midtrans_latency",
+                )
+            }
+            | {
+                "database": connection.vendor,
+                "webhook_async": settings.MIDTRANS_WEBHOOK_ASYNC,
+            },
+            "elapsed_s": round(elapsed, 3),
+            "flows": {"completed": completed, "failed": len(errors)},
+            "throughput_flows_per_s": round(completed / elapsed, 2) if elapsed else 0,
+            "steps": {step: self.summarize(rows) for step, rows in samples.items()},
+            "errors": errors[:10],
+        }
+
+    def flow(self, user, cart_ids):
+        client = APIClient(SERVER_NAME="localhost")
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        rows = []
+
+        def step(name, send):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                res = send()
+                elapsed = (time.perf_counter() - start) * 1000
+            ok = res.status_code == 200
+            rows.append((name, {"ms": elapsed, "queries": len(ctx), "ok": ok}))
+            if not ok:
+                raise RuntimeError(f"{name} {res.status_code}: {res.content[:200]!r}")
+            return res
+
+        try:
+            res = step(
+                "checkout",
+                lambda: client.post(
+                    reverse("checkout"), {"cart_ids": cart_ids}, format="json"
+                ),
+            )
+            checkout_id = res.data["checkout_id"]
+
+            res = step(
+                "shipping_rates",
+                lambda: client.post(
+                    reverse("shipping_rates"),
+                    {"checkout_id": checkout_id},
+                    format="json",
+                ),
+            )
+            shipping = dict(res.data["shipping_options"]["reguler"])
+            del shipping["grandtotal"]
+            shipping["shipping_weight"] = shipping.pop("weight")
+
+            step(
+                "transaction",
+                lambda: client.post(
+                    reverse("transaction"),
+                    {"checkout_id": checkout_id, **shipping},
+                    format="json",
+                ),
+            )
+
+            order = Order.objects.get(checkoutsession__id=checkout_id)
+            body = self.settlement(order)
+            step(
+                "webhook",
+                lambda: APIClient(SERVER_NAME="localhost").post(
+                    reverse("midtrans_webhook"),
+                    data=body,
+                    content_type="application/json",
+                ),
+            )
+        except Exception as e:
+            # error di-report, thread lain tetap jalan
+            return rows, f"user {user.pk}: {e}"
+        return rows, None
+
+    def settlement(self, order):
+        order_id, status_code = str(order.order_id), "200"
+        gross_amount = f"{order.grand_total:.2f}"
+        raw = f"{order_id}{status_code}{gross_amount}{BENCHMARK_SERVER_KEY}"
+        return json.dumps(
+            {
+                "order_id": order_id,
+                "transaction_id": f"benchmark-{order_id}",
+                "status_code": status_code,
+                "gross_amount": gross_amount,
+                "signature_key": hashlib.sha512(raw.encode()).hexdigest(),
+                "transaction_status": "settlement",
+                "fraud_status": "accept",
+            }
+        )
+
+    # ------------------------------------------------------------------ #
+    #  Report                                                              #
+    # ------------------------------------------------------------------ #
+
+    def summarize(self, rows):
+        ok = [row for row in rows if row["ok"]]
+        summary = {"count": len(ok), "errors": len(rows) - len(ok)}
+        if not ok:
+            return summary
+
+        latencies = [row["ms"] for row in ok]
+        queries = [row["queries"] for row in ok]
+        summary.update(
+            {
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+                "queries": {
+                    "min": min(queries),
+                    "max": max(queries),
+                    "mean": round(statistics.mean(queries), 2),
+                },
+            }
+        )
+        return summary
+
+    def compare(self, result, path, tolerance):
+        with open(path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for step in STEPS:
+            current, before = result["steps"][step], baseline["steps"].get(step, {})
+            if current.get("errors"):
+                regressions.append(f"{step}: {current['errors']} request gagal")
+            if "queries" not in current or "queries" not in before:
+                continue
+            if current["queries"]["max"] > before["queries"]["max"]:
+                regressions.append(
+                    f"{step}: query {before['queries']['max']} -> {current['queries']['max']}"
+                )
+            if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{step}: p95 {before['p95_ms']} ms -> {current['p95_ms']} ms"
+                )
+
+        if regressions:
+            raise CommandError("Regresi dibanding baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("tidak ada regresi dibanding baseline"))
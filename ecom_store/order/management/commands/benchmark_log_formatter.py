@@ -0,0 +1,117 @@
+import logging
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from config import jsonlog
+from config.jsonlog import JSONFormatter
+from django.core.management.base import BaseCommand
+
+DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+
+def sample_records():
+    """Record dengan extra seperti yang ditulis view/service untuk tiap event_type."""
+    order_id = str(uuid.uuid4())
+    notification = {
+        "transaction_time": "2026-01-01 10:00:00",
+        "transaction_status": "settlement",
+        "transaction_id": str(uuid.uuid4()),
+        "status_message": "midtrans payment notification",
+        "status_code": "200",
+        "signature_key": "f" * 128,
+        "payment_type": "bank_transfer",
+        "order_id": order_id,
+        "merchant_id": "G000000000",
+        "gross_amount": "125000.00",
+        "fraud_status": "accept",
+        "currency": "IDR",
+        "va_numbers": [{"va_number": "12345678901", "bank": "bca"}],
+    }
+    extras = {
+        "transaction": {
+            "event_type": "transaction",
+            "order_id": order_id,
+            "payload": notification,
+            "status_code": 200,
+            "transaction_status": "settlement",
+            "fraud_status": "accept",
+        },
+        "refund": {
+            "event_type": "refund",
+            "order_id": order_id,
+            "refund_request_id": 42,
+            "reason": "Barang rusak saat diterima",
+            "payment_status": "paid",
+            "reduced_stock": True,
+        },
+        "shippingrates": {
+            "event_type": "shippingrates",
+            "checkout_id": uuid.uuid4(),
+            "order_id": order_id,
+            "item_value": Decimal("125000.00"),
+            "weight": 1200,
+        },
+        "login": {
+            "event_type": "login",
+            "user_id": 17,
+            "email": "pembeli@example.com",
+            "ip_address": "203.0.113.10",
+            "user_agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
+        },
+    }
+    return {
+        event_type: logging.makeLogRecord(
+            {
+                "name": "auth.audit" if event_type == "login" else "order",
+                "levelno": logging.INFO,
+                "levelname": "INFO",
+                "msg": f"Contoh event {event_type}",
+                **extra,
+            }
+        )
+        for event_type, extra in extras.items()
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark JSONFormatter: biaya format() per record (mikrodetik) "
+        "untuk event transaction, refund, shippingrates dan login, lewat json "
+        "stdlib dan orjson (kalau terinstall)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=20_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        formatters = {"stdlib": JSONFormatter(datefmt=DATEFMT)}
+        if jsonlog.orjson is not None:
+            formatters["orjson"] = JSONFormatter(datefmt=DATEFMT, use_orjson=True)
+
+        self.stdout.write(
+            f"{'event_type':>14} | "
+            + " | ".join(f"{name + ' (us)':>12}" for name in formatters)
+        )
+        for event_type, record in sample_records().items():
+            cells = [
+                self.measure(formatter, record, options["records"], options["repeat"])
+                for formatter in formatters.values()
+            ]
+            self.stdout.write(
+                f"{event_type:>14} | " + " | ".join(f"{cell:>12.2f}" for cell in cells)
+            )
+
+        self.stdout.write(self.style.SUCCESS("benchmark selesai"))
+
+    def measure(self, formatter, record, records, repeat):
+        # median dari beberapa run; per run rata-rata per record
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(records):
+                formatter.format(record)
+            runs.append((time.perf_counter() - start) / records * 1_000_000)
+        return statistics.median(runs)
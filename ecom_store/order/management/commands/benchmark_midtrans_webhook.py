@@ -0,0 +1,146 @@
+import hashlib
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from order.models import MidtransWebhookEvent, Order, OrderItem
+from product.models import Product
+from rest_framework.test import APIClient
+from store.models import Store
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test MidtransWebhookView untuk retry Midtrans: delivery settlement yang "
+        "sama dikirim berulang kali. Bandingkan 'reprocess' (event dipaksa failed, "
+        "perilaku sebelum ada event log) dengan 'duplicate' (event sudah processed). "
+        "Butuh MIDTRANS_SERVER_KEY, satu store dan satu produk; data di-rollback."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deliveries", type=int, default=200)
+
+    def handle(self, *args, **options):
+        if not settings.MIDTRANS_SERVER_KEY:
+            raise CommandError(
+                "MIDTRANS_SERVER_KEY kosong, signature tidak bisa dibuat."
+            )
+
+        self.store = Store.objects.first()
+        self.product = Product.objects.first()
+        if self.store is None or self.product is None:
+            raise CommandError("Butuh minimal satu store dan satu produk di database.")
+
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.url = reverse("midtrans_webhook")
+
+        self.stdout.write(
+            f"{'case':>10} | {'p50/p95 (ms)':>16} | {'queries':>7} | "
+            f"{'order queries':>13} | {'FOR UPDATE':>10}"
+        )
+
+        with transaction.atomic():
+            order = self.seed()
+            body = self.signed_body(order)
+
+            first = self.measure(body)
+            self.write_row("first", first)
+
+            event = MidtransWebhookEvent.objects.get(order_id=str(order.order_id))
+
+            def force_reprocess():
+                MidtransWebhookEvent.objects.filter(pk=event.pk).update(
+                    status=MidtransWebhookEvent.Status.FAILED
+                )
+
+            self.write_row(
+                "reprocess", self.run_case(body, options["deliveries"], force_reprocess)
+            )
+            self.write_row("duplicate", self.run_case(body, options["deliveries"]))
+            # data benchmark tidak boleh tertinggal di DB
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("benchmark selesai"))
+
+    def seed(self):
+        user = get_user_model().objects.create_user(
+            username="benchmark_midtrans_webhook",
+            email="benchmark_midtrans_webhook@example.com",
+            password="benchmark-midtrans-webhook",
+            phone_number="080000000000",
+        )
+        order = Order.objects.create(user=user, store=self.store)
+        OrderItem.objects.create(
+            order=order, product=self.product, product_price=self.product.price, qty=1
+        )
+        # reservasi checkout supaya reduce_stock di delivery pertama valid
+        Product.objects.filter(pk=self.product.pk).update(
+            stock=F("stock") + 1, reserved_stock=F("reserved_stock") + 1
+        )
+        return order
+
+    def signed_body(self, order):
+        order_id, status_code, gross_amount = str(order.order_id), "200", "10000"
+        raw = f"{order_id}{status_code}{gross_amount}{settings.MIDTRANS_SERVER_KEY}"
+        return json.dumps(
+            {
+                "order_id": order_id,
+                "transaction_id": f"benchmark-{order_id}",
+                "status_code": status_code,
+                "gross_amount": gross_amount,
+                "signature_key": hashlib.sha512(raw.encode()).hexdigest(),
+                "transaction_status": "settlement",
+                "fraud_status": "accept",
+            }
+        )
+
+    def measure(self, body):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            res = self.client.post(self.url, data=body, content_type="application/json")
+            elapsed = (time.perf_counter() - start) * 1000
+
+        if res.status_code != 200:
+            raise RuntimeError(
+                f"MidtransWebhookView returned {res.status_code}: {res.content[:200]}"
+            )
+
+        sqls = [query["sql"] for query in ctx.captured_queries]
+        return {
+            "samples": [elapsed],
+            "queries": len(sqls),
+            "order_queries": sum(Order._meta.db_table in sql for sql in sqls),
+            "locks": sum("FOR UPDATE" in sql for sql in sqls),
+        }
+
+    def run_case(self, body, deliveries, before_each=None):
+        rows = []
+        for _ in range(deliveries):
+            if before_each is not None:
+                before_each()
+            rows.append(self.measure(body))
+
+        return {
+            "samples": [row["samples"][0] for row in rows],
+            # angka per delivery terakhir; semua delivery di satu case identik
+            "queries": rows[-1]["queries"],
+            "order_queries": rows[-1]["order_queries"],
+            "locks": rows[-1]["locks"],
+        }
+
+    def write_row(self, name, row):
+        samples = row["samples"]
+        p95 = (
+            statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+        )
+        self.stdout.write(
+            f"{name:>10} | {statistics.median(samples):>7.2f}/{p95:<8.2f} | "
+            f"{row['queries']:>7} | {row['order_queries']:>13} | {row['locks']:>10}"
+        )
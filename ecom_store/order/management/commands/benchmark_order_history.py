@@ -0,0 +1,179 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from order.models import Order, OrderItem, OrderShipping
+from order.pagination import OrderHistoryPagination
+from product.models import Product
+from rest_framework.test import APIClient
+from store.models import Store
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark GetOrderByFilter: full listing vs keyset pagination (first & deep "
+        "page) untuk panjang riwayat order yang berbeda. Butuh minimal satu store dan "
+        "produk; data benchmark di-rollback setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[100, 1_000, 10_000],
+            help="Jumlah order item milik user benchmark per skenario.",
+        )
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--full-limit",
+            type=int,
+            default=5_000,
+            help="Lewati benchmark full listing (tanpa pagination) di atas ukuran ini.",
+        )
+
+    def handle(self, *args, **options):
+        self.store = Store.objects.first()
+        self.product = Product.objects.first()
+        if self.store is None or self.product is None:
+            raise CommandError("Butuh minimal satu store dan satu produk di database.")
+
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.url = reverse("order")
+
+        self.stdout.write(
+            f"{'size':>7} | {'full p95 (ms)':>13} | {'first p50/p95 (ms)':>18} | "
+            f"{'deep p50/p95 (ms)':>17} | {'queries/page':>12}"
+        )
+
+        for size in options["sizes"]:
+            with transaction.atomic():
+                user = self.seed(size)
+                self.client.force_authenticate(user)
+                row = self.run_case(size, options)
+                # data benchmark tidak boleh tertinggal di DB
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{size:>7} | {row['full']:>13} | "
+                f"{row['first'][0]:>8.2f}/{row['first'][1]:<9.2f} | "
+                f"{row['deep'][0]:>8.2f}/{row['deep'][1]:<8.2f} | {row['queries']:>12}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("benchmark selesai"))
+
+    def seed(self, size):
+        user = get_user_model().objects.create_user(
+            username="benchmark_order_history",
+            email="benchmark_order_history@example.com",
+            password="benchmark-order-history",
+            phone_number="080000000000",
+        )
+
+        # bulk_create: Order.save() menjalankan full_clean per baris
+        orders = Order.objects.bulk_create(
+            (
+                Order(
+                    user=user,
+                    store=self.store,
+                    status=Order.Status.DELIVERED,
+                    payment_status=Order.PaymentStatus.PAID,
+                    payment_method=Order.PaymentMethod.BANK_TRANSFER,
+                )
+                for _ in range(size)
+            ),
+            batch_size=2_000,
+        )
+        if orders and orders[0].pk is None:
+            # backend tanpa RETURNING (MySQL) tidak mengisi pk hasil bulk_create
+            orders = list(Order.objects.filter(user=user).order_by("id"))
+
+        OrderShipping.objects.bulk_create(
+            (
+                OrderShipping(
+                    order=order,
+                    shipping_name="JNE",
+                    service_name="REG",
+                    etd="2-3",
+                    shipping_cost=10_000,
+                    shipping_cost_net=10_000,
+                    service_fee=1_000,
+                    origin_ro=1,
+                    origin_address="Benchmark",
+                    destination_ro=2,
+                    destination_address="Benchmark",
+                )
+                for order in orders
+            ),
+            batch_size=2_000,
+        )
+        OrderItem.objects.bulk_create(
+            (
+                OrderItem(
+                    order=order,
+                    user=user,
+                    product=self.product,
+                    product_price=self.product.price,
+                    qty=1,
+                )
+                for order in orders
+            ),
+            batch_size=2_000,
+        )
+        return user
+
+    def timed_get(self, params, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            res = self.client.get(self.url, params)
+            samples.append((time.perf_counter() - start) * 1000)
+
+            if res.status_code != 200:
+                raise RuntimeError(
+                    f"GetOrderByFilter returned {res.status_code}: {res.content[:200]}"
+                )
+
+        p95 = (
+            statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+        )
+        return statistics.median(samples), p95
+
+    def run_case(self, size, options):
+        base_params = {"status": Order.Status.DELIVERED}
+        page_params = {**base_params, "page_size": options["page_size"]}
+
+        full = "skipped"
+        if size <= options["full_limit"]:
+            _, full_p95 = self.timed_get(base_params, 5)
+            full = f"{full_p95:.2f}"
+
+        first = self.timed_get(page_params, options["repeat"])
+
+        # cursor untuk halaman terakhir (item paling lama)
+        ordering = OrderHistoryPagination.orderings["-created_at"]
+        anchor = (
+            OrderItem.objects.filter(user__username="benchmark_order_history")
+            .order_by(*ordering)
+            .only("id", "created_at")[max(size - options["page_size"] - 1, 0)]
+        )
+        deep_params = {
+            **page_params,
+            "cursor": OrderHistoryPagination().encode_cursor(anchor, ordering),
+        }
+        deep = self.timed_get(deep_params, options["repeat"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, deep_params)
+
+        return {
+            "full": full,
+            "first": first,
+            "deep": deep,
+            "queries": len(ctx.captured_queries),
+        }
@@ -0,0 +1,146 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from order.services.flash_stock import get_flash_stock
+from order.services.stock import InsufficientStock, StockLedger
+from product.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark reservasi stok di satu produk 'hot': SELECT ... FOR UPDATE + save() "
+        "vs conditional UPDATE (StockLedger). Jalankan di MySQL dev DB; produk "
+        "benchmark dibuat sendiri lalu dihapus setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument(
+            "--attempts", type=int, default=200, help="Checkout per thread."
+        )
+        parser.add_argument(
+            "--stock",
+            type=int,
+            default=1_000,
+            help="Stok produk hot. Sengaja lebih kecil dari total attempt supaya oversell terlihat.",
+        )
+        parser.add_argument(
+            "--flash",
+            action="store_true",
+            help="Tambah skenario counter Redis flash sale (butuh FLASH_SALE_ENABLED=True).",
+        )
+
+    def handle(self, *args, **options):
+        strategies = [("legacy", self.reserve_legacy), ("ledger", self.reserve_ledger)]
+        if options["flash"]:
+            if not settings.FLASH_SALE_ENABLED:
+                raise CommandError("--flash butuh FLASH_SALE_ENABLED=True")
+            strategies.append(("flash", self.reserve_ledger))
+
+        self.stdout.write(
+            f"{'strategy':>10} | {'ok':>6} | {'rejected':>8} | {'errors':>6} | "
+            f"{'elapsed (s)':>11} | {'checkout/s':>10} | {'reserved':>8}"
+        )
+
+        for name, reserve in strategies:
+            product = self.create_product(options["stock"])
+            product_id = product.pk
+            if name == "flash":
+                get_flash_stock().enable([product_id])
+            flushed = {}
+            try:
+                row = self.run_case(product, reserve, options)
+            finally:
+                if name == "flash":
+                    flushed = get_flash_stock().disable([product_id])
+                product.delete()
+
+            if name == "flash":
+                # reserved_stock MySQL baru terisi setelah delta Redis di-flush
+                row["reserved"] = flushed.get(product_id, (0, 0))[1]
+
+            self.stdout.write(
+                f"{name:>10} | {row['ok']:>6} | {row['rejected']:>8} | {row['errors']:>6} | "
+                f"{row['elapsed']:>11.2f} | {row['throughput']:>10.1f} | {row['reserved']:>8}"
+            )
+
+            if row["reserved"] > options["stock"]:
+                self.stderr.write(self.style.ERROR(f"{name}: OVERSELL terdeteksi"))
+
+        self.stdout.write(self.style.SUCCESS("benchmark selesai"))
+
+    def create_product(self, stock):
+        category, _ = Category.objects.get_or_create(
+            name="Benchmark Category", defaults={"desc": "Benchmark"}
+        )
+        return Product.objects.create(
+            name="Benchmark Hot Product",
+            variant_name="Flash Sale",
+            category=category,
+            price=10_000,
+            stock=stock,
+            weight=500,
+            width=10,
+            height=10,
+            length=10,
+        )
+
+    def reserve_legacy(self, product_id):
+        # pola lama CheckoutService._validate_and_reserve_stock
+        with transaction.atomic():
+            product = Product.objects.select_for_update().get(pk=product_id)
+            if product.stock - product.reserved_stock < 1:
+                return False
+            product.reserved_stock += 1
+            product.save(update_fields=["reserved_stock"])
+        return True
+
+    def reserve_ledger(self, product_id):
+        try:
+            with transaction.atomic():
+                StockLedger({product_id: 1}).reserve()
+        except InsufficientStock:
+            return False
+        return True
+
+    def run_case(self, product, reserve, options):
+        counts = {"ok": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(options["threads"])
+
+        def worker():
+            local = {"ok": 0, "rejected": 0, "errors": 0}
+            try:
+                barrier.wait()
+                for _ in range(options["attempts"]):
+                    try:
+                        local["ok" if reserve(product.pk) else "rejected"] += 1
+                    except Exception:
+                        # deadlock / lock wait timeout dihitung, bukan dibuang
+                        local["errors"] += 1
+            finally:
+                # tiap thread punya koneksi DB sendiri
+                connection.close()
+                with lock:
+                    for key, value in local.items():
+                        counts[key] += value
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        product.refresh_from_db()
+        attempts = options["threads"] * options["attempts"]
+        return {
+            **counts,
+            "elapsed": elapsed,
+            "throughput": attempts / elapsed if elapsed else 0.0,
+            "reserved": product.reserved_stock,
+        }
@@ -0,0 +1,46 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from order.services.flash_stock import get_flash_stock
+
+
+class Command(BaseCommand):
+    help = (
+        "Kelola counter stok flash sale di Redis: enable (salin stok MySQL ke Redis), "
+        "disable (flush delta lalu kembali ke MySQL), status, reconcile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action", choices=["enable", "disable", "status", "reconcile"]
+        )
+        parser.add_argument("product_ids", nargs="*", type=int)
+
+    def handle(self, *args, **options):
+        if not settings.FLASH_SALE_ENABLED:
+            raise CommandError(
+                "FLASH_SALE_ENABLED=False, StockLedger tidak akan memakai counter Redis."
+            )
+
+        flash = get_flash_stock()
+        action, product_ids = options["action"], options["product_ids"]
+
+        if action in ("enable", "disable") and not product_ids:
+            raise CommandError(f"{action} butuh minimal satu product id")
+
+        if action == "enable":
+            enabled = flash.enable(product_ids)
+            skipped = sorted(set(product_ids) - set(enabled))
+            self.stdout.write(f"enabled: {enabled}")
+            if skipped:
+                self.stdout.write(
+                    self.style.WARNING(f"sudah aktif / tidak ditemukan: {skipped}")
+                )
+        elif action == "disable":
+            flushed = flash.disable(product_ids)
+            self.stdout.write(f"delta terakhir di-flush: {flushed}")
+        elif action == "reconcile":
+            self.stdout.write(json.dumps(flash.reconcile(), indent=2))
+        else:
+            self.stdout.write(json.dumps(flash.status(product_ids or None), indent=2))
@@ -0,0 +1,63 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from order.models import MidtransWebhookEvent
+from order.views_order_process import MidtransWebhookView
+
+
+class Command(BaseCommand):
+    help = (
+        "Kirim ulang payload Midtrans yang tersimpan di MidtransWebhookEvent ke "
+        "MidtransWebhookView (signature divalidasi ulang). Default: event failed dan "
+        "event received yang macet lebih dari --stale-minutes (mis. task worker "
+        "MIDTRANS_WEBHOOK_ASYNC hilang). Di mode async event di-enqueue ulang."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order-id", help="Replay hanya event milik order ini.")
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=5,
+            help="Event received lebih muda dari ini dianggap masih diproses.",
+        )
+        parser.add_argument("--limit", type=int, default=100)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        stale = timezone.now() - timedelta(minutes=options["stale_minutes"])
+        events = MidtransWebhookEvent.objects.exclude(
+            status=MidtransWebhookEvent.Status.PROCESSED
+        ).exclude(status=MidtransWebhookEvent.Status.RECEIVED, updated_at__gte=stale)
+        if options["order_id"]:
+            events = events.filter(order_id=options["order_id"])
+        events = list(events.order_by("created_at", "id")[: options["limit"]])
+
+        if not events:
+            self.stdout.write("tidak ada event untuk di-replay")
+            return
+
+        view = MidtransWebhookView.as_view()
+        factory = RequestFactory()
+        url = reverse("midtrans_webhook")
+        counts = {}
+
+        for event in events:
+            label = f"{event.order_id} {event.transaction_status} ({event.status})"
+            if options["dry_run"]:
+                self.stdout.write(f"[dry-run] {label}")
+                continue
+
+            request = factory.post(
+                url, data=json.dumps(event.payload), content_type="application/json"
+            )
+            response = view(request)
+            counts[response.status_code] = counts.get(response.status_code, 0) + 1
+            self.stdout.write(f"{label} -> {response.status_code}")
+
+        if counts:
+            self.stdout.write(self.style.SUCCESS(f"replay selesai: {counts}"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0013_remove_order_canceled_at_alter_order_payment_status_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "status", "payment_status", "created_at"],
+                name="order_user_status_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(
+                fields=["order", "is_archived", "created_at"],
+                name="orderitem_order_archived_idx",
+            ),
+        ),
+    ]
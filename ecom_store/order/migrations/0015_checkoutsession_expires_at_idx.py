@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0014_order_history_indexes"),
+        ("shipping_address", "0010_region"),
+        ("store", "0004_storeshippingoption"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="checkoutsession",
+            index=models.Index(
+                fields=["expires_at", "id"], name="checkout_expires_at_idx"
+            ),
+        ),
+    ]
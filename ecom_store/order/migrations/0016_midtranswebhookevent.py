@@ -0,0 +1,73 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0015_checkoutsession_expires_at_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MidtransWebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, editable=False
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("order_id", models.CharField(max_length=64)),
+                (
+                    "transaction_id",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+                (
+                    "transaction_status",
+                    models.CharField(blank=True, default="", max_length=32),
+                ),
+                ("payload", models.JSONField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("received", "Received"),
+                            ("processed", "Processed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="received",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Jumlah delivery yang benar-benar diproses (bukan duplikat).",
+                    ),
+                ),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("order_id", "transaction_id", "transaction_status"),
+                        name="unique_midtrans_webhook_event",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:34
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def backfill_order_totals(apps, schema_editor):
+    # order lama: hitung snapshot sekali dari item, sama seperti calculate_order_totals()
+    Order = apps.get_model("order", "Order")
+    OrderItem = apps.get_model("order", "OrderItem")
+
+    totals = (
+        OrderItem.objects.values("order_id")
+        .annotate(
+            items_subtotal=Sum(F("product_price") * F("qty")),
+            total_weight=Sum(F("product__weight") * F("qty")),
+        )
+        .order_by("order_id")
+    )
+
+    batch = []
+    for row in totals.iterator(chunk_size=1000):
+        batch.append(
+            Order(
+                id=row["order_id"],
+                items_subtotal=int(row["items_subtotal"]),
+                total_weight=row["total_weight"],
+            )
+        )
+        if len(batch) >= 1000:
+            Order.objects.bulk_update(batch, ["items_subtotal", "total_weight"])
+            batch = []
+    if batch:
+        Order.objects.bulk_update(batch, ["items_subtotal", "total_weight"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0016_midtranswebhookevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="items_subtotal",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Snapshot jumlah subtotal semua item (harga x qty) saat checkout.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="total_weight",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Snapshot total berat item dalam gram (berat x qty) saat checkout.",
+            ),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_order_user(apps, schema_editor):
+    Order = apps.get_model("order", "Order")
+    OrderItem = apps.get_model("order", "OrderItem")
+
+    OrderItem.objects.filter(user__isnull=True).update(
+        user_id=Subquery(
+            Order.objects.filter(pk=OuterRef("order_id")).values("user_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0017_order_totals_snapshot"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="order_items",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(copy_order_user, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="orderitem",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                help_text="Salinan order.user supaya riwayat order user bisa dibaca langsung dari index OrderItem. Diisi otomatis dari order saat save().",
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="order_items",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="orderitem_user_created_idx",
+            ),
+        ),
+    ]
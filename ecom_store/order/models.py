@@ -4,6 +4,7 @@ from config.models import BaseModel
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Q
 
 # Create your models here.
 # class Courier(BaseModel):
@@ -24,6 +25,29 @@ class ShippingInsurance(BaseModel):
         return self.shipping
 
 
+class OrderQuerySet(models.QuerySet):
+    def with_refund_state(self):
+        """
+        Annotate jumlah item, item yang sudah di-refund, dan item yang
+        dibatalkan customer dalam query yang sama. refund_status dan
+        is_fully_canceled membaca annotation ini kalau ada, jadi list order
+        tidak lagi query per item.
+        """
+        completed = Q(items__refund_requests__status=RefundRequest.Status.COMPLETED)
+        return self.annotate(
+            item_count=Count("items", distinct=True),
+            refunded_item_count=Count("items", filter=completed, distinct=True),
+            canceled_item_count=Count(
+                "items",
+                filter=completed
+                & Q(
+                    items__refund_requests__reason=RefundRequest.Reason.CUSTOMER_CANCEL
+                ),
+                distinct=True,
+            ),
+        )
+
+
 class Order(BaseModel):
     class Status(models.TextChoices):
         # DRAFT = "draft", "Draft"
@@ -107,12 +131,35 @@ class Order(BaseModel):
         ),
     )
 
+    items_subtotal = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Snapshot jumlah subtotal semua item (harga x qty) saat checkout.",
+    )
+
+    total_weight = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Snapshot total berat item dalam gram (berat x qty) saat checkout.",
+    )
+
     reduced_stock = models.BooleanField(
         default=False,
         editable=False,
         help_text="True setelah reduce_stock() webhook sukses sekali. Tidak berubah saat refund/cancel per item — cek RefundRequest untuk status stock item.",
     )
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # filter riwayat order user (GetOrderByFilter)
+            models.Index(
+                fields=["user", "status", "payment_status", "created_at"],
+                name="order_user_status_created_idx",
+            ),
+        ]
+
     def clean(self):
         super().clean()
 
@@ -127,23 +174,23 @@ class Order(BaseModel):
             
     @property
     def refund_status(self):
-        items = list(self.items.all())
-        refunded_items = [i for i in items if i.is_refunded]
-        if not refunded_items:
+        if hasattr(self, "refunded_item_count"):
+            total, refunded = self.item_count, self.refunded_item_count
+        else:
+            items = list(self.items.all())
+            total, refunded = len(items), sum(1 for i in items if i.is_refunded)
+
+        if not refunded:
             return None
-        if len(refunded_items) == len(items):
+        if refunded == total:
             return "refunded"
         return "partially_refunded"
 
     @property
     def is_fully_canceled(self):
-        return all(
-            item.refund_requests.filter(
-                status=RefundRequest.Status.COMPLETED,
-                reason=RefundRequest.Reason.CUSTOMER_CANCEL,
-            ).exists()
-            for item in self.items.all()
-        )
+        if hasattr(self, "canceled_item_count"):
+            return self.canceled_item_count == self.item_count
+        return all(item.is_canceled_by_customer for item in self.items.all())
 
     def save(self, *args, **kwargs):
         self.full_clean()
@@ -232,22 +279,96 @@ class OrderShipping(BaseModel):
     )
 
 
+class OrderItemQuerySet(models.QuerySet):
+    def with_refund_state(self):
+        """
+        Annotate status refund per item pakai EXISTS. Bisa dipakai langsung
+        atau lewat Prefetch("items", queryset=OrderItem.objects.with_refund_state()).
+        """
+        refunds = RefundRequest.objects.filter(order_item=OuterRef("pk"))
+        completed = refunds.filter(status=RefundRequest.Status.COMPLETED)
+        return self.annotate(
+            refund_completed=Exists(completed),
+            refund_canceled=Exists(
+                completed.filter(reason=RefundRequest.Reason.CUSTOMER_CANCEL)
+            ),
+            refund_active=Exists(
+                refunds.filter(
+                    status__in=[
+                        RefundRequest.Status.REQUESTED,
+                        RefundRequest.Status.APPROVED,
+                    ]
+                )
+            ),
+        )
+
+
 class OrderItem(BaseModel):
     id = models.BigAutoField(primary_key=True)
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name="order_items",
+        editable=False,
+        # sudah tercakup index orderitem_user_created_idx
+        db_index=False,
+        help_text=(
+            "Salinan order.user supaya riwayat order user bisa dibaca langsung "
+            "dari index OrderItem. Diisi otomatis dari order saat save()."
+        ),
+    )
     product = models.ForeignKey("product.Product", on_delete=models.PROTECT)
     product_price = models.DecimalField(max_digits=18, decimal_places=2)
     qty = models.PositiveIntegerField()
     is_archived = models.BooleanField(default=False)
 
+    objects = OrderItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # item per order untuk riwayat/detail order, urut created_at
+            models.Index(
+                fields=["order", "is_archived", "created_at"],
+                name="orderitem_order_archived_idx",
+            ),
+            # riwayat order user (GetOrderByFilter): urutan keyset
+            # (created_at, id) langsung dari index, tanpa sort semua item user.
+            # is_archived tidak ikut prefix: filter boolean dikompilasi jadi
+            # NOT is_archived yang tidak bisa dipakai sebagai kunci index
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="orderitem_user_created_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # bulk_create tidak lewat sini, pemanggilnya wajib mengisi user
+        if self.user_id is None and self.order_id is not None:
+            self.user_id = self.order.user_id
+        super().save(*args, **kwargs)
+
     @property
     def is_refunded(self):
+        if hasattr(self, "refund_completed"):
+            return self.refund_completed
         return self.refund_requests.filter(
             status=RefundRequest.Status.COMPLETED
         ).exists()
 
+    @property
+    def is_canceled_by_customer(self):
+        if hasattr(self, "refund_canceled"):
+            return self.refund_canceled
+        return self.refund_requests.filter(
+            status=RefundRequest.Status.COMPLETED,
+            reason=RefundRequest.Reason.CUSTOMER_CANCEL,
+        ).exists()
+
     @property
     def has_active_refund(self):
+        if hasattr(self, "refund_active"):
+            return self.refund_active
         return self.refund_requests.filter(
             status__in=[RefundRequest.Status.REQUESTED, RefundRequest.Status.APPROVED]
         ).exists()
@@ -276,6 +397,12 @@ class CheckoutSession(BaseModel):
         blank=True,
     )
 
+    class Meta:
+        indexes = [
+            # scan session expired oleh ExpiredCheckoutSweeper
+            models.Index(fields=["expires_at", "id"], name="checkout_expires_at_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.id}"
 
@@ -362,4 +489,42 @@ class RefundRequest(BaseModel):
         return self.order_item.order
 
     def __str__(self):
-        return f"Refund {self.order_item} - {self.status}"
\ No newline at end of file
+        return f"Refund {self.order_item} - {self.status}"
+
+
+class MidtransWebhookEvent(BaseModel):
+    """
+    Log setiap notifikasi Midtrans yang lolos validasi signature. Satu baris
+    per (order_id, transaction_id, transaction_status); retry Midtrans untuk
+    event yang sudah PROCESSED dijawab 200 tanpa menyentuh Order. Payload
+    asli disimpan untuk replay (lihat command replay_midtrans_webhooks).
+    """
+
+    class Status(models.TextChoices):
+        RECEIVED = "received", "Received"
+        PROCESSED = "processed", "Processed"
+        FAILED = "failed", "Failed"
+
+    order_id = models.CharField(max_length=64)
+    transaction_id = models.CharField(max_length=64, blank=True, default="")
+    transaction_status = models.CharField(max_length=32, blank=True, default="")
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.RECEIVED
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Jumlah delivery yang benar-benar diproses (bukan duplikat).",
+    )
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order_id", "transaction_id", "transaction_status"],
+                name="unique_midtrans_webhook_event",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} {self.transaction_status} ({self.status})"
@@ -0,0 +1,14 @@
+from product.pagination import KeysetPagination
+
+
+class OrderHistoryPagination(KeysetPagination):
+    """
+    Keyset pagination untuk riwayat order user, terbaru dulu.
+    Cursor dibangun dari (created_at, id) OrderItem.
+    """
+
+    default_ordering = "-created_at"
+    orderings = {
+        "-created_at": ("-created_at", "-id"),
+        "created_at": ("created_at", "id"),
+    }
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import time
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger("order")
+
+SHIPPING_CACHE_ALIAS = "shipping"
+
+STATS_HIT = "stats:hit"
+STATS_MISS = "stats:miss"
+STATS_COALESCED = "stats:coalesced"
+
+# jeda polling follower saat menunggu hasil leader
+POLL_INTERVAL = 0.05
+
+
+def get_cache():
+    return caches[SHIPPING_CACHE_ALIAS]
+
+
+def _round_up(value, bucket):
+    return int(ceil(value / bucket) * bucket) if bucket > 1 else value
+
+
+def bucket_params(params):
+    """
+    Bulatkan weight dan item_value ke atas ke bucket terdekat supaya order
+    dengan berat/nilai yang hampir sama memakai quote yang sama.
+
+    Yang dikirim ke RajaOngkir juga nilai yang sudah dibulatkan, jadi isi
+    cache selalu quote yang persis untuk key-nya (bukan quote order lain yang
+    kebetulan satu bucket). Pembulatan ke atas supaya ongkir tidak pernah
+    lebih murah dari berat sebenarnya.
+    """
+    params = dict(params)
+
+    if params.get("weight") is not None:
+        grams = round(params["weight"] * 1000)
+        grams = _round_up(grams, settings.SHIPPING_RATE_WEIGHT_BUCKET_GRAMS)
+        params["weight"] = grams / 1000
+
+    if params.get("item_value") is not None:
+        params["item_value"] = _round_up(
+            int(params["item_value"]), settings.SHIPPING_RATE_ITEM_VALUE_BUCKET
+        )
+
+    return params
+
+
+def build_key(params):
+    """
+    Key = rute (shipper/receiver destination id) + bucket berat & nilai + cod.
+    Pin point ikut di-hash karena tarif instant dihitung dari jarak.
+    """
+    route = (
+        f"{params.get('shipper_destination_id')}:"
+        f"{params.get('receiver_destination_id')}:"
+        f"{params.get('weight')}:{params.get('item_value')}:{params.get('cod')}"
+    )
+    pin_points = json.dumps(
+        [params.get("origin_pin_point"), params.get("destination_pin_point")],
+        default=str,
+    )
+    digest = hashlib.md5(pin_points.encode()).hexdigest()
+    return f"rates:{route}:{digest}"
+
+
+class CoalescedFailure(Exception):
+    """Request lain (leader) gagal mengambil tarif untuk key yang sama."""
+
+
+def _lock_key(key):
+    return f"lock:{key}"
+
+
+def _error_key(key):
+    return f"error:{key}"
+
+
+def read_through(params, loader):
+    """
+    Ambil data tarif dari cache, atau panggil loader(params) lalu simpan.
+
+    Single-flight: kalau beberapa request (lintas worker/proses) minta key
+    yang sama dan cache masih kosong, hanya satu yang memegang lock Redis
+    dan memanggil RajaOngkir. Yang lain menunggu hasilnya muncul di key yang
+    sama. Kalau leader gagal, pesan errornya disimpan sebentar supaya
+    follower ikut gagal tanpa menembak RajaOngkir bersamaan.
+
+    Redis mati = fail-open, request langsung diteruskan ke RajaOngkir.
+    """
+    cache = get_cache()
+    key = build_key(params)
+
+    try:
+        data = cache.get(key)
+        if data is None:
+            is_leader = cache.add(
+                _lock_key(key), 1, timeout=settings.SHIPPING_RATE_LOCK_TIMEOUT
+            )
+    except Exception:
+        logger.warning("Shipping rate cache tidak tersedia, langsung ke RajaOngkir")
+        return loader(params)
+
+    if data is not None:
+        _record(cache, STATS_HIT)
+        return data
+
+    if not is_leader:
+        return _wait_for_leader(cache, key, params, loader)
+
+    try:
+        data = loader(params)
+    except Exception as e:
+        _safe(cache.set, _error_key(key), str(getattr(e, "detail", e)), 5)
+        _safe(cache.delete, _lock_key(key))
+        raise
+
+    _safe(cache.set, key, data, settings.SHIPPING_RATE_CACHE_TIMEOUT)
+    _safe(cache.delete, _lock_key(key))
+
+    _record(cache, STATS_MISS)
+    return data
+
+
+def _wait_for_leader(cache, key, params, loader):
+    deadline = time.monotonic() + settings.SHIPPING_RATE_LOCK_TIMEOUT
+
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+
+        try:
+            found = cache.get_many([key, _error_key(key), _lock_key(key)])
+        except Exception:
+            break
+
+        if key in found:
+            _record(cache, STATS_COALESCED)
+            return found[key]
+
+        if _error_key(key) in found:
+            raise CoalescedFailure(found[_error_key(key)])
+
+        if _lock_key(key) not in found:
+            # leader hilang tanpa hasil (mis. worker mati), ambil sendiri
+            break
+
+    logger.warning("Menunggu single-flight tarif terlalu lama, request langsung")
+    return loader(params)
+
+
+def _safe(method, *args):
+    try:
+        method(*args)
+    except Exception:
+        logger.warning("Gagal menulis ke shipping rate cache")
+
+
+def _record(cache, stats_key):
+    try:
+        cache.add(stats_key, 0, timeout=None)
+        cache.incr(stats_key)
+    except Exception:
+        pass
+
+
+def get_stats():
+    """
+    miss      : request yang benar-benar memanggil RajaOngkir
+    coalesced : request yang menumpang hasil request lain (single-flight)
+    coalescing_ratio = coalesced / (miss + coalesced), porsi panggilan
+    upstream yang dihemat saat cache masih kosong.
+    """
+    found = get_cache().get_many([STATS_HIT, STATS_MISS, STATS_COALESCED])
+    hit = found.get(STATS_HIT, 0)
+    miss = found.get(STATS_MISS, 0)
+    coalesced = found.get(STATS_COALESCED, 0)
+    total = hit + miss + coalesced
+    return {
+        "hit": hit,
+        "miss": miss,
+        "coalesced": coalesced,
+        "hit_ratio": round(hit / total, 4) if total else 0.0,
+        "coalescing_ratio": (
+            round(coalesced / (miss + coalesced), 4) if miss + coalesced else 0.0
+        ),
+    }
+
+
+def reset_stats():
+    get_cache().delete_many([STATS_HIT, STATS_MISS, STATS_COALESCED])
@@ -91,6 +91,15 @@ class RefundRequestCreateSerializer(serializers.ModelSerializer):
             "account_holder_name", "status", "requested_at",
         ]
         read_only_fields = ["id", "amount", "reason", "status", "requested_at"]
+        extra_kwargs = {
+            # order + shipping ikut di-join dan refund_active dari annotation,
+            # jadi validasi di bawah tidak query lagi per pengecekan
+            "order_item": {
+                "queryset": OrderItem.objects.select_related(
+                    "order__shipping"
+                ).with_refund_state()
+            },
+        }
 
     def validate_order_item(self, order_item):
         request = self.context["request"]
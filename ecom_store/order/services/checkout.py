@@ -4,10 +4,10 @@ from django.db import transaction
 from django.utils import timezone
 from order.models import CheckoutSession
 from order.utils import get_valid_carts
-from product.models import Product
 from rest_framework import serializers
 
 from .order import OrderService
+from .stock import InsufficientStock, StockLedger
 
 
 class CheckoutService:
@@ -39,24 +39,19 @@ class CheckoutService:
             return checkout
 
     def _validate_and_reserve_stock(self, carts):
-        product_ids = carts.values_list("product__id", flat=True)
-        products = (
-            Product.objects.select_for_update()
-            .filter(id__in=product_ids)
-            .order_by("id")
-        )
-
-        products_map = {product.id: product for product in products}
-
-        for cart in carts:
-            product = products_map[cart.product.id]
-            available_stock = product.stock - product.reserved_stock
-
-            if available_stock < cart.qty:
+        """
+        Reservasi stok semua cart dalam satu conditional UPDATE. Cek
+        available_stock (stock - reserved_stock) dilakukan database di
+        dalam UPDATE, jadi tidak perlu select_for_update() lebih dulu.
+        """
+        try:
+            StockLedger.from_items(carts).reserve()
+        except InsufficientStock as e:
+            if not e.products:
+                # produk di cart sudah dihapus di antara validasi cart dan UPDATE
                 raise serializers.ValidationError(
-                    {"detail": f"Stok {product.name} tidak cukup"}
+                    {"detail": "Stok tidak cukup / produk tidak tersedia"}
                 )
-
-            product.reserved_stock += cart.qty
-
-        Product.objects.bulk_update(products, ["reserved_stock"])
+            raise serializers.ValidationError(
+                {"detail": f"Stok {e.products[0].name} tidak cukup"}
+            )
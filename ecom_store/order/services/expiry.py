@@ -0,0 +1,144 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from order.models import CheckoutSession, Order, OrderItem, RefundRequest
+
+from .stock import InsufficientStock, StockLedger
+
+logger = logging.getLogger("order")
+logger_error = logging.getLogger("order_error")
+
+
+class ExpiredCheckoutSweeper:
+    """
+    Lepas reserved_stock order dari CheckoutSession yang sudah expired tapi
+    tidak pernah dibayar, lalu tandai order-nya failed.
+
+    Kandidat:
+        - session expired, order masih payment_status=pending dan belum
+          reduce_stock
+        - order belum punya OrderShipping (TransactionView tidak pernah
+          sukses, jadi tidak ada Snap transaction dan webhook expire
+          Midtrans tidak akan pernah datang), ATAU session sudah lewat
+          CHECKOUT_SNAP_EXPIRY_GRACE (Snap transaction pasti sudah mati
+          tapi webhook-nya tidak sampai)
+
+    Session diambil per batch lewat index expires_at dengan cursor
+    (expires_at, id). Per batch: lock order-nya, cek ulang status di bawah
+    lock (webhook bisa masuk bersamaan), release reservasi item yang belum
+    di-refund (COMPLETED) lewat satu StockLedger, lalu update payment_status
+    sekaligus.
+
+    Idempotent: order yang sudah failed tidak lagi jadi kandidat, jadi run
+    yang berulang atau tumpang tindih tidak me-release stok dua kali.
+    """
+
+    def __init__(self, batch_size=None, now=None):
+        self.batch_size = batch_size or settings.CHECKOUT_SWEEP_BATCH_SIZE
+        self.now = now or timezone.now()
+        self.stats = {"orders": 0, "units": 0, "skipped": 0}
+
+    def candidates(self):
+        snap_cutoff = self.now - settings.CHECKOUT_SNAP_EXPIRY_GRACE
+        return CheckoutSession.objects.filter(
+            expires_at__lt=self.now,
+            order__payment_status=Order.PaymentStatus.PENDING,
+            order__reduced_stock=False,
+        ).filter(Q(order__shipping__isnull=True) | Q(expires_at__lt=snap_cutoff))
+
+    def execute(self):
+        cursor = None
+        while True:
+            queryset = self.candidates().order_by("expires_at", "id")
+            if cursor is not None:
+                expires_at, session_id = cursor
+                queryset = queryset.filter(
+                    Q(expires_at__gt=expires_at)
+                    | Q(expires_at=expires_at, id__gt=session_id)
+                )
+
+            batch = list(
+                queryset.values_list("expires_at", "id", "order_id")[: self.batch_size]
+            )
+            if not batch:
+                break
+
+            self.sweep_batch([order_id for _, _, order_id in batch])
+
+            if len(batch) < self.batch_size:
+                break
+            cursor = batch[-1][:2]
+
+        logger.info(
+            f"Sweep checkout expired: {self.stats['orders']} order failed, "
+            f"{self.stats['units']} unit reserved_stock dilepas",
+            extra={"event_type": "checkout_sweep", **self.stats},
+        )
+        return self.stats
+
+    def sweep_batch(self, order_ids):
+        with transaction.atomic():
+            # skip_locked: order yang sedang diproses webhook dilewati, diambil run berikutnya
+            locked_ids = list(
+                Order.objects.select_for_update(skip_locked=True)
+                .filter(
+                    pk__in=order_ids,
+                    payment_status=Order.PaymentStatus.PENDING,
+                    reduced_stock=False,
+                )
+                .values_list("pk", flat=True)
+            )
+            self.stats["skipped"] += len(order_ids) - len(locked_ids)
+            if not locked_ids:
+                return
+
+            # item yang refund-nya sudah COMPLETED sudah dilepas reservasinya
+            # oleh RefundService.complete, sama seperti get_unrefunded_items()
+            items = list(
+                OrderItem.objects.filter(order_id__in=locked_ids)
+                .exclude(
+                    Exists(
+                        RefundRequest.objects.filter(
+                            order_item=OuterRef("pk"),
+                            status=RefundRequest.Status.COMPLETED,
+                        )
+                    )
+                )
+                .only("order_id", "product_id", "qty")
+            )
+
+            try:
+                StockLedger.from_items(items).release()
+                self.stats["units"] += sum(item.qty for item in items)
+            except InsufficientStock:
+                # reserved_stock sudah tidak sinkron untuk sebagian produk;
+                # ulangi per order supaya order lain di batch tetap dilepas
+                self.release_per_order(locked_ids, items)
+
+            Order.objects.filter(pk__in=locked_ids).update(
+                payment_status=Order.PaymentStatus.FAILED,
+                updated_at=timezone.now(),
+            )
+            self.stats["orders"] += len(locked_ids)
+
+    def release_per_order(self, order_ids, items):
+        for order_id in order_ids:
+            order_items = [item for item in items if item.order_id == order_id]
+            try:
+                StockLedger.from_items(order_items).release()
+            except InsufficientStock as e:
+                logger_error.error(
+                    "reserved_stock lebih kecil dari qty order expired - "
+                    "order tetap di-failed-kan, butuh review manual",
+                    extra={
+                        "event_type": "checkout_sweep",
+                        "order_pk": order_id,
+                        "product_ids": [product.id for product in e.products],
+                        "missing_product_ids": e.missing_ids,
+                    },
+                )
+                continue
+            self.stats["units"] += sum(item.qty for item in order_items)
@@ -0,0 +1,346 @@
+import logging
+import time
+import uuid
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from product.cache import invalidate_products
+from product.models import Product
+
+logger = logging.getLogger("order")
+logger_error = logging.getLogger("order_error")
+
+PREFIX = "flash_stock"
+ACTIVE_SET = f"{PREFIX}:products"
+# mutasi Redis yang transaksi DB-nya belum commit; member dihapus saat commit
+JOURNAL = f"{PREFIX}:journal"
+
+
+def product_key(pk):
+    return f"{PREFIX}:{pk}"
+
+
+# KEYS[1] = journal, KEYS[2..] = hash produk
+# ARGV[1] = cek available (1/0), ARGV[2] = token journal, ARGV[3] = score
+# journal, lalu per produk: pk, delta stock, delta reserved
+#
+# Semua produk dicek dulu, baru di-update -> all-or-nothing seperti
+# StockLedger. Produk yang hash-nya tidak ada (bukan flash sale) dilewati.
+APPLY = """
+local check = ARGV[1] == "1"
+local present, short, entry = {}, {}, {}
+for i = 2, #KEYS do
+    local values = redis.call("HMGET", KEYS[i], "stock", "reserved")
+    if values[1] then
+        local j = 4 + (i - 2) * 3
+        local stock = tonumber(values[1]) + tonumber(ARGV[j + 1])
+        local reserved = tonumber(values[2]) + tonumber(ARGV[j + 2])
+        if stock < 0 or reserved < 0 or (check and stock < reserved) then
+            table.insert(short, ARGV[j])
+        end
+        table.insert(present, i)
+    end
+end
+if #short > 0 then
+    return {0, short}
+end
+local handled = {}
+for _, i in ipairs(present) do
+    local j = 4 + (i - 2) * 3
+    redis.call("HINCRBY", KEYS[i], "stock", ARGV[j + 1])
+    redis.call("HINCRBY", KEYS[i], "reserved", ARGV[j + 2])
+    redis.call("HINCRBY", KEYS[i], "d_stock", ARGV[j + 1])
+    redis.call("HINCRBY", KEYS[i], "d_reserved", ARGV[j + 2])
+    table.insert(handled, ARGV[j])
+    table.insert(entry, ARGV[j] .. ":" .. ARGV[j + 1] .. ":" .. ARGV[j + 2])
+end
+local member = ""
+if #handled > 0 then
+    member = ARGV[2] .. "|" .. table.concat(entry, ";")
+    redis.call("ZADD", KEYS[1], ARGV[3], member)
+end
+return {1, handled, member}
+"""
+
+# KEYS[1] = journal, ARGV[1] = member, ARGV[2] = prefix key produk.
+# ZREM sebagai klaim: entry yang sama tidak pernah di-revert dua kali.
+REVERT = """
+if redis.call("ZREM", KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+local entry = string.match(ARGV[1], "|(.*)$")
+for pk, ds, dr in string.gmatch(entry, "(%d+):(-?%d+):(-?%d+)") do
+    local key = ARGV[2] .. ":" .. pk
+    if redis.call("EXISTS", key) == 1 then
+        redis.call("HINCRBY", key, "stock", -tonumber(ds))
+        redis.call("HINCRBY", key, "reserved", -tonumber(dr))
+        redis.call("HINCRBY", key, "d_stock", -tonumber(ds))
+        redis.call("HINCRBY", key, "d_reserved", -tonumber(dr))
+    end
+end
+return 1
+"""
+
+# Ambil delta yang belum di-flush lalu nol-kan (ARGV[1] == "1": hapus hash).
+DRAIN = """
+local result = {}
+for i = 1, #KEYS do
+    local values = redis.call("HMGET", KEYS[i], "d_stock", "d_reserved")
+    if values[1] then
+        table.insert(result, {i, tonumber(values[1]), tonumber(values[2])})
+        if ARGV[1] == "1" then
+            redis.call("DEL", KEYS[i])
+        else
+            redis.call("HSET", KEYS[i], "d_stock", 0, "d_reserved", 0)
+        end
+    end
+end
+return result
+"""
+
+LOAD = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return 0
+end
+redis.call("HSET", KEYS[1], "stock", ARGV[1], "reserved", ARGV[2], "d_stock", 0, "d_reserved", 0)
+redis.call("SADD", KEYS[2], ARGV[3])
+return 1
+"""
+
+
+class FlashStockShortage(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = product_ids
+        super().__init__(f"Stok flash sale tidak cukup: {product_ids}")
+
+
+class FlashStock:
+    """
+    Counter stock/reserved_stock produk flash sale di Redis.
+
+    Selama produk aktif di mode flash sale, hash `flash_stock:<pk>` adalah
+    sumber kebenaran: reserve/commit/release/restore dari StockLedger jalan
+    sebagai satu Lua script atomic (cek lalu update semua produk order),
+    tanpa row lock MySQL. Tiap mutasi juga menambah delta d_stock/d_reserved
+    yang di-flush ke MySQL oleh reconcile() (write-behind).
+
+    Mutasi Redis tidak ikut rollback transaksi DB, jadi tiap mutasi dicatat
+    di journal dan dihapus lewat on_commit. Entry yang tidak pernah
+    di-commit (transaksi rollback / proses mati) di-revert oleh reconcile()
+    setelah FLASH_SALE_JOURNAL_TIMEOUT.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._apply = client.register_script(APPLY)
+        self._revert = client.register_script(REVERT)
+        self._drain = client.register_script(DRAIN)
+        self._load = client.register_script(LOAD)
+
+    # ------------------------------------------------------------------ #
+    #  Mutasi dari StockLedger                                             #
+    # ------------------------------------------------------------------ #
+
+    def apply(self, quantities, signs, check_available=False):
+        """
+        quantities: {product_id: qty}; signs: {"stock": +1/-1, "reserved_stock": +1/-1}.
+
+        Produk yang punya hash di Redis dimutasi di sini, return
+        (set product id yang di-handle, member journal). Sisanya tetap
+        urusan SQL. Raise FlashStockShortage kalau ada yang kurang (tidak
+        ada yang ter-update).
+        """
+        keys = [JOURNAL]
+        args = ["1" if check_available else "0", uuid.uuid4().hex, time.time()]
+        for pk, qty in quantities.items():
+            keys.append(product_key(pk))
+            args += [
+                pk,
+                signs.get("stock", 0) * qty,
+                signs.get("reserved_stock", 0) * qty,
+            ]
+
+        result = self._apply(keys=keys, args=args)
+        product_ids = {int(pk) for pk in result[1]}
+        if not result[0]:
+            raise FlashStockShortage(sorted(product_ids))
+
+        member = result[2]
+        if member:
+            transaction.on_commit(lambda: self._confirm(member))
+        return product_ids, member
+
+    def revert(self, member):
+        """Batalkan mutasi apply() kalau bagian SQL dari operasi yang sama gagal."""
+        return self._revert(keys=[JOURNAL], args=[member, PREFIX])
+
+    def _confirm(self, member):
+        try:
+            self.client.zrem(JOURNAL, member)
+        except redis.RedisError:
+            # entry tertinggal akan di-revert reconcile() -> perlu dicek manual
+            logger_error.critical(
+                "Gagal konfirmasi journal flash stock setelah commit",
+                extra={"event_type": "flash_stock", "member": member},
+            )
+
+    # ------------------------------------------------------------------ #
+    #  Aktivasi                                                            #
+    # ------------------------------------------------------------------ #
+
+    def enable(self, product_ids):
+        """Salin stok dari MySQL ke Redis. Jalankan sebelum flash sale dimulai."""
+        enabled = []
+        with transaction.atomic():
+            products = Product.objects.select_for_update().filter(pk__in=product_ids)
+            for product in products:
+                loaded = self._load(
+                    keys=[product_key(product.pk), ACTIVE_SET],
+                    args=[product.stock, product.reserved_stock, product.pk],
+                )
+                if loaded:
+                    enabled.append(product.pk)
+        return enabled
+
+    def disable(self, product_ids):
+        """
+        Hapus counter Redis (operasi berikutnya langsung ke MySQL) lalu
+        flush delta terakhir. Jalankan setelah flash sale selesai.
+        """
+        product_ids = list(product_ids)
+        deltas = self._flush(product_ids, delete=True)
+        self.client.srem(ACTIVE_SET, *product_ids)
+        return deltas
+
+    # ------------------------------------------------------------------ #
+    #  Reconciler                                                          #
+    # ------------------------------------------------------------------ #
+
+    def reconcile(self):
+        reverted = self.revert_stale()
+        product_ids = [int(pk) for pk in self.client.smembers(ACTIVE_SET)]
+        flushed = self._flush(product_ids)
+        drift = self.check_drift(product_ids)
+
+        stats = {"reverted": reverted, "flushed": flushed, "drift": drift}
+        if reverted or flushed:
+            logger.info(
+                f"Reconcile flash stock: {len(flushed)} produk di-flush, "
+                f"{reverted} mutasi tanpa commit di-revert",
+                extra={"event_type": "flash_stock"},
+            )
+        if drift:
+            logger_error.warning(
+                "Drift stok flash sale Redis vs MySQL",
+                extra={"event_type": "flash_stock", "drift": drift},
+            )
+        return stats
+
+    def revert_stale(self):
+        cutoff = time.time() - settings.FLASH_SALE_JOURNAL_TIMEOUT
+        reverted = 0
+        for member in self.client.zrangebyscore(JOURNAL, "-inf", cutoff):
+            reverted += self.revert(member)
+        return reverted
+
+    def _flush(self, product_ids, delete=False):
+        if not product_ids:
+            return {}
+
+        rows = self._drain(
+            keys=[product_key(pk) for pk in product_ids], args=["1" if delete else "0"]
+        )
+        deltas = {
+            product_ids[index - 1]: (d_stock, d_reserved)
+            for index, d_stock, d_reserved in rows
+            if d_stock or d_reserved
+        }
+        if not deltas:
+            return {}
+
+        try:
+            with transaction.atomic():
+                for pk, (d_stock, d_reserved) in deltas.items():
+                    Product.objects.filter(pk=pk).update(
+                        stock=F("stock") + d_stock,
+                        reserved_stock=F("reserved_stock") + d_reserved,
+                    )
+        except Exception:
+            if delete:
+                # hash sudah terhapus, delta hanya tersisa di log ini
+                logger_error.critical(
+                    "Gagal flush delta flash stock saat disable, butuh review manual",
+                    extra={"event_type": "flash_stock", "deltas": deltas},
+                )
+            else:
+                # dikembalikan supaya di-flush ulang run berikutnya
+                pipe = self.client.pipeline()
+                for pk, (d_stock, d_reserved) in deltas.items():
+                    pipe.hincrby(product_key(pk), "d_stock", d_stock)
+                    pipe.hincrby(product_key(pk), "d_reserved", d_reserved)
+                pipe.execute()
+            raise
+
+        invalidate_products(deltas)
+        return deltas
+
+    def check_drift(self, product_ids):
+        """
+        Nilai Redis dikurangi delta yang belum di-flush harus sama dengan
+        MySQL. Beda berarti ada write ke Product di luar StockLedger (mis.
+        edit stok lewat admin) selama flash sale.
+        """
+        if not product_ids:
+            return {}
+
+        pipe = self.client.pipeline()
+        for pk in product_ids:
+            pipe.hgetall(product_key(pk))
+        states = dict(zip(product_ids, pipe.execute()))
+
+        drift = {}
+        rows = Product.objects.filter(pk__in=product_ids).values_list(
+            "pk", "stock", "reserved_stock"
+        )
+        for pk, stock, reserved_stock in rows:
+            state = states.get(pk)
+            if not state:
+                continue
+            base_stock = int(state["stock"]) - int(state["d_stock"])
+            base_reserved = int(state["reserved"]) - int(state["d_reserved"])
+            if (base_stock, base_reserved) != (stock, reserved_stock):
+                drift[pk] = {
+                    "redis": [base_stock, base_reserved],
+                    "mysql": [stock, reserved_stock],
+                }
+        return drift
+
+    def status(self, product_ids=None):
+        if product_ids is None:
+            product_ids = sorted(int(pk) for pk in self.client.smembers(ACTIVE_SET))
+        pipe = self.client.pipeline()
+        for pk in product_ids:
+            pipe.hgetall(product_key(pk))
+        return {
+            pk: {field: int(value) for field, value in state.items()}
+            for pk, state in zip(product_ids, pipe.execute())
+            if state
+        }
+
+
+@lru_cache(maxsize=None)
+def _for_url(url):
+    client = redis.Redis.from_url(
+        url,
+        decode_responses=True,
+        socket_connect_timeout=0.5,
+        socket_timeout=0.5,
+    )
+    return FlashStock(client)
+
+
+def get_flash_stock():
+    return _for_url(settings.FLASH_SALE_REDIS_URL)
@@ -5,13 +5,13 @@ import logging
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from order.models import Order, RefundRequest
-from product.models import Product
 from order.utils import (
     fetch_order_rajaongkir,
     reduce_product_stock,
     restore_product_stock,
     get_unrefunded_items
 )
+from order.services.stock import StockLedger
 
 logger = logging.getLogger("order")
 logger_error = logging.getLogger("order_error")
@@ -202,24 +202,12 @@ class WebhookMidtrans:
         """
         if self.order.reduced_stock:
             return
-        
+
         order_items = get_unrefunded_items(self.order)
         if not order_items:
             return
-        
-        product_ids = order_items.values_list("product_id", flat=True)
-        
-        products = (
-            Product.objects.select_for_update().filter(id__in=product_ids).order_by("id")
-        )
-        
-        product_map = {p.id: p for p in products}
-
-        for item in order_items:
-            product = product_map[item.product_id]
-            product.reserved_stock -= item.qty
-            product.save(update_fields=["reserved_stock"])
-            
+
+        StockLedger.from_items(order_items).release()
 
     # def create_order_ro(self):
     #     try:
@@ -0,0 +1,21 @@
+from functools import lru_cache
+
+from django.template.loader import get_template
+
+EMAIL_TEMPLATE_DIR = "order/email"
+
+
+@lru_cache(maxsize=None)
+def _template(name):
+    # di-compile sekali per proses worker; cached loader Django sendiri
+    # hanya aktif saat DEBUG=False
+    return get_template(f"{EMAIL_TEMPLATE_DIR}/{name}.txt")
+
+
+def render_email(name, **context):
+    """
+    Render order/templates/order/email/<name>.txt, return (subject, body).
+    Baris pertama template adalah subject, sisanya body.
+    """
+    subject, _, body = _template(name).render(context).strip().partition("\n")
+    return subject.strip(), body.strip()
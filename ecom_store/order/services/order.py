@@ -5,8 +5,27 @@ from django.db import transaction
 from order.models import Order, OrderItem, OrderShipping, ShippingInsurance
 
 
+def calculate_order_totals(order_items):
+    """
+    Snapshot total order dari OrderItem (boleh yang belum disimpan):
+    subtotal item dan berat (gram). Dihitung sekali saat checkout, dipakai
+    ulang oleh ShippingRates, calculate_insurance dan calculate_grand_total
+    tanpa iterasi item lagi.
+    """
+    items_subtotal = total_weight = 0
+    for item in order_items:
+        product = item.product
+        items_subtotal += item.subtotal
+        total_weight += product.weight * item.qty
+
+    return {
+        "items_subtotal": int(items_subtotal),
+        "total_weight": total_weight,
+    }
+
+
 def calculate_insurance(order, shipping_name):
-    total_item_value = int(sum(item.subtotal for item in order.items.all()))
+    total_item_value = order.items_subtotal
 
     use_insurance = (
         order.store.enable_insurance
@@ -30,7 +49,7 @@ def calculate_insurance(order, shipping_name):
 
 
 def calculate_grand_total(order, order_shipping):
-    subtotal = int(sum(item.subtotal for item in order.items.all()))
+    subtotal = order.items_subtotal
 
     insurance_cost = 0
 
@@ -51,24 +70,44 @@ class OrderService:
         self.checkout = checkout
         self.carts = carts
         self.order = None
+        self.order_items = []
+
+    def build_order_items(self):
+        """
+        Semua OrderItem dibangun di memory dulu supaya snapshot total order
+        bisa ikut disimpan di INSERT order, tanpa UPDATE susulan. Harga
+        diambil dari cart.product yang sudah di-select_related oleh
+        get_valid_carts(), tanpa query tambahan.
+        """
+        self.order_items = [
+            OrderItem(
+                user=self.checkout.user,
+                product=cart.product,
+                product_price=cart.product.price,
+                qty=cart.qty,
+            )
+            for cart in self.carts
+        ]
 
     def create_order(self):
         self.order = Order.objects.create(
             user=self.checkout.user,
             store=self.checkout.store,
+            **calculate_order_totals(self.order_items),
         )
 
     def create_order_item(self):
-        for cart in self.carts:
-            order_item = OrderItem.objects.create(
-                order=self.order,
-                product=cart.product,
-                product_price=cart.product.price,
-                qty=cart.qty,
-            )
+        """
+        Disimpan dengan satu bulk_create, jadi jumlah query checkout tidak
+        bertambah per baris cart.
+        """
+        for item in self.order_items:
+            item.order = self.order
+        OrderItem.objects.bulk_create(self.order_items)
 
     def execute(self):
         # with transaction.atomic():
+        self.build_order_items()
         self.create_order()
         self.create_order_item()
         return self.order
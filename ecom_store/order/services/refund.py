@@ -1,101 +1,298 @@
+from collections import defaultdict
+
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 import logging
 
-from order.models import Order, OrderItem, RefundRequest
-from product.models import Product
-from order.tasks import send_refund_status_email, send_refund_anomaly_email
+from order.models import Order, RefundRequest
+from order.services.stock import InsufficientStock, StockLedger
+from order.tasks import (
+    send_refund_anomaly_email,
+    send_refund_status_email,
+    send_refund_status_emails,
+)
 
 logger_error = logging.getLogger("order_error")
 
+REFUNDABLE_ORDER_STATUSES = [
+    Order.Status.PENDING,
+    Order.Status.PROCESSING,
+    Order.Status.SHIPPED,
+    Order.Status.DELIVERED,
+]
+STOCK_ANOMALY_MESSAGE = (
+    "Order dalam status anomali (dibayar tapi stock belum diproses) -- "
+    "butuh review admin sebelum refund bisa diproses."
+)
+
+
+def refund_block_reason(order):
+    """Alasan item order ini tidak bisa di-complete refund-nya, None kalau boleh."""
+    if order.status not in REFUNDABLE_ORDER_STATUSES:
+        return f"Order status {order.status}, refund dibatalkan."
+
+    if order.payment_status == Order.PaymentStatus.FAILED:
+        return (
+            "Pembayaran gagal, barang tidak jadi dikirim -- "
+            "tidak ada yang perlu direfund."
+        )
+    return None
+
+
+def has_stock_anomaly(order):
+    return order.payment_status == Order.PaymentStatus.PAID and not order.reduced_stock
+
+
+def report_stock_anomaly(order, refund_request_id):
+    logger_error.critical(
+        "Refund diblokir - order PAID tapi reduced_stock False, butuh review manual",
+        extra={
+            "event_type": "refund",
+            "order_id": order.order_id,
+            "refund_request_id": refund_request_id,
+            "payment_status": order.payment_status,
+            "reduced_stock": order.reduced_stock,
+        },
+    )
+    send_refund_anomaly_email.delay(order.id, refund_request_id)
+
+
 class RefundService:
     def __init__(self, refund_request: RefundRequest):
         self.refund_request = refund_request
 
     def approve(self):
         refund_request = self.refund_request
-    
+
         if refund_request.status != RefundRequest.Status.REQUESTED:
             raise ValidationError(
                 "Hanya request berstatus REQUESTED yang bisa di-approve."
             )
-    
+
         refund_request.status = RefundRequest.Status.APPROVED
         refund_request.approved_at = timezone.now()
         refund_request.save(update_fields=["status", "approved_at"])
-        
+
         send_refund_status_email.delay(refund_request.id)
-    
+
     def reject(self):
         refund_request = self.refund_request
-    
+
         if refund_request.status != RefundRequest.Status.REQUESTED:
             raise ValidationError(
                 "Hanya request berstatus REQUESTED yang bisa di-reject."
             )
-    
+
         refund_request.status = RefundRequest.Status.REJECTED
         refund_request.approved_at = timezone.now()
         refund_request.save(update_fields=["status", "approved_at"])
-        
+
         send_refund_status_email.delay(refund_request.id)
 
     def complete(self):
+        """
+        Complete satu refund lewat jalur yang sama dengan bulk action admin
+        (BulkRefundService), jadi urutan lock, aturan validasi, dan email
+        (dikirim setelah commit) tidak punya dua implementasi.
+        """
         refund_request = self.refund_request
 
+        results = BulkRefundService([refund_request.pk]).complete()
+        reason = results[refund_request.pk]
+        if reason != BulkRefundService.OK:
+            raise ValidationError(reason)
+
+        refund_request.refresh_from_db(fields=["status", "completed_at", "updated_at"])
+
+
+class BulkRefundService:
+    """
+    Approve/reject/complete banyak RefundRequest sekaligus untuk bulk action
+    admin, dengan aturan yang sama seperti RefundService. RefundService.complete
+    juga lewat sini dengan satu id.
+
+    complete() memproses refund per batch order, satu transaksi per batch:
+    semua order di-lock sekali (urut pk), baru refund request + order item
+    di-lock sekali -- urutan Order -> RefundRequest/OrderItem, jadi dua run
+    yang menyentuh order yang sama tidak saling deadlock. Lalu stok semua
+    item yang lolos validasi di-release/restore lewat satu StockLedger per
+    arah dan statusnya di-update dengan satu UPDATE.
+
+    Email: satu task send_refund_status_emails per customer setelah commit.
+    Hasil per item ada di self.results: {refund_request_id: OK / alasan gagal}.
+    """
+
+    OK = "OK"
+
+    def __init__(self, refund_request_ids, batch_size=100):
+        self.refund_request_ids = sorted(set(refund_request_ids))
+        self.batch_size = batch_size
+        self.results = {}
+        self.recipients = defaultdict(list)
+
+    def approve(self):
+        return self._transition(RefundRequest.Status.APPROVED, "approve")
+
+    def reject(self):
+        return self._transition(RefundRequest.Status.REJECTED, "reject")
+
+    def _transition(self, status, action):
+        now = timezone.now()
         with transaction.atomic():
-            order_item = OrderItem.objects.select_for_update().get(
-                pk=refund_request.order_item_id
+            current = dict(
+                RefundRequest.objects.select_for_update()
+                .filter(pk__in=self.refund_request_ids)
+                .values_list("pk", "status")
             )
-            order = Order.objects.select_for_update().get(pk=order_item.order_id)
+            self._report_missing(current)
+            eligible = []
+            for pk, current_status in current.items():
+                if current_status == RefundRequest.Status.REQUESTED:
+                    eligible.append(pk)
+                else:
+                    self.results[pk] = (
+                        f"Hanya request berstatus REQUESTED yang bisa di-{action}."
+                    )
 
-            if refund_request.status != RefundRequest.Status.APPROVED:
-                raise ValidationError(
-                    "Hanya request berstatus APPROVED yang bisa di-complete."
-                )
+            RefundRequest.objects.filter(pk__in=eligible).update(
+                status=status, approved_at=now, updated_at=now
+            )
+            rows = RefundRequest.objects.filter(pk__in=eligible).values_list(
+                "pk", "order_item__order__user_id"
+            )
+            for pk, user_id in rows:
+                self.results[pk] = self.OK
+                self.recipients[user_id].append(pk)
+
+        self._notify()
+        return self.results
+
+    def complete(self):
+        rows = RefundRequest.objects.filter(pk__in=self.refund_request_ids).values_list(
+            "pk", "order_item__order_id"
+        )
+        by_order = defaultdict(list)
+        for pk, order_id in rows:
+            by_order[order_id].append(pk)
+        self._report_missing({pk for pks in by_order.values() for pk in pks})
+
+        order_ids = sorted(by_order)
+        for start in range(0, len(order_ids), self.batch_size):
+            batch = order_ids[start : start + self.batch_size]
+            self._complete_batch(
+                batch, [pk for order_id in batch for pk in by_order[order_id]]
+            )
+
+        self._notify()
+        return self.results
+
+    def _complete_batch(self, order_ids, refund_request_ids):
+        now = timezone.now()
+        with transaction.atomic():
+            orders = {
+                order.pk: order
+                for order in Order.objects.select_for_update()
+                .filter(pk__in=order_ids)
+                .order_by("pk")
+            }
+            locked = (
+                RefundRequest.objects.select_for_update()
+                .select_related("order_item")
+                .filter(pk__in=refund_request_ids)
+                .order_by("pk")
+            )
 
-            valid_statuses = [
-                Order.Status.PENDING, Order.Status.PROCESSING,
-                Order.Status.SHIPPED, Order.Status.DELIVERED,
+            accepted = defaultdict(list)
+            anomaly_reported = set()
+            for refund_request in locked:
+                order = orders[refund_request.order_item.order_id]
+                if refund_request.status != RefundRequest.Status.APPROVED:
+                    self.results[refund_request.pk] = (
+                        "Hanya request berstatus APPROVED yang bisa di-complete."
+                    )
+                    continue
+
+                reason = refund_block_reason(order)
+                if reason:
+                    self.results[refund_request.pk] = reason
+                    continue
+
+                if has_stock_anomaly(order):
+                    # cukup satu log + email anomali per order
+                    if order.pk not in anomaly_reported:
+                        report_stock_anomaly(order, refund_request.pk)
+                        anomaly_reported.add(order.pk)
+                    self.results[refund_request.pk] = STOCK_ANOMALY_MESSAGE
+                    continue
+
+                accepted[order.pk].append(refund_request)
+
+            # reduced_stock: stok sudah dipotong -> restore; belum -> lepas reservasi
+            to_release = {
+                order_id: refund_requests
+                for order_id, refund_requests in accepted.items()
+                if not orders[order_id].reduced_stock
+            }
+            failed = self._release(to_release)
+            StockLedger.from_items(
+                refund_request.order_item
+                for order_id, refund_requests in accepted.items()
+                if orders[order_id].reduced_stock
+                for refund_request in refund_requests
+            ).restore()
+
+            completed = [
+                refund_request
+                for order_id, refund_requests in accepted.items()
+                if order_id not in failed
+                for refund_request in refund_requests
             ]
-            if order.status not in valid_statuses:
-                raise ValidationError(
-                    f"Order status {order.status}, refund dibatalkan."
-                )
+            RefundRequest.objects.filter(
+                pk__in=[refund_request.pk for refund_request in completed]
+            ).update(
+                status=RefundRequest.Status.COMPLETED, completed_at=now, updated_at=now
+            )
+            for refund_request in completed:
+                self.results[refund_request.pk] = self.OK
+                user_id = orders[refund_request.order_item.order_id].user_id
+                self.recipients[user_id].append(refund_request.pk)
 
-            if order.payment_status == Order.PaymentStatus.FAILED:
-                raise ValidationError(
-                    "Pembayaran gagal, barang tidak jadi dikirim -- "
-                    "tidak ada yang perlu direfund."
-                )
+    def _release(self, to_release):
+        """Return order id yang reservasinya gagal dilepas (reserved_stock drift)."""
+        try:
+            StockLedger.from_items(
+                refund_request.order_item
+                for refund_requests in to_release.values()
+                for refund_request in refund_requests
+            ).release()
+            return set()
+        except InsufficientStock:
+            pass
 
-            if order.payment_status == Order.PaymentStatus.PAID and not order.reduced_stock:
-                logger_error.critical(
-                    "Refund diblokir - order PAID tapi reduced_stock False, butuh review manual",
-                    extra={
-                        "event_type": "refund",
-                        "order_id": order.order_id,
-                        "refund_request_id": refund_request.id,
-                        "payment_status": order.payment_status,
-                        "reduced_stock": order.reduced_stock,
-                    },
-                )
-                send_refund_anomaly_email.delay(order.id, refund_request.id)
-                raise ValidationError(
-                    "Order dalam status anomali (dibayar tapi stock belum diproses) -- "
-                    "butuh review admin sebelum refund bisa diproses."
-                )
+        # ulangi per order supaya order lain di batch tetap diproses
+        failed = set()
+        for order_id, refund_requests in to_release.items():
+            try:
+                StockLedger.from_items(
+                    refund_request.order_item for refund_request in refund_requests
+                ).release()
+            except InsufficientStock as e:
+                failed.add(order_id)
+                for refund_request in refund_requests:
+                    self.results[refund_request.pk] = str(e)
+        return failed
 
-            refund_request.status = RefundRequest.Status.COMPLETED
-            refund_request.completed_at = timezone.now()
-            refund_request.save(update_fields=["status", "completed_at"])
-
-            product = Product.objects.select_for_update().get(pk=order_item.product_id)
-            if order.reduced_stock:
-                product.stock += order_item.qty
-            else:
-                product.reserved_stock -= order_item.qty
-            product.save()
-            
-        send_refund_status_email.delay(refund_request.id)
\ No newline at end of file
+    def _report_missing(self, found_ids):
+        for pk in self.refund_request_ids:
+            if pk not in found_ids:
+                self.results[pk] = "Refund request tidak ditemukan."
+
+    def _notify(self):
+        for refund_request_ids in self.recipients.values():
+            transaction.on_commit(
+                lambda ids=sorted(refund_request_ids): send_refund_status_emails.delay(
+                    ids
+                )
+            )
+        self.recipients.clear()
@@ -0,0 +1,180 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from product.cache import invalidate_products
+from product.models import Product
+
+from .flash_stock import FlashStockShortage, get_flash_stock
+
+
+class InsufficientStock(ValueError):
+    """
+    products    : produk yang stoknya kurang
+    missing_ids : product id yang tidak ada lagi di database (mis. dihapus
+                  bersamaan), jadi tidak bisa di-update sama sekali
+    """
+
+    def __init__(self, products, missing_ids=()):
+        self.products = products
+        self.missing_ids = list(missing_ids)
+        names = ", ".join(product.name for product in products)
+        message = f"Stok tidak mencukupi: {names}"
+        if self.missing_ids:
+            message += f" (produk tidak ditemukan: {self.missing_ids})"
+        super().__init__(message)
+
+
+class StockLedger:
+    """
+    Mutasi stock/reserved_stock satu order lewat SATU conditional UPDATE,
+    tanpa SELECT ... FOR UPDATE lalu save() per item di Python.
+
+        reserve : reserved_stock += qty  WHERE stock >= reserved_stock + qty
+        commit  : stock -= qty, reserved_stock -= qty
+                  WHERE stock >= qty AND reserved_stock >= qty
+        release : reserved_stock -= qty  WHERE reserved_stock >= qty
+        restore : stock += qty
+
+    Semua produk dalam order di-update dalam satu statement dengan CASE per
+    product id. Kondisi stok dicek oleh database di dalam UPDATE itu sendiri,
+    jadi tidak ada jeda antara "baca stok" dan "tulis stok" yang bisa
+    diselip transaksi lain, dan row lock hanya dipegang oleh UPDATE tersebut
+    (bukan dari SELECT sebelumnya).
+
+    Gagal atau tidaknya dilihat dari jumlah row yang ter-update: kalau kurang
+    dari jumlah produk, statement di-rollback (savepoint) supaya tidak ada
+    update parsial, lalu produk yang stoknya kurang dicari untuk pesan error.
+
+    Kondisi dibuat dalam bentuk `stock >= reserved_stock + qty` (bukan
+    `stock - reserved_stock >= qty`) karena kolomnya unsigned di MySQL --
+    pengurangan yang hasilnya negatif akan error, bukan bernilai false.
+
+    Kalau FLASH_SALE_ENABLED, produk yang sedang flash sale dimutasi di
+    counter Redis (lihat flash_stock.py) dengan syarat yang sama, sisanya
+    tetap lewat UPDATE di atas.
+    """
+
+    def __init__(self, quantities):
+        self.quantities = {
+            product_id: qty for product_id, qty in quantities.items() if qty
+        }
+
+    @classmethod
+    def from_items(cls, items):
+        """
+        items: iterable apa saja yang punya product_id dan qty (Cart, OrderItem).
+        Produk yang muncul lebih dari sekali dijumlahkan qty-nya.
+        """
+        quantities = defaultdict(int)
+        for item in items:
+            quantities[item.product_id] += item.qty
+        return cls(quantities)
+
+    @staticmethod
+    def _case(quantities, column, sign):
+        if len(quantities) == 1:
+            # satu produk (mis. refund satu item): cukup F() tanpa CASE
+            (qty,) = quantities.values()
+            return F(column) + qty if sign > 0 else F(column) - qty
+
+        whens = [
+            When(
+                pk=product_id,
+                then=F(column) + qty if sign > 0 else F(column) - qty,
+            )
+            for product_id, qty in quantities.items()
+        ]
+        return Case(*whens, default=F(column), output_field=PositiveIntegerField())
+
+    @staticmethod
+    def _condition(quantities, build):
+        condition = Q()
+        for product_id, qty in quantities.items():
+            condition |= Q(pk=product_id) & build(qty)
+        return condition
+
+    def _apply(self, build, check_available=False, **signs):
+        """
+        build(qty) -> Q syarat per produk (None = tanpa syarat),
+        signs -> arah mutasi per kolom, mis. reserved_stock=+1.
+        """
+        if not self.quantities:
+            return
+
+        flash, member, flash_ids = None, None, set()
+        if settings.FLASH_SALE_ENABLED:
+            flash = get_flash_stock()
+            try:
+                flash_ids, member = flash.apply(self.quantities, signs, check_available)
+            except FlashStockShortage as e:
+                raise InsufficientStock(
+                    list(Product.objects.filter(pk__in=e.product_ids).order_by("id"))
+                )
+
+        quantities = {
+            product_id: qty
+            for product_id, qty in self.quantities.items()
+            if product_id not in flash_ids
+        }
+        try:
+            self._apply_sql(quantities, build, signs)
+        except Exception:
+            # bagian Redis dari operasi yang sama dibatalkan, all-or-nothing
+            if member:
+                flash.revert(member)
+            raise
+
+    def _apply_sql(self, quantities, build, signs):
+        if not quantities:
+            return
+
+        product_ids = list(quantities)
+        condition = self._condition(quantities, build) if build else Q()
+        assignments = {
+            column: self._case(quantities, column, sign)
+            for column, sign in signs.items()
+        }
+        try:
+            with transaction.atomic():
+                updated = (
+                    Product.objects.filter(pk__in=product_ids)
+                    .filter(condition)
+                    .update(**assignments)
+                )
+                if updated != len(product_ids):
+                    raise InsufficientStock([])
+        except InsufficientStock:
+            # savepoint sudah di-rollback, nilai yang dibaca di sini bersih
+            short = Product.objects.filter(pk__in=product_ids).exclude(condition)
+            existing = Product.objects.filter(pk__in=product_ids).values_list(
+                "pk", flat=True
+            )
+            raise InsufficientStock(
+                list(short.order_by("id")),
+                missing_ids=sorted(set(product_ids) - set(existing)),
+            )
+
+        # update() tidak memicu post_save
+        invalidate_products(product_ids)
+
+    def reserve(self):
+        self._apply(
+            lambda qty: Q(stock__gte=F("reserved_stock") + qty),
+            check_available=True,
+            reserved_stock=+1,
+        )
+
+    def commit(self):
+        self._apply(
+            lambda qty: Q(stock__gte=qty, reserved_stock__gte=qty),
+            stock=-1,
+            reserved_stock=-1,
+        )
+
+    def release(self):
+        self._apply(lambda qty: Q(reserved_stock__gte=qty), reserved_stock=-1)
+
+    def restore(self):
+        self._apply(None, stock=+1)
@@ -0,0 +1,151 @@
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from order.models import MidtransWebhookEvent, Order
+
+from .midtrans import WebhookMidtrans
+
+logger = logging.getLogger("order")
+logger_error = logging.getLogger("order_error")
+
+
+def event_key(payload):
+    return {
+        "order_id": str(payload.get("order_id") or ""),
+        "transaction_id": str(payload.get("transaction_id") or ""),
+        "transaction_status": str(payload.get("transaction_status") or ""),
+    }
+
+
+def record_midtrans_event(payload):
+    """
+    Simpan notifikasi Midtrans (setelah signature valid), return
+    (event, is_duplicate). Duplikat = event yang sama sudah PROCESSED;
+    cukup satu SELECT, Order tidak disentuh sama sekali.
+
+    Event yang pernah gagal (view balas 500, Midtrans retry) TIDAK
+    dianggap duplikat -- status kembali RECEIVED dan diproses ulang.
+    """
+    event, created = MidtransWebhookEvent.objects.get_or_create(
+        **event_key(payload), defaults={"payload": payload, "attempts": 1}
+    )
+    if created:
+        return event, False
+
+    if event.status == MidtransWebhookEvent.Status.PROCESSED:
+        return event, True
+
+    MidtransWebhookEvent.objects.filter(pk=event.pk).update(
+        status=MidtransWebhookEvent.Status.RECEIVED,
+        attempts=F("attempts") + 1,
+        payload=payload,
+        updated_at=timezone.now(),
+    )
+    return event, False
+
+
+def mark_event(event, status):
+    fields = {"status": status, "updated_at": timezone.now()}
+    if status == MidtransWebhookEvent.Status.PROCESSED:
+        fields["processed_at"] = fields["updated_at"]
+    MidtransWebhookEvent.objects.filter(pk=event.pk).update(**fields)
+
+
+def apply_midtrans_notification(webhook_midtrans):
+    """
+    Terapkan transisi status order dari payload yang sudah divalidasi
+    (webhook_midtrans.payload). Dipakai view (mode sinkron) dan worker
+    Celery (MIDTRANS_WEBHOOK_ASYNC). Return (status_code, detail) untuk
+    response ke Midtrans.
+    """
+    try:
+        with transaction.atomic():
+            webhook_midtrans.get_order()
+            is_paid = webhook_midtrans.change_payment_status_order()
+    except (Order.DoesNotExist, ValidationError):
+        return 404, "Order tidak ditemukan"
+    except Exception as e:
+        logger_error.error(f"Webhook error: {e}")
+        return 500, "Terjadi kesalahan"
+
+    if is_paid:
+        try:
+            with transaction.atomic():
+                webhook_midtrans.reduce_stock()
+        except Exception:
+            logger_error.critical(
+                "Order paid tapi reduce_stock gagal - butuh review manual",
+                extra={
+                    "event_type": "transaction",
+                    "order_id": webhook_midtrans.order.order_id,
+                },
+            )
+            return 500, "Terjadi kesalahan"
+    else:
+        try:
+            with transaction.atomic():
+                webhook_midtrans.reverse_stock()
+                if (
+                    webhook_midtrans.new_status == "failed"
+                    and webhook_midtrans.old_status not in ("paid", "failed")
+                ):
+                    webhook_midtrans.release_reservation()
+        except Exception:
+            logger_error.critical(
+                "Reversal terjadi tapi reverse_stock gagal - butuh review manual",
+                extra={
+                    "event_type": "transaction",
+                    "order_id": webhook_midtrans.order.order_id,
+                },
+            )
+            return 500, "Terjadi kesalahan"
+
+    logger.info(
+        f"Transaksi Midtrans untuk order id {webhook_midtrans.payload['order_id']} "
+        "berhasil di proses"
+    )
+    return 200, "OK"
+
+
+def process_received_events(order_id):
+    """
+    Worker MIDTRANS_WEBHOOK_ASYNC: proses semua event RECEIVED milik satu
+    order sesuai urutan masuk (id).
+
+    Satu transaksi per order dengan row lock Order di awal, jadi task
+    untuk order yang sama (mis. settlement lalu refund yang masuk
+    berdekatan) saling menunggu dan transisinya tetap serial. Blok atomic
+    di apply_midtrans_notification jadi savepoint: kegagalan satu event
+    hanya me-rollback event itu, event tersebut ditandai FAILED (replay
+    lewat replay_midtrans_webhooks) dan event berikutnya tetap diproses.
+    """
+    stats = {"processed": 0, "failed": 0}
+    with transaction.atomic():
+        try:
+            list(
+                Order.objects.select_for_update()
+                .filter(order_id=order_id)
+                .values_list("pk", flat=True)
+            )
+        except ValidationError:
+            # order_id bukan UUID, get_order() nanti gagal -> event FAILED
+            pass
+
+        events = MidtransWebhookEvent.objects.filter(
+            order_id=order_id, status=MidtransWebhookEvent.Status.RECEIVED
+        ).order_by("id")
+        for event in events:
+            webhook_midtrans = WebhookMidtrans()
+            webhook_midtrans.payload = event.payload
+            status_code, _ = apply_midtrans_notification(webhook_midtrans)
+
+            if status_code == 200:
+                mark_event(event, MidtransWebhookEvent.Status.PROCESSED)
+                stats["processed"] += 1
+            else:
+                mark_event(event, MidtransWebhookEvent.Status.FAILED)
+                stats["failed"] += 1
+    return stats
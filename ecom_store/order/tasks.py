@@ -1,58 +1,58 @@
 from celery import shared_task
+from config.email import get_email_outbox
 from django.core.mail import send_mail, EmailMessage
 from django.conf import settings
 
 from .models import RefundRequest, Order
+from .services.expiry import ExpiredCheckoutSweeper
+from .services.flash_stock import get_flash_stock
+from .services.notifications import render_email
+from .services.webhook_events import process_received_events
+
+
+REFUND_STATUS_TEMPLATES = {
+    RefundRequest.Status.APPROVED: "refund_approved",
+    RefundRequest.Status.REJECTED: "refund_rejected",
+    RefundRequest.Status.COMPLETED: "refund_completed",
+}
+REFUND_STATUS_TEXT = {
+    RefundRequest.Status.APPROVED: "disetujui dan sedang diproses",
+    RefundRequest.Status.REJECTED: "tidak dapat kami proses",
+    RefundRequest.Status.COMPLETED: "telah selesai diproses",
+}
+
+
+def _refund_requests(refund_request_ids):
+    return RefundRequest.objects.select_related(
+        "order_item", "order_item__product",
+        "order_item__order", "order_item__order__user", "order_item__order__store"
+    ).filter(pk__in=refund_request_ids)
 
 
 @shared_task
 def send_refund_status_email(refund_request_id):
-    try:
-        refund_request = RefundRequest.objects.select_related(
-            "order_item", "order_item__product",
-            "order_item__order", "order_item__order__user", "order_item__order__store"
-        ).get(pk=refund_request_id)
-    except RefundRequest.DoesNotExist:
+    refund_request = _refund_requests([refund_request_id]).first()
+    if refund_request is None:
         return  # request sudah dihapus/tidak ada, tidak perlu retry
 
     order_item = refund_request.order_item
     order = order_item.order
     user = order.user
-    product_name = order_item.product.name
 
     if not user.email:
         return
 
-    subject_map = {
-        RefundRequest.Status.APPROVED: "Refund Anda disetujui",
-        RefundRequest.Status.REJECTED: "Refund Anda ditolak",
-        RefundRequest.Status.COMPLETED: "Refund Anda telah selesai diproses",
-    }
-    subject = subject_map.get(refund_request.status)
-    if not subject:
+    template = REFUND_STATUS_TEMPLATES.get(refund_request.status)
+    if not template:
         return  # status REQUESTED tidak perlu notif ke customer
 
-    message_map = {
-        RefundRequest.Status.APPROVED: (
-            f"Halo {user.first_name},\n\n"
-            f"Refund Anda untuk item {product_name} (Order #{order.order_id}) "
-            f"sebesar Rp{refund_request.amount:,} telah disetujui dan sedang diproses.\n\n"
-            f"Kami akan mengirim konfirmasi lagi setelah dana selesai dikirim."
-        ),
-        RefundRequest.Status.REJECTED: (
-            f"Halo {user.first_name},\n\n"
-            f"Mohon maaf, refund Anda untuk item {product_name} (Order #{order.order_id}) "
-            f"tidak dapat kami proses.\n\n"
-            f"Jika ada pertanyaan, silakan hubungi kami di {order.store.phone_number}."
-        ),
-        RefundRequest.Status.COMPLETED: (
-            f"Halo {user.first_name},\n\n"
-            f"Refund Anda untuk item {product_name} (Order #{order.order_id}) "
-            f"sebesar Rp{refund_request.amount:,} telah selesai diproses.\n\n"
-            f"Terima kasih atas kesabaran Anda."
-        ),
-    }
-    message = message_map.get(refund_request.status)
+    subject, message = render_email(
+        template,
+        user=user,
+        order=order,
+        product_name=order_item.product.name,
+        amount=f"{refund_request.amount:,}",
+    )
 
     email = EmailMessage(
         subject=subject,
@@ -62,34 +62,79 @@ def send_refund_status_email(refund_request_id):
         reply_to=[order.store.email],
     )
     email.send()
-    
+
+
+@shared_task
+def send_refund_status_emails(refund_request_ids):
+    """
+    Versi batch send_refund_status_email untuk bulk action admin: semua
+    refund milik SATU customer (dikelompokkan pemanggil) dalam satu email.
+    """
+    refund_requests = list(
+        _refund_requests(refund_request_ids)
+        .exclude(status=RefundRequest.Status.REQUESTED)
+        .order_by("id")
+    )
+    if not refund_requests:
+        return
+    if len(refund_requests) == 1:
+        return send_refund_status_email(refund_requests[0].id)
+
+    user = refund_requests[0].order_item.order.user
+    if not user.email:
+        return
+
+    subject, message = render_email(
+        "refund_status_digest",
+        user=user,
+        lines=[
+            {
+                "product_name": refund_request.order_item.product.name,
+                "order_id": refund_request.order_item.order.order_id,
+                "amount": f"{refund_request.amount:,}",
+                "status_text": REFUND_STATUS_TEXT[refund_request.status],
+            }
+            for refund_request in refund_requests
+        ],
+    )
+    store_emails = sorted(
+        {
+            refund_request.order_item.order.store.email
+            for refund_request in refund_requests
+            if refund_request.order_item.order.store.email
+        }
+    )
+
+    email = EmailMessage(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+        reply_to=store_emails,
+    )
+    email.send()
+
+
 @shared_task
 def send_refund_created_email(refund_request_id):
-    try:
-        refund_request = RefundRequest.objects.select_related(
-            "order_item", "order_item__product",
-            "order_item__order", "order_item__order__user", "order_item__order__store"
-        ).get(pk=refund_request_id)
-    except RefundRequest.DoesNotExist:
+    refund_request = _refund_requests([refund_request_id]).first()
+    if refund_request is None:
         return
 
     order_item = refund_request.order_item
     order = order_item.order
     store = order.store
-    product_name = order_item.product.name
 
     if not store.email:
         return
 
-    subject = f"Permintaan Refund Baru - Order #{order.order_id}"
-    message = (
-        f"Ada permintaan refund baru yang perlu ditinjau.\n\n"
-        f"Order: #{order.order_id}\n"
-        f"Item: {product_name}\n"
-        f"Nominal: Rp{refund_request.amount:,}\n"
-        f"Alasan: {refund_request.get_reason_display()}\n"
-        f"Catatan customer: {refund_request.note or '-'}\n\n"
-        f"Silakan tinjau di halaman admin."
+    subject, message = render_email(
+        "refund_created",
+        order=order,
+        product_name=order_item.product.name,
+        amount=f"{refund_request.amount:,}",
+        reason=refund_request.get_reason_display(),
+        note=refund_request.note,
     )
 
     send_mail(
@@ -98,7 +143,8 @@ def send_refund_created_email(refund_request_id):
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[store.email],
     )
-    
+
+
 @shared_task
 def send_refund_anomaly_email(order_id, refund_request_id):
     try:
@@ -109,13 +155,41 @@ def send_refund_anomaly_email(order_id, refund_request_id):
     if not order.store.email:
         return
 
+    subject, message = render_email(
+        "refund_anomaly", order=order, refund_request_id=refund_request_id
+    )
+
     send_mail(
-        subject=f"[URGENT] Anomali Order #{order.order_id} - Refund Terblokir",
-        message=(
-            f"Order #{order.order_id} berstatus PAID tapi stock belum diproses "
-            f"(reduce_stock kemungkinan gagal). Refund request #{refund_request_id} "
-            f"tidak bisa diproses sampai anomali ini diperiksa manual."
-        ),
+        subject=subject,
+        message=message,
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[order.store.email],
-    )
\ No newline at end of file
+    )
+
+
+@shared_task
+def sweep_expired_checkouts():
+    """Dijadwalkan lewat CELERY_BEAT_SCHEDULE, return jumlah order & unit yang dilepas."""
+    return ExpiredCheckoutSweeper().execute()
+
+
+@shared_task
+def reconcile_flash_stock():
+    """Flush delta counter flash sale ke MySQL dan cek drift."""
+    if not settings.FLASH_SALE_ENABLED:
+        return None
+    return get_flash_stock().reconcile()
+
+
+@shared_task
+def process_midtrans_events(order_id):
+    """Worker MIDTRANS_WEBHOOK_ASYNC, di-route ke queue "webhooks"."""
+    return process_received_events(order_id)
+
+
+@shared_task
+def flush_email_outbox():
+    """Kirim email yang ditampung OutboxEmailBackend, satu koneksi SMTP per run."""
+    if not settings.EMAIL_OUTBOX_ENABLED:
+        return None
+    return get_email_outbox().flush()
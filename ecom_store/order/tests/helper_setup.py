@@ -11,6 +11,19 @@ from store.models import Store, StoreShippingOption
 
 User = get_user_model()
 
+# cache Redis diganti locmem supaya test tidak saling bocor lewat Redis asli
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog-test",
+    },
+    "shipping": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shipping-test",
+    },
+}
+
 
 def set_location_fields():
     province = Province.objects.create(ro_id=1, name="NUSA TENGGARA BARAT (NTB)")
@@ -1,4 +1,5 @@
 import uuid
+from types import SimpleNamespace
 from unittest.mock import patch
 
 from cart.models import Cart
@@ -6,6 +7,7 @@ from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from order.models import CheckoutSession, Order, OrderItem
+from order.services.checkout import CheckoutService
 from order.utils import get_destination
 from product.models import Product
 from rest_framework import serializers, status
@@ -255,6 +257,27 @@ class CheckoutViewTest(TestCase):
         # atomic rollback — CheckoutSession tidak terbuat
         self.assertFalse(CheckoutSession.objects.exists())
 
+    @patch("order.services.checkout.get_valid_carts")
+    @patch("order.views_order_process.logger_error")
+    @patch("order.views_order_process.logger")
+    def test_post_return_400_when_cart_product_no_longer_exists(
+        self, mock_logger, mock_logger_error, mock_get_valid_carts
+    ):
+        """
+        Produk di cart terhapus di antara validasi cart dan reservasi stok.
+        Assert: status 400 dengan pesan umum (bukan IndexError/500),
+        CheckoutSession tidak created di database.
+        """
+        mock_get_valid_carts.return_value = [SimpleNamespace(product_id=999_999, qty=1)]
+
+        res = self.client.post(
+            self.url, data={"cart_ids": [self.cart.id]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data["detail"], "Stok tidak cukup / produk tidak tersedia")
+        self.assertFalse(CheckoutSession.objects.exists())
+
     @patch("order.services.checkout.OrderService")
     @patch("order.views_order_process.logger_error")
     @patch("order.views_order_process.logger")
@@ -404,3 +427,77 @@ class CheckoutViewTest(TestCase):
         mock_logger.info.assert_any_call(
             f"Checkout Session {checkout_id} dibuat untuk User {self.user.id}. Data disimpan di model."
         )
+
+
+class CheckoutQueryCountTest(TestCase):
+    """
+    Regression test jumlah query CheckoutService: checkout 1 baris cart dan
+    50 baris cart harus sama biayanya (OrderItem di-bulk_create, stok
+    di-reserve lewat satu UPDATE).
+    """
+
+    # savepoint atomic (2), create CheckoutSession, 2x cart (validasi id +
+    # fetch), savepoint + UPDATE stok + release, Order.full_clean() (3) +
+    # insert Order, bulk_create OrderItem, update CheckoutSession.order
+    EXPECTED_QUERIES = 14
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+        cls.user = set_user()
+        province, city, district = set_location_fields()
+        cls.shipping_address = set_address(cls.user, province, city, district)
+        cls.store = set_store(province, city, district)
+
+        template = Product.objects.first()
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"Bulk Product {i}",
+                    variant_name=f"Bulk Variant {i}",
+                    category=template.category,
+                    price=1_000 * (i + 1),
+                    stock=10,
+                    weight=100,
+                    width=1,
+                    height=1,
+                    length=1,
+                )
+                for i in range(50)
+            ]
+        )
+        cls.products = list(Product.objects.filter(name__startswith="Bulk Product"))
+        cls.carts = Cart.objects.bulk_create(
+            [Cart(user=cls.user, product=product, qty=2) for product in cls.products]
+        )
+        cls.cart_ids = list(
+            Cart.objects.filter(user=cls.user).values_list("id", flat=True)
+        )
+
+    def checkout(self, cart_ids):
+        return CheckoutService(
+            self.user, cart_ids, self.shipping_address, self.store
+        ).execute()
+
+    def test_single_line_checkout_query_count(self):
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            self.checkout(self.cart_ids[:1])
+
+    def test_fifty_line_checkout_costs_the_same_queries(self):
+        self.assertEqual(len(self.cart_ids), 50)
+
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            checkout = self.checkout(self.cart_ids)
+
+        items = OrderItem.objects.filter(order=checkout.order)
+        self.assertEqual(items.count(), 50)
+
+        prices = {product.id: product.price for product in self.products}
+        for item in items:
+            self.assertEqual(item.product_price, prices[item.product_id])
+            self.assertEqual(item.qty, 2)
+
+        # snapshot total ikut tersimpan di INSERT order, tanpa query tambahan
+        order = checkout.order
+        self.assertEqual(order.items_subtotal, sum(prices.values()) * 2)
+        self.assertEqual(order.total_weight, 50 * 100 * 2)
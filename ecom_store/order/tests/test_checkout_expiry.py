@@ -0,0 +1,180 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from cart.models import Cart
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from order.models import CheckoutSession, Order, OrderShipping, RefundRequest
+from order.services.checkout import CheckoutService
+from order.services.expiry import ExpiredCheckoutSweeper
+from order.services.refund import RefundService
+from order.tasks import sweep_expired_checkouts
+from product.models import Product
+
+from .helper_setup import (
+    LOCMEM_CACHES,
+    set_address,
+    set_location_fields,
+    set_store,
+    set_user,
+)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExpiredCheckoutSweeperTest(TestCase):
+    """
+    Integration test sweeper reserved_stock: session expired yang tidak
+    pernah dibayar harus melepas reservasinya dan order-nya jadi failed,
+    tanpa menyentuh order yang sudah dibayar atau masih menunggu webhook.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+        cls.user = set_user()
+        province, city, district = set_location_fields()
+        cls.shipping_address = set_address(cls.user, province, city, district)
+        cls.store = set_store(province, city, district)
+        cls.product_a, cls.product_b = Product.objects.order_by("id")[:2]
+
+    def setUp(self):
+        Product.objects.filter(pk__in=[self.product_a.pk, self.product_b.pk]).update(
+            stock=100, reserved_stock=0
+        )
+
+    def _checkout(self, qty_a=2, qty_b=3, expired_minutes=1):
+        # cart unik per (user, product)
+        Cart.objects.filter(user=self.user).delete()
+        carts = [
+            Cart.objects.create(user=self.user, product=self.product_a, qty=qty_a),
+            Cart.objects.create(user=self.user, product=self.product_b, qty=qty_b),
+        ]
+        checkout = CheckoutService(
+            user=self.user,
+            cart_ids=[cart.id for cart in carts],
+            destination=self.shipping_address,
+            store=self.store,
+        ).execute()
+        CheckoutSession.objects.filter(pk=checkout.pk).update(
+            expires_at=timezone.now() - timedelta(minutes=expired_minutes)
+        )
+        return checkout.order
+
+    def _reserved(self):
+        return list(
+            Product.objects.filter(pk__in=[self.product_a.pk, self.product_b.pk])
+            .order_by("id")
+            .values_list("reserved_stock", flat=True)
+        )
+
+    def _add_shipping(self, order):
+        OrderShipping.objects.create(
+            order=order,
+            shipping_name="JNE",
+            service_name="REG",
+            etd="2-3",
+            shipping_cost=10000,
+            shipping_cost_net=10000,
+            service_fee=1000,
+            origin_ro=1,
+            origin_address="Jakarta",
+            destination_ro=2,
+            destination_address="Cirebon",
+        )
+
+    def test_releases_reservation_and_fails_order(self):
+        order = self._checkout()
+        self.assertEqual(self._reserved(), [2, 3])
+
+        stats = ExpiredCheckoutSweeper().execute()
+
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, Order.PaymentStatus.FAILED)
+        self.assertEqual(self._reserved(), [0, 0])
+        self.assertEqual(stats, {"orders": 1, "units": 5, "skipped": 0})
+
+    def test_is_idempotent(self):
+        self._checkout()
+
+        ExpiredCheckoutSweeper().execute()
+        stats = sweep_expired_checkouts()
+
+        self.assertEqual(stats["units"], 0)
+        self.assertEqual(self._reserved(), [0, 0])
+
+    def test_ignores_unexpired_and_paid_orders(self):
+        active = self._checkout(expired_minutes=-5)
+        paid = self._checkout()
+        Order.objects.filter(pk=paid.pk).update(payment_status=Order.PaymentStatus.PAID)
+
+        stats = ExpiredCheckoutSweeper().execute()
+
+        self.assertEqual(stats["orders"], 0)
+        self.assertEqual(self._reserved(), [4, 6])
+        active.refresh_from_db()
+        self.assertEqual(active.payment_status, Order.PaymentStatus.PENDING)
+
+    def test_waits_for_snap_expiry_when_transaction_was_created(self):
+        order = self._checkout()
+        self._add_shipping(order)
+
+        self.assertEqual(ExpiredCheckoutSweeper().execute()["orders"], 0)
+
+        later = timezone.now() + timedelta(days=2)
+        stats = ExpiredCheckoutSweeper(now=later).execute()
+
+        self.assertEqual(stats["orders"], 1)
+        self.assertEqual(self._reserved(), [0, 0])
+
+    def test_walks_all_batches(self):
+        for _ in range(5):
+            self._checkout(qty_a=1, qty_b=1)
+
+        stats = ExpiredCheckoutSweeper(batch_size=2).execute()
+
+        self.assertEqual(stats, {"orders": 5, "units": 10, "skipped": 0})
+        self.assertEqual(self._reserved(), [0, 0])
+
+    def test_drifted_reservation_does_not_block_other_orders(self):
+        broken = self._checkout(qty_a=4, qty_b=1)
+        self._checkout(qty_a=1, qty_b=1)
+        # reserved_stock produk A sudah (salah) dilepas sebagian di luar sweeper
+        Product.objects.filter(pk=self.product_a.pk).update(reserved_stock=2)
+
+        stats = ExpiredCheckoutSweeper().execute()
+
+        self.assertEqual(stats["orders"], 2)
+        self.assertEqual(stats["units"], 2)
+        self.assertEqual(self._reserved(), [1, 1])
+        broken.refresh_from_db()
+        self.assertEqual(broken.payment_status, Order.PaymentStatus.FAILED)
+
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_skips_items_with_completed_refund(self, mock_email):
+        order = self._checkout(qty_a=2, qty_b=3)
+        self._add_shipping(order)
+        # refund item A di order PENDING: reservasinya dilepas oleh RefundService
+        item_a = order.items.get(product=self.product_a)
+        refund = RefundRequest.objects.create(
+            order_item=item_a,
+            amount=item_a.subtotal,
+            reason=RefundRequest.Reason.CUSTOMER_CANCEL,
+            status=RefundRequest.Status.APPROVED,
+            destination_type=RefundRequest.DestinationType.BANK,
+            destination_provider=RefundRequest.Provider.BCA,
+            destination_number="1234567890",
+            account_holder_name="Customer Satu",
+        )
+        RefundService(refund).complete()
+        # reservasi order lain pada produk A tidak boleh ikut terpotong
+        self._checkout(qty_a=4, qty_b=1, expired_minutes=-3 * 24 * 60)
+        self.assertEqual(self._reserved(), [4, 4])
+
+        later = timezone.now() + timedelta(days=2)
+        stats = ExpiredCheckoutSweeper(now=later).execute()
+
+        self.assertEqual(stats, {"orders": 1, "units": 3, "skipped": 0})
+        self.assertEqual(self._reserved(), [4, 1])
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, Order.PaymentStatus.FAILED)
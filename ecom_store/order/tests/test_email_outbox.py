@@ -0,0 +1,220 @@
+import unittest
+from unittest.mock import patch
+
+import redis
+from config.email import OUTBOX_KEY, PROCESSING_KEY, _for_url, get_email_outbox
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from order.models import Order, OrderItem, RefundRequest
+from order.services.notifications import render_email
+from order.tasks import flush_email_outbox, send_refund_status_emails
+from product.models import Product
+
+from .helper_setup import set_location_fields, set_store, set_user
+
+# DB 15 supaya tidak bentrok dengan cache/broker dev di DB 0
+TEST_REDIS_URL = "redis://localhost:6379/15"
+LOCMEM_EMAIL = "django.core.mail.backends.locmem.EmailBackend"
+
+
+def redis_available():
+    try:
+        return redis.Redis.from_url(TEST_REDIS_URL, socket_connect_timeout=0.2).ping()
+    except redis.RedisError:
+        return False
+
+
+class RefundEmailTemplateTest(TestCase):
+    """Template email refund: baris pertama subject, sisanya body plain text."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+        cls.user = set_user()
+        cls.store = set_store(*set_location_fields())
+        cls.order = Order.objects.create(user=cls.user, store=cls.store)
+
+    def test_status_template_renders_subject_and_body(self):
+        subject, body = render_email(
+            "refund_completed",
+            user=self.user,
+            order=self.order,
+            product_name="Kaos <Polos> & Co",
+            amount=f"{25_000:,}",
+        )
+
+        self.assertEqual(subject, "Refund Anda telah selesai diproses")
+        self.assertTrue(body.startswith(f"Halo {self.user.first_name},"))
+        self.assertIn(f"(Order #{self.order.order_id}) sebesar Rp25,000", body)
+        # plain text, tidak di-escape HTML
+        self.assertIn("Kaos <Polos> & Co", body)
+
+    def test_created_template_defaults_empty_note(self):
+        _, body = render_email(
+            "refund_created",
+            order=self.order,
+            product_name="Kaos",
+            amount="1,000",
+            reason="Retur Pasca-Kirim",
+            note="",
+        )
+
+        self.assertIn("Catatan customer: -", body)
+
+    def test_digest_lists_every_refund(self):
+        product = Product.objects.first()
+        refund_requests = []
+        for status in (RefundRequest.Status.APPROVED, RefundRequest.Status.REJECTED):
+            item = OrderItem.objects.create(
+                order=self.order, product=product, product_price=1_000, qty=1
+            )
+            refund_requests.append(
+                RefundRequest.objects.create(
+                    order_item=item,
+                    amount=item.subtotal,
+                    reason=RefundRequest.Reason.RETURN,
+                    status=status,
+                    destination_type=RefundRequest.DestinationType.BANK,
+                    destination_provider=RefundRequest.Provider.BCA,
+                    destination_number="1234567890",
+                    account_holder_name="Customer Satu",
+                )
+            )
+
+        send_refund_status_emails([r.pk for r in refund_requests])
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Update status 2 refund Anda")
+        self.assertIn("disetujui dan sedang diproses", mail.outbox[0].body)
+        self.assertIn("tidak dapat kami proses", mail.outbox[0].body)
+
+
+@override_settings(
+    EMAIL_BACKEND="config.email.OutboxEmailBackend",
+    EMAIL_DELIVERY_BACKEND=LOCMEM_EMAIL,
+    EMAIL_OUTBOX_ENABLED=True,
+    EMAIL_OUTBOX_REDIS_URL="redis://localhost:1/0",
+)
+class OutboxFallbackTest(TestCase):
+    def test_sends_directly_when_redis_is_down(self):
+        with patch("config.email.logger_error"):
+            sent = EmailMessage("Subject", "Body", to=["a@example.com"]).send()
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@unittest.skipUnless(redis_available(), "Redis tidak tersedia di localhost:6379")
+@override_settings(
+    EMAIL_BACKEND="config.email.OutboxEmailBackend",
+    EMAIL_DELIVERY_BACKEND=LOCMEM_EMAIL,
+    EMAIL_OUTBOX_ENABLED=True,
+    EMAIL_OUTBOX_REDIS_URL=TEST_REDIS_URL,
+    EMAIL_OUTBOX_BATCH_SIZE=4,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+)
+class EmailOutboxTest(TestCase):
+    """
+    Integration test OutboxEmailBackend lawan Redis asli: send() hanya
+    menampung email, flush mengirim semuanya lewat satu koneksi.
+    """
+
+    def setUp(self):
+        self.client_redis = _for_url(TEST_REDIS_URL).client
+        self.client_redis.delete(OUTBOX_KEY, PROCESSING_KEY)
+        self.addCleanup(self.client_redis.delete, OUTBOX_KEY, PROCESSING_KEY)
+
+    def _send(self, count):
+        for index in range(count):
+            EmailMessage(
+                f"Subject {index}",
+                "Body",
+                "shop@example.com",
+                [f"u{index}@example.com"],
+            ).send()
+
+    def test_send_only_buffers(self):
+        self._send(3)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(self.client_redis.llen(OUTBOX_KEY), 3)
+
+    def test_flush_uses_one_connection_for_all_batches(self):
+        self._send(10)
+
+        with patch("config.email.get_connection", wraps=get_connection) as spy:
+            stats = flush_email_outbox()
+
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(stats, {"sent": 10, "retried": 0, "dropped": 0})
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            [f"Subject {index}" for index in range(10)],
+        )
+        self.assertEqual(self.client_redis.llen(OUTBOX_KEY), 0)
+
+    def test_failed_messages_are_retried_then_dropped(self):
+        self._send(2)
+        backend = "django.core.mail.backends.locmem.EmailBackend.send_messages"
+
+        with patch(backend, side_effect=OSError("smtp down")), patch(
+            "config.email.logger_error"
+        ):
+            first = get_email_outbox().flush()
+            second = get_email_outbox().flush()
+
+        self.assertEqual(first, {"sent": 0, "retried": 2, "dropped": 0})
+        self.assertEqual(second, {"sent": 0, "retried": 0, "dropped": 2})
+        self.assertEqual(self.client_redis.llen(OUTBOX_KEY), 0)
+
+    def test_concurrent_flush_is_skipped(self):
+        self._send(1)
+        lock = self.client_redis.lock("email_outbox:flush", timeout=5)
+        lock.acquire()
+        self.addCleanup(lock.release)
+
+        self.assertEqual(get_email_outbox().flush()["sent"], 0)
+        self.assertEqual(self.client_redis.llen(OUTBOX_KEY), 1)
+
+    def test_unfinished_batch_is_requeued_first(self):
+        self._send(3)
+        # flush sebelumnya mati setelah meng-claim 2 email pertama
+        outbox = get_email_outbox()
+        outbox.claim(2)
+
+        stats = outbox.flush()
+
+        self.assertEqual(stats["sent"], 3)
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            ["Subject 0", "Subject 1", "Subject 2"],
+        )
+        self.assertEqual(self.client_redis.llen(PROCESSING_KEY), 0)
+
+    @override_settings(EMAIL_OUTBOX_FLUSH_BUDGET=0)
+    def test_flush_stops_after_time_budget(self):
+        self._send(3)
+
+        self.assertEqual(get_email_outbox().flush()["sent"], 0)
+        self.assertEqual(self.client_redis.llen(OUTBOX_KEY), 3)
+
+    def test_expired_lock_does_not_fail_flush(self):
+        self._send(5)
+
+        def expire_lock(connection, raw_messages, stats):
+            self.client_redis.delete("email_outbox:flush")
+            return send_batch(connection, raw_messages, stats)
+
+        outbox = get_email_outbox()
+        send_batch = outbox.send_batch
+        with patch.object(outbox, "send_batch", side_effect=expire_lock), patch(
+            "config.email.logger_error"
+        ) as mock_logger_error:
+            stats = outbox.flush()
+
+        # batch pertama (4) terkirim, sisanya ditinggal untuk flush lain
+        self.assertEqual(stats["sent"], 4)
+        self.assertEqual(self.client_redis.llen(OUTBOX_KEY), 1)
+        mock_logger_error.warning.assert_called_once()
@@ -0,0 +1,173 @@
+import threading
+import unittest
+
+import redis
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from order.services.flash_stock import FlashStockShortage, _for_url, get_flash_stock
+from order.services.stock import InsufficientStock, StockLedger
+from product.models import Product
+
+from .helper_setup import LOCMEM_CACHES
+
+# DB 15 supaya tidak bentrok dengan cache/broker dev di DB 0
+TEST_REDIS_URL = "redis://localhost:6379/15"
+
+
+def redis_available():
+    try:
+        return redis.Redis.from_url(TEST_REDIS_URL, socket_connect_timeout=0.2).ping()
+    except redis.RedisError:
+        return False
+
+
+@unittest.skipUnless(redis_available(), "Redis tidak tersedia di localhost:6379")
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    FLASH_SALE_ENABLED=True,
+    FLASH_SALE_REDIS_URL=TEST_REDIS_URL,
+    FLASH_SALE_JOURNAL_TIMEOUT=60,
+)
+class FlashStockTest(TestCase):
+    """
+    Integration test counter flash sale lawan Redis asli: produk flash sale
+    dimutasi atomic di Redis tanpa menyentuh row MySQL, delta di-flush oleh
+    reconcile(), dan mutasi yang transaksinya rollback di-revert.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+
+    def setUp(self):
+        self.hot, self.normal = Product.objects.order_by("id")[:2]
+        Product.objects.filter(pk__in=[self.hot.pk, self.normal.pk]).update(
+            stock=10, reserved_stock=0
+        )
+        self.flash = get_flash_stock()
+        self._clear()
+        self.addCleanup(self._clear)
+        self.flash.enable([self.hot.pk])
+
+    def _clear(self):
+        client = _for_url(TEST_REDIS_URL).client
+        keys = list(client.scan_iter("flash_stock:*"))
+        if keys:
+            client.delete(*keys)
+
+    def _redis(self):
+        return self.flash.status()[self.hot.pk]
+
+    def _db(self, product):
+        product.refresh_from_db()
+        return product.stock, product.reserved_stock
+
+    def test_reserve_hits_redis_not_mysql(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(0):
+                StockLedger({self.hot.pk: 3}).reserve()
+
+        self.assertEqual(self._redis()["reserved"], 3)
+        self.assertEqual(self._redis()["d_reserved"], 3)
+        self.assertEqual(self._db(self.hot), (10, 0))
+
+    def test_reserve_rejects_oversell(self):
+        StockLedger({self.hot.pk: 8}).reserve()
+
+        with self.assertRaises(InsufficientStock) as ctx:
+            StockLedger({self.hot.pk: 3}).reserve()
+
+        self.assertEqual([p.pk for p in ctx.exception.products], [self.hot.pk])
+        self.assertEqual(self._redis()["reserved"], 8)
+
+    def test_mixed_order_sql_shortage_reverts_redis(self):
+        Product.objects.filter(pk=self.normal.pk).update(stock=1)
+
+        with self.assertRaises(InsufficientStock):
+            StockLedger({self.hot.pk: 2, self.normal.pk: 5}).reserve()
+
+        self.assertEqual(self._redis()["reserved"], 0)
+        self.assertEqual(self._db(self.normal), (1, 0))
+
+    def test_commit_and_restore(self):
+        ledger = StockLedger({self.hot.pk: 4, self.normal.pk: 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.reserve()
+            ledger.commit()
+            StockLedger({self.hot.pk: 1}).restore()
+
+        state = self._redis()
+        self.assertEqual((state["stock"], state["reserved"]), (7, 0))
+        self.assertEqual(self._db(self.normal), (9, 0))
+
+    def test_reconcile_flushes_deltas_and_reports_drift(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            StockLedger({self.hot.pk: 4}).reserve()
+            StockLedger({self.hot.pk: 1}).commit()
+
+        stats = self.flash.reconcile()
+
+        self.assertEqual(stats["flushed"], {self.hot.pk: (-1, 3)})
+        self.assertEqual(stats["drift"], {})
+        self.assertEqual(self._db(self.hot), (9, 3))
+        self.assertEqual(self._redis()["d_stock"], 0)
+
+        # edit stok langsung di MySQL selama flash sale -> drift
+        Product.objects.filter(pk=self.hot.pk).update(stock=50)
+        drift = self.flash.reconcile()["drift"]
+        self.assertEqual(drift[self.hot.pk], {"redis": [9, 3], "mysql": [50, 3]})
+
+    @override_settings(FLASH_SALE_JOURNAL_TIMEOUT=0)
+    def test_rolled_back_mutation_is_reverted(self):
+        # on_commit tidak pernah jalan -> journal tertinggal
+        with transaction.atomic():
+            StockLedger({self.hot.pk: 5}).reserve()
+            transaction.set_rollback(True)
+        self.assertEqual(self._redis()["reserved"], 5)
+
+        stats = self.flash.reconcile()
+
+        self.assertEqual(stats["reverted"], 1)
+        self.assertEqual(self._redis()["reserved"], 0)
+        self.assertEqual(self.flash.reconcile()["reverted"], 0)
+
+    @override_settings(FLASH_SALE_JOURNAL_TIMEOUT=0)
+    def test_committed_mutation_is_not_reverted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            StockLedger({self.hot.pk: 5}).reserve()
+
+        self.assertEqual(self.flash.reconcile()["reverted"], 0)
+        self.assertEqual(self._db(self.hot), (10, 5))
+
+    def test_disable_flushes_and_returns_product_to_sql(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            StockLedger({self.hot.pk: 2}).reserve()
+
+        self.flash.disable([self.hot.pk])
+        StockLedger({self.hot.pk: 1}).reserve()
+
+        self.assertEqual(self.flash.status(), {})
+        self.assertEqual(self._db(self.hot), (10, 3))
+
+    def test_concurrent_reservations_never_oversell(self):
+        ok = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(10):
+                try:
+                    self.flash.apply({self.hot.pk: 1}, {"reserved_stock": 1}, True)
+                except FlashStockShortage:
+                    continue
+                with lock:
+                    ok.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(ok), 10)
+        self.assertEqual(self._redis()["reserved"], 10)
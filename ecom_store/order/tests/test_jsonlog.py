@@ -0,0 +1,108 @@
+import json
+import logging
+import unittest
+import uuid
+from decimal import Decimal
+
+from config import jsonlog
+from config.jsonlog import JSONFormatter
+from django.test import SimpleTestCase
+
+DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+
+def make_record(msg="Order dibuat", **extra):
+    return logging.makeLogRecord(
+        {
+            "name": "order",
+            "levelno": logging.INFO,
+            "levelname": "INFO",
+            "msg": msg,
+            **extra,
+        }
+    )
+
+
+class JSONFormatterTest(SimpleTestCase):
+    """Output JSONFormatter per event_type harus tetap sama persis (byte) dengan format log lama."""
+
+    def setUp(self):
+        self.formatter = JSONFormatter(datefmt=DATEFMT)
+
+    def _timestamp(self, record):
+        return logging.Formatter(datefmt=DATEFMT).formatTime(record, DATEFMT)
+
+    def test_always_fields_default_to_none(self):
+        record = make_record("Login success", event_type="login", user_id=3)
+
+        self.assertEqual(
+            self.formatter.format(record),
+            '{"timestamp": "%s", "logger": "order", "level": "INFO", '
+            '"event": "Login success", "user_id": 3, "email": null, '
+            '"ip_address": null, "user_agent": null}' % self._timestamp(record),
+        )
+
+    def test_optional_fields_are_skipped_and_converted(self):
+        checkout_id = uuid.uuid4()
+        record = make_record(
+            event_type="shippingrates",
+            checkout_id=checkout_id,
+            item_value=Decimal("1500.50"),
+        )
+
+        data = json.loads(self.formatter.format(record))
+
+        self.assertEqual(list(data)[4:], ["checkout_id", "item_value", "weight"])
+        self.assertEqual(data["checkout_id"], str(checkout_id))
+        self.assertEqual(data["item_value"], "1500.50")
+        self.assertIsNone(data["weight"])
+
+    def test_transaction_field_order(self):
+        record = make_record(
+            event_type="transaction",
+            response={"token": "abc"},
+            payload={"gross_amount": "10000.00"},
+            unrelated="diabaikan",
+        )
+
+        data = json.loads(self.formatter.format(record))
+
+        self.assertEqual(list(data)[4:], ["order_id", "payload", "response"])
+        self.assertIsNone(data["order_id"])
+
+    def test_unknown_event_type_writes_base_fields_only(self):
+        record = make_record(event_type="flash_stock", drift={1: {"redis": [1, 0]}})
+
+        self.assertEqual(
+            list(json.loads(self.formatter.format(record))),
+            ["timestamp", "logger", "level", "event"],
+        )
+
+    def test_timestamp_follows_record_time(self):
+        first = make_record(created=1_700_000_000.2)
+        second = make_record(created=1_700_000_001.1)
+
+        self.assertEqual(
+            json.loads(self.formatter.format(first))["timestamp"],
+            self._timestamp(first),
+        )
+        self.assertEqual(
+            json.loads(self.formatter.format(second))["timestamp"],
+            self._timestamp(second),
+        )
+
+    @unittest.skipIf(jsonlog.orjson is None, "orjson tidak terinstall")
+    def test_orjson_output_has_same_content(self):
+        fast = JSONFormatter(datefmt=DATEFMT, use_orjson=True)
+        record = make_record(
+            "Pembayaran diterima é",
+            event_type="refund",
+            order_id=str(uuid.uuid4()),
+            refund_request_id=7,
+            reduced_stock=True,
+        )
+
+        output = fast.format(record)
+
+        self.assertEqual(json.loads(output), json.loads(self.formatter.format(record)))
+        self.assertIn("é", output)
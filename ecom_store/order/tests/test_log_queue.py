@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from config.jsonlog import JSONFormatter
+from config.logqueue import LogPipeline, QueuedHandler
+from django.test import SimpleTestCase
+
+
+class QueuedHandlerTest(SimpleTestCase):
+    """
+    Pipeline logging async: logger hanya menaruh record di bounded queue,
+    listener memformat dan menulis ke file per batch, record yang tidak
+    muat di queue dibuang dan dihitung.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "order_checkout.log")
+
+        self.logger = logging.getLogger(f"test_log_queue.{self._testMethodName}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def _handler(self, maxsize=100, batch_size=50, block_timeout=0, **kwargs):
+        self.pipeline = LogPipeline(maxsize, batch_size, block_timeout)
+        self.addCleanup(self.pipeline.stop)
+        with patch("config.logqueue.get_log_pipeline", return_value=self.pipeline):
+            handler = QueuedHandler(
+                "config.logqueue.BatchRotatingFileHandler",
+                filename=self.path,
+                maxBytes=kwargs.get("maxBytes", 0),
+                backupCount=1,
+            )
+        handler.name = "file_order"
+        handler.setFormatter(JSONFormatter())
+        self.addCleanup(handler.target.close)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.logger.addHandler(handler)
+        return handler
+
+    def _lines(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_are_written_by_listener(self):
+        self._handler()
+
+        self.logger.info("Checkout %s dibuat", "CHK-1")
+        self.logger.error(
+            "Webhook gagal", extra={"event_type": "transaction", "order_id": 7}
+        )
+        self.pipeline.flush()
+
+        first, second = self._lines()
+        self.assertEqual(first["event"], "Checkout CHK-1 dibuat")
+        self.assertEqual(second["level"], "ERROR")
+        self.assertEqual(second["order_id"], 7)
+
+    def test_format_runs_off_the_calling_thread(self):
+        handler = self._handler()
+
+        with patch.object(self.pipeline, "_ensure_started"):
+            with patch.object(JSONFormatter, "format") as mock_format:
+                self.logger.info("Order dibuat")
+        mock_format.assert_not_called()
+        self.assertEqual(handler.queued, 1)
+
+        self.pipeline.listener.start()
+        self.pipeline.flush()
+        self.assertEqual(self._lines()[0]["event"], "Order dibuat")
+
+    def test_queued_records_are_written_in_one_batch(self):
+        handler = self._handler(batch_size=50)
+
+        with patch.object(self.pipeline, "_ensure_started"):
+            for i in range(30):
+                self.logger.info(f"record {i}")
+
+        with patch.object(
+            handler.target, "emit_batch", wraps=handler.target.emit_batch
+        ) as mock_emit:
+            self.pipeline.listener.start()
+            self.pipeline.flush()
+
+        mock_emit.assert_called_once()
+        self.assertEqual(len(self._lines()), 30)
+
+    def test_full_queue_drops_and_reports(self):
+        handler = self._handler(maxsize=2)
+
+        with patch.object(self.pipeline, "_ensure_started"):
+            started = time.monotonic()
+            for i in range(5):
+                self.logger.info(f"record {i}")
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual((handler.queued, handler.dropped), (2, 3))
+
+        self.pipeline.listener.start()
+        self.pipeline.flush()
+
+        lines = self._lines()
+        self.assertEqual(
+            [line["event"] for line in lines[:2]], ["record 0", "record 1"]
+        )
+        self.assertEqual(lines[2]["level"], "WARNING")
+        self.assertIn("3 log record dibuang", lines[2]["event"])
+        # sudah dilaporkan, counter total tetap
+        self.assertEqual(handler.take_dropped(), 0)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_errors_wait_for_room_before_dropping(self):
+        handler = self._handler(maxsize=1, block_timeout=0.05)
+
+        with patch.object(self.pipeline, "_ensure_started"):
+            self.logger.info("mengisi queue")
+            started = time.monotonic()
+            self.logger.error("tidak muat")
+            elapsed = time.monotonic() - started
+
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertEqual(handler.dropped, 1)
+
+    def test_rollover_once_per_batch(self):
+        self._handler(maxBytes=400)
+
+        for i in range(20):
+            self.logger.info(f"record panjang nomor {i:03d}")
+            self.pipeline.flush()
+
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        self.assertLessEqual(os.path.getsize(self.path), 400)
@@ -436,16 +436,16 @@ class ReverseStockTests(TestCase):
         mock_logger_error.exception.assert_called_once()
         
     @patch("order.services.midtrans.logger")
-    @patch("order.services.midtrans.Product")
+    @patch("order.utils.StockLedger")
     @patch("order.services.midtrans.get_unrefunded_items")
     def test_release_reservation_noop_when_all_items_already_refunded(
-        self, mock_get_unrefunded, mock_product_model, mock_logger
+        self, mock_get_unrefunded, mock_ledger, mock_logger
     ):
         """
         Test: order.reduced_stock True, tapi get_unrefunded_items() return
         queryset kosong (semua item sudah RefundRequest COMPLETED).
-        Assert: tidak lanjut ke Product.objects.select_for_update() sama sekali,
-        tidak ada save() yang terpanggil.
+        Assert: tidak lanjut ke StockLedger sama sekali, tidak ada UPDATE
+        stok yang dijalankan.
         """
         webhook = WebhookMidtrans()
         webhook.order = MagicMock()
@@ -458,7 +458,7 @@ class ReverseStockTests(TestCase):
 
         webhook.reverse_stock()
 
-        mock_product_model.objects.select_for_update.assert_not_called()
+        mock_ledger.from_items.assert_not_called()
         mock_logger.warning.assert_called_once()
 
 
@@ -469,30 +469,27 @@ class ReleaseReservationTests(TestCase):
     """
     release_reservation() sekarang TANPA guard internal -- pemicu (old_status
     not in ("paid", "failed")) dijamin benar oleh view, bukan oleh method ini.
-    order_items yang di-mock harus berperilaku seperti queryset asli (support
-    __bool__, values_list(), __iter__) karena kode sekarang memakai
-    order_items.values_list("product_id", flat=True) dan Product.objects.filter(id__in=...).
+    Mutasi reserved_stock didelegasikan ke StockLedger (satu conditional
+    UPDATE untuk semua item), jadi yang dicek di sini adalah item apa yang
+    diteruskan ke ledger.
     """
 
     def _mock_order_items(self, items):
-        """Helper: bikin mock queryset-like yang support values_list/iter/bool."""
+        """Helper: bikin mock queryset-like yang support iter/bool."""
         mock_qs = MagicMock()
-        mock_qs.values_list.return_value = [item.product_id for item in items]
         mock_qs.__iter__.return_value = iter(items)
         mock_qs.__bool__.return_value = bool(items)
         return mock_qs
 
-    @patch("order.services.midtrans.Product")
+    @patch("order.services.midtrans.StockLedger")
     @patch("order.services.midtrans.get_unrefunded_items")
-    def test_release_reservation_decrements_each_item(
-        self, mock_get_unrefunded, mock_product_model
+    def test_release_reservation_releases_all_unrefunded_items(
+        self, mock_get_unrefunded, mock_ledger
     ):
         """
-        Test: order dengan beberapa item, tiap item punya product dengan
-        reserved_stock tertentu.
-        Assert: reserved_stock tiap product berkurang sesuai qty item
-        masing-masing, save() terpanggil dengan update_fields=["reserved_stock"]
-        untuk tiap product, get_unrefunded_items dipanggil dengan order yang benar.
+        Test: order dengan beberapa item yang belum di-refund.
+        Assert: get_unrefunded_items dipanggil dengan order yang benar, hasilnya
+        diteruskan ke StockLedger.from_items() lalu release() dipanggil sekali.
         """
         webhook = WebhookMidtrans()
         webhook.order = MagicMock()
@@ -500,46 +497,16 @@ class ReleaseReservationTests(TestCase):
 
         item_a = MagicMock(product_id=1, qty=2)
         item_b = MagicMock(product_id=2, qty=3)
-        mock_get_unrefunded.return_value = self._mock_order_items([item_a, item_b])
-
-        product_a = MagicMock(id=1, reserved_stock=5)
-        product_b = MagicMock(id=2, reserved_stock=4)
-        mock_qs = mock_product_model.objects.select_for_update.return_value
-        mock_qs.filter.return_value.order_by.return_value = [product_a, product_b]
+        order_items = self._mock_order_items([item_a, item_b])
+        mock_get_unrefunded.return_value = order_items
 
         webhook.release_reservation()
 
         mock_get_unrefunded.assert_called_once_with(webhook.order)
-        self.assertEqual(product_a.reserved_stock, 3)  # 5 - 2
-        self.assertEqual(product_b.reserved_stock, 1)  # 4 - 3
-        product_a.save.assert_called_once_with(update_fields=["reserved_stock"])
-        product_b.save.assert_called_once_with(update_fields=["reserved_stock"])
-
-    @patch("order.services.midtrans.Product")
-    @patch("order.services.midtrans.get_unrefunded_items")
-    def test_release_reservation_does_not_touch_stock_field(
-        self, mock_get_unrefunded, mock_product_model
-    ):
-        """
-        Test: release_reservation() hanya boleh menyentuh reserved_stock,
-        TIDAK boleh mengubah field stock.
-        Assert: product.stock tidak berubah dari nilai awal.
-        """
-        webhook = WebhookMidtrans()
-        webhook.order = MagicMock()
-        webhook.order.reduced_stock = False
-
-        item = MagicMock(product_id=1, qty=2)
-        mock_get_unrefunded.return_value = self._mock_order_items([item])
-
-        product = MagicMock(id=1, reserved_stock=5, stock=10)
-        mock_qs = mock_product_model.objects.select_for_update.return_value
-        mock_qs.filter.return_value.order_by.return_value = [product]
-
-        webhook.release_reservation()
-
-        self.assertEqual(product.stock, 10)
-        self.assertEqual(product.reserved_stock, 3)
+        mock_ledger.from_items.assert_called_once_with(order_items)
+        mock_ledger.from_items.return_value.release.assert_called_once_with()
+        mock_ledger.from_items.return_value.commit.assert_not_called()
+        mock_ledger.from_items.return_value.restore.assert_not_called()
 
     def test_release_reservation_does_not_update_reserved_stock_when_reduced_stock_true(self):
         """
@@ -555,16 +522,15 @@ class ReleaseReservationTests(TestCase):
             webhook.release_reservation()
             mock_get_unrefunded.assert_not_called()
 
-    @patch("order.services.midtrans.Product")
+    @patch("order.services.midtrans.StockLedger")
     @patch("order.services.midtrans.get_unrefunded_items")
     def test_release_reservation_noop_when_all_items_already_refunded(
-        self, mock_get_unrefunded, mock_product_model
+        self, mock_get_unrefunded, mock_ledger
     ):
         """
         Test: order.reduced_stock False, tapi get_unrefunded_items() return
         queryset kosong (semua item sudah RefundRequest COMPLETED).
-        Assert: tidak lanjut ke Product.objects.select_for_update() sama sekali,
-        tidak ada save() yang terpanggil.
+        Assert: StockLedger tidak dipanggil sama sekali.
         """
         webhook = WebhookMidtrans()
         webhook.order = MagicMock()
@@ -573,7 +539,7 @@ class ReleaseReservationTests(TestCase):
 
         webhook.release_reservation()
 
-        mock_product_model.objects.select_for_update.assert_not_called()
+        mock_ledger.from_items.assert_not_called()
 
 # =====================================================================
 # validate_signature
@@ -47,7 +47,8 @@ class MidtransWebhookEndToEndTest(TransactionTestCase):
               sebagai lapis pertahanan kedua; pemicu utama tetap ditentukan
               di view.
 
-        MidtransWebhookView.post(), cabang else (is_paid False):
+        apply_midtrans_notification() (dipanggil MidtransWebhookView.post()),
+        cabang else (is_paid False):
             - reverse_stock() selalu dipanggil (guard reduced_stock internal
               menentukan apakah benar-benar restore atau no-op).
             - release_reservation() hanya dipanggil kalau new_status
@@ -87,6 +88,14 @@ class MidtransWebhookEndToEndTest(TransactionTestCase):
         self.mock_service_logger_error = self.service_logger_error_patcher.start()
         self.addCleanup(self.service_logger_error_patcher.stop)
 
+        for target in (
+            "order.services.webhook_events.logger",
+            "order.services.webhook_events.logger_error",
+        ):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
         self.location_fields = set_location_fields()
         self.user = set_user()
         self.shipping_address = set_address(self.user, *self.location_fields)
@@ -587,7 +596,7 @@ class MidtransWebhookEndToEndTest(TransactionTestCase):
         order.refresh_from_db()
         self.assertEqual(order.payment_status, "pending")  # tidak berubah sama sekali
 
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_reverse_stock_excludes_items_with_completed_refund(self, mock_email):
         """
         Test: order 2 item, salah satu sudah punya RefundRequest COMPLETED
@@ -642,7 +651,7 @@ class MidtransWebhookEndToEndTest(TransactionTestCase):
         self.assertEqual(stock_a_before, 10)
         self.assertEqual(stock_b_before, 7)
         
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_release_reservation_excludes_items_with_completed_refund(self, mock_email):
         """
         Test: order 2 item, salah satu sudah punya RefundRequest COMPLETED
@@ -690,7 +699,7 @@ class MidtransWebhookEndToEndTest(TransactionTestCase):
         self.assertEqual(reserved_stock_a_before, 0)
         self.assertEqual(reserved_stock_b_before, 3)
         
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_reverse_stock_noop_when_all_items_already_refunded(self, mock_email):
         """
         Test: order sudah paid+reduced_stock True, SEMUA item sudah di-refund
@@ -749,7 +758,7 @@ class MidtransWebhookEndToEndTest(TransactionTestCase):
         self.assertEqual(stock_a_before, 10)
         self.assertEqual(stock_b_before, 10)
         
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_release_reservation_noop_when_all_items_already_refunded(self, mock_email):
         """
         Test: order pending, SEMUA item sudah di-refund (COMPLETED) sebelum
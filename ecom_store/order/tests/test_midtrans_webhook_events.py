@@ -0,0 +1,228 @@
+import hashlib
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from order.models import MidtransWebhookEvent, Order, OrderItem
+from order.tasks import process_midtrans_events
+from product.models import Product
+from rest_framework.test import APIClient
+
+from .helper_setup import set_location_fields, set_store, set_user
+
+
+class MidtransWebhookEventBase(TestCase):
+    WEBHOOK_URL = reverse("midtrans_webhook")
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+        cls.user = set_user()
+        cls.store = set_store(*set_location_fields())
+        cls.product = Product.objects.order_by("id").first()
+
+    def setUp(self):
+        self.client = APIClient()
+        for target in (
+            "order.views_order_process.logger",
+            "order.views_order_process.logger_error",
+            "order.services.midtrans.logger",
+            "order.services.midtrans.logger_error",
+            "order.services.webhook_events.logger",
+            "order.services.webhook_events.logger_error",
+        ):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        Product.objects.filter(pk=self.product.pk).update(stock=10, reserved_stock=2)
+        self.order = Order.objects.create(user=self.user, store=self.store)
+        OrderItem.objects.create(
+            order=self.order,
+            product=self.product,
+            product_price=self.product.price,
+            qty=2,
+        )
+
+    def _signed_payload(self, transaction_status, transaction_id="trx-1"):
+        order_id, status_code, gross_amount = str(self.order.order_id), "200", "20000"
+        raw = f"{order_id}{status_code}{gross_amount}{settings.MIDTRANS_SERVER_KEY}"
+        return json.dumps(
+            {
+                "order_id": order_id,
+                "transaction_id": transaction_id,
+                "status_code": status_code,
+                "gross_amount": gross_amount,
+                "signature_key": hashlib.sha512(raw.encode()).hexdigest(),
+                "transaction_status": transaction_status,
+            }
+        ).encode()
+
+    def _post(self, body):
+        return self.client.post(
+            self.WEBHOOK_URL, data=body, content_type="application/json"
+        )
+
+    def _event(self, transaction_status="settlement"):
+        return MidtransWebhookEvent.objects.get(
+            order_id=str(self.order.order_id), transaction_status=transaction_status
+        )
+
+
+class MidtransWebhookEventTest(MidtransWebhookEventBase):
+    """
+    Integration test event log webhook Midtrans: delivery ulang untuk event
+    yang sudah processed dijawab 200 tanpa query ke Order, sedangkan event
+    yang gagal diproses ulang saat Midtrans retry / di-replay.
+    """
+
+    def test_first_delivery_is_processed_and_logged(self):
+        body = self._signed_payload("settlement")
+
+        response = self._post(body)
+
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, Order.PaymentStatus.PAID)
+
+        event = self._event()
+        self.assertEqual(event.status, MidtransWebhookEvent.Status.PROCESSED)
+        self.assertEqual(event.attempts, 1)
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(event.payload, json.loads(body))
+
+    def test_duplicate_delivery_does_not_touch_order(self):
+        body = self._signed_payload("settlement")
+        self._post(body)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post(body)
+
+        self.assertEqual(response.status_code, 200)
+        sqls = [query["sql"] for query in ctx.captured_queries]
+        self.assertEqual(len(sqls), 1)
+        self.assertFalse(any(Order._meta.db_table in sql for sql in sqls))
+        self.assertEqual(self._event().attempts, 1)
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved_stock), (8, 0))
+
+    def test_new_transaction_status_is_not_a_duplicate(self):
+        self._post(self._signed_payload("settlement"))
+
+        response = self._post(self._signed_payload("cancel"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(MidtransWebhookEvent.objects.count(), 2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, Order.PaymentStatus.FAILED)
+
+    def test_failed_event_is_reprocessed_on_retry(self):
+        body = self._signed_payload("settlement")
+        with patch(
+            "order.services.midtrans.WebhookMidtrans.reduce_stock",
+            side_effect=RuntimeError("db down"),
+        ):
+            self.assertEqual(self._post(body).status_code, 500)
+        self.assertEqual(self._event().status, MidtransWebhookEvent.Status.FAILED)
+
+        response = self._post(body)
+
+        self.assertEqual(response.status_code, 200)
+        event = self._event()
+        self.assertEqual(event.status, MidtransWebhookEvent.Status.PROCESSED)
+        self.assertEqual(event.attempts, 2)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.reduced_stock)
+
+    def test_replay_command_redelivers_failed_events(self):
+        body = self._signed_payload("settlement")
+        with patch(
+            "order.services.midtrans.WebhookMidtrans.reduce_stock",
+            side_effect=RuntimeError("db down"),
+        ):
+            self._post(body)
+
+        out = StringIO()
+        call_command("replay_midtrans_webhooks", stdout=out)
+
+        self.assertIn("-> 200", out.getvalue())
+        self.assertEqual(self._event().status, MidtransWebhookEvent.Status.PROCESSED)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.reduced_stock)
+
+
+@override_settings(MIDTRANS_WEBHOOK_ASYNC=True)
+class MidtransWebhookAsyncTest(MidtransWebhookEventBase):
+    """
+    Mode MIDTRANS_WEBHOOK_ASYNC: view hanya menyimpan event dan enqueue
+    task, transisi status diterapkan worker sesuai urutan event per order.
+    """
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch("order.views_order_process.process_midtrans_events.delay")
+        self.mock_delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_view_acknowledges_without_touching_order(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post(self._signed_payload("settlement"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            any(Order._meta.db_table in query["sql"] for query in ctx.captured_queries)
+        )
+        self.mock_delay.assert_called_once_with(str(self.order.order_id))
+        self.assertEqual(self._event().status, MidtransWebhookEvent.Status.RECEIVED)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, Order.PaymentStatus.PENDING)
+
+    def test_worker_applies_events_in_arrival_order(self):
+        # settlement lalu cancel masuk sebelum worker sempat jalan
+        for status in ("settlement", "cancel"):
+            self._post(self._signed_payload(status))
+
+        stats = process_midtrans_events(str(self.order.order_id))
+
+        self.assertEqual(stats, {"processed": 2, "failed": 0})
+        self.order.refresh_from_db()
+        # paid -> failed (reversal), stok yang sudah dikurangi dikembalikan
+        self.assertEqual(self.order.payment_status, Order.PaymentStatus.FAILED)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved_stock), (10, 0))
+
+    def test_worker_for_unknown_order_marks_event_failed(self):
+        payload = json.loads(self._signed_payload("settlement"))
+        payload["order_id"] = "bukan-uuid"
+        MidtransWebhookEvent.objects.create(
+            order_id="bukan-uuid", transaction_status="settlement", payload=payload
+        )
+
+        stats = process_midtrans_events("bukan-uuid")
+
+        self.assertEqual(stats, {"processed": 0, "failed": 1})
+
+    def test_failed_event_is_requeued_on_retry(self):
+        body = self._signed_payload("settlement")
+        self._post(body)
+        with patch(
+            "order.services.midtrans.WebhookMidtrans.reduce_stock",
+            side_effect=RuntimeError("db down"),
+        ):
+            process_midtrans_events(str(self.order.order_id))
+        self.assertEqual(self._event().status, MidtransWebhookEvent.Status.FAILED)
+
+        self.assertEqual(self._post(body).status_code, 200)
+        self.assertEqual(self._event().status, MidtransWebhookEvent.Status.RECEIVED)
+        process_midtrans_events(str(self.order.order_id))
+
+        self.assertEqual(self._event().status, MidtransWebhookEvent.Status.PROCESSED)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.reduced_stock)
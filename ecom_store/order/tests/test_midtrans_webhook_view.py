@@ -89,7 +89,7 @@ class MidtransWebhookViewTests(TestCase):
 
         self.assertEqual(response.status_code, 404)
 
-    @patch("order.views_order_process.logger_error")
+    @patch("order.services.webhook_events.logger_error")
     @patch("order.views_order_process.WebhookMidtrans")
     def test_change_payment_status_generic_exception_returns_500(
         self, mock_webhook_class, mock_logger_error
@@ -152,7 +152,7 @@ class MidtransWebhookViewTests(TestCase):
         mock_instance.reverse_stock.assert_called_once()
         mock_instance.reduce_stock.assert_not_called()
 
-    @patch("order.views_order_process.logger_error")
+    @patch("order.services.webhook_events.logger_error")
     @patch("order.views_order_process.WebhookMidtrans")
     def test_reduce_stock_exception_returns_500(
         self, mock_webhook_class, mock_logger_error
@@ -176,7 +176,7 @@ class MidtransWebhookViewTests(TestCase):
         self.assertEqual(response.status_code, 500)
         mock_logger_error.critical.assert_called_once()
 
-    @patch("order.views_order_process.logger_error")
+    @patch("order.services.webhook_events.logger_error")
     @patch("order.views_order_process.WebhookMidtrans")
     def test_reverse_stock_exception_returns_500(
         self, mock_webhook_class, mock_logger_error
@@ -257,7 +257,7 @@ class MidtransWebhookViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         mock_instance.release_reservation.assert_not_called()
 
-    @patch("order.views_order_process.logger_error")
+    @patch("order.services.webhook_events.logger_error")
     @patch("order.views_order_process.WebhookMidtrans")
     def test_release_reservation_exception_returns_500(
         self, mock_webhook_class, mock_logger_error
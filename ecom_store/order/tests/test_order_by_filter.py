@@ -1,3 +1,6 @@
+import base64
+import json
+
 from django.core.management import call_command
 from django.test import TransactionTestCase
 from django.urls import reverse
@@ -214,7 +217,7 @@ class GetOrderByFilterIntegrationTest(TransactionTestCase):
         """
         Test: order item dengan order.shipping = None tidak boleh muncul,
         walau status dan payment_status-nya cocok dengan filter.
-        Ini membuktikan .exclude(order__shipping__isnull=True) benar-benar
+        Ini membuktikan filter order__shipping__isnull=False benar-benar
         jalan, bukan cuma lolos karena kebetulan filter lain menyaring duluan.
         """
         self.client.force_authenticate(self.user)
@@ -231,3 +234,71 @@ class GetOrderByFilterIntegrationTest(TransactionTestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data), 0)
+
+    def test_keyset_pagination_walks_history_without_gaps(self):
+        """
+        Test: page_size mengaktifkan cursor pagination (created_at, id) terbaru dulu.
+        Assert: semua item muncul tepat sekali lewat link "next", urut dari yang
+        terbaru, dan halaman terakhir tidak punya "next".
+        """
+        self.client.force_authenticate(self.user)
+
+        items = [
+            self._create_order_item(
+                self.user, Order.Status.SHIPPED, Order.PaymentStatus.PAID
+            )
+            for _ in range(5)
+        ]
+        # created_at kembar, urutan ditentukan tie-breaker id
+        OrderItem.objects.update(created_at=items[0].created_at)
+
+        response = self.client.get(
+            self.url, {"status": Order.Status.SHIPPED, "page_size": 2}
+        )
+        pages = [response.data]
+        while pages[-1]["next"]:
+            pages.append(self.client.get(pages[-1]["next"]).data)
+
+        self.assertEqual([len(page["results"]) for page in pages], [2, 2, 1])
+        order_ids = [row["order_id"] for page in pages for row in page["results"]]
+        self.assertEqual(
+            order_ids, [str(item.order.order_id) for item in reversed(items)]
+        )
+
+    def test_order_item_copies_user_from_order(self):
+        """
+        Test: OrderItem dibuat tanpa user (lewat save()).
+        Assert: user diisi dari order.user, karena listing riwayat memfilter
+        OrderItem.user langsung (index orderitem_user_created_idx).
+        """
+        item = self._create_order_item(
+            self.user, Order.Status.SHIPPED, Order.PaymentStatus.PAID
+        )
+
+        self.assertEqual(item.user_id, item.order.user_id)
+
+    def test_invalid_cursor_returns_400(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(
+            self.url, {"status": Order.Status.SHIPPED, "cursor": "bukan-cursor"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_with_bad_values_returns_400(self):
+        """
+        Test: cursor valid base64/JSON dengan panjang yang benar, tapi nilainya
+        bukan (created_at, id).
+        Assert: 400 di field cursor, bukan 500 dari query.
+        """
+        self.client.force_authenticate(self.user)
+        cursor = base64.urlsafe_b64encode(json.dumps(["x", "y"]).encode()).decode()
+
+        response = self.client.get(
+            self.url,
+            {"status": Order.Status.SHIPPED, "page_size": 2, "cursor": cursor},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cursor", response.data)
@@ -258,3 +258,23 @@ class GetOrderDetailIntegrationTest(TransactionTestCase):
         response = self.client.get(self._detail_url(order.order_id))
 
         self.assertEqual(response.status_code, 404)
+
+    def test_get_query_count_does_not_grow_with_items(self):
+        """
+        Test: detail order diambil dengan 1 query order + shipping dan
+        1 query prefetch item + produk, berapapun jumlah itemnya.
+        """
+        self.client.force_authenticate(self.user)
+
+        for item_count in (1, 5):
+            order, items = self._create_order_with_items(
+                self.user, item_count=item_count
+            )
+
+            with self.assertNumQueries(2):
+                response = self.client.get(self._detail_url(order.order_id))
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["items"]), item_count)
+            self.assertEqual(response.data["shipping"]["shipping_name"], "JNE")
+            self.assertNotIn("order_id", response.data["items"][0])
@@ -0,0 +1,142 @@
+from unittest.mock import Mock, patch
+
+from config import perf
+from config.perf import Histogram, RequestMetrics
+from config.providers import build_session
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .helper_setup import LOCMEM_CACHES
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, PERF_ENABLED=True, PERF_METRICS_TOKEN="rahasia"
+)
+class PerfMiddlewareTest(TestCase):
+    """
+    PerfMiddleware: tiap request menghasilkan record event_type=perf,
+    masuk histogram /metrics/, dan (saat DEBUG) header Server-Timing.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+
+    def setUp(self):
+        # registry baru per test
+        patcher = patch("config.perf._registry", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _metrics(self, token="rahasia"):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        return self.client.get(reverse("perf_metrics"), headers=headers)
+
+    @patch("config.perf.logger")
+    def test_logs_perf_record_with_query_count(self, mock_logger):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(reverse("product"))
+
+        self.assertEqual(res.status_code, 200)
+        mock_logger.info.assert_called_once()
+        args, kwargs = mock_logger.info.call_args
+        extra = kwargs["extra"]
+        self.assertEqual(args[0], "GET product 200")
+        self.assertEqual(extra["event_type"], "perf")
+        self.assertEqual(extra["view"], "product")
+        self.assertEqual(extra["db_queries"], len(ctx.captured_queries))
+        self.assertGreater(extra["render_ms"], 0)
+        self.assertGreaterEqual(extra["duration_ms"], extra["db_ms"])
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_header_in_debug(self):
+        res = self.client.get(reverse("product"))
+
+        timing = res["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", render;dur=')
+        self.assertIn("total;dur=", timing)
+
+    def test_no_server_timing_header_without_debug(self):
+        res = self.client.get(reverse("product"))
+
+        self.assertNotIn("Server-Timing", res)
+
+    def test_metrics_endpoint_exposes_histograms(self):
+        self.client.get(reverse("product"))
+        self.client.get(reverse("product"))
+
+        res = self._metrics()
+
+        self.assertEqual(res.status_code, 200)
+        body = res.content.decode()
+        self.assertIn(
+            'http_requests_total{view="product",method="GET",status="200"} 2', body
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="product",method="GET",le="+Inf"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_request_db_queries_count{view="product",method="GET"} 2', body
+        )
+        # scrape /metrics/ sendiri tidak ikut dihitung
+        self.assertNotIn("perf_metrics", body)
+
+    def test_metrics_endpoint_requires_token(self):
+        self.assertEqual(self._metrics(token=None).status_code, 403)
+        self.assertEqual(self._metrics(token="salah").status_code, 403)
+
+    @override_settings(PERF_ENABLED=False)
+    def test_disabled_middleware_records_nothing(self):
+        with patch("config.perf.logger") as mock_logger:
+            res = self.client.get(reverse("product"))
+
+        self.assertNotIn("Server-Timing", res)
+        mock_logger.info.assert_not_called()
+        self.assertEqual(self._metrics().status_code, 404)
+
+
+@override_settings(PERF_ENABLED=True)
+class ProviderTimingTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch("config.perf._registry", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("requests.Session.request", return_value=Mock(status_code=200))
+    def test_provider_time_is_added_to_current_request(self, mock_request):
+        session = build_session(
+            (1, 1), retries=0, backoff=0, pool_size=1, name="rajaongkir_delivery"
+        )
+        metrics = RequestMetrics()
+        token = perf._current.set(metrics)
+        try:
+            session.get("https://example.test/cost")
+            session.get("https://example.test/cost")
+        finally:
+            perf._current.reset(token)
+
+        self.assertEqual(list(metrics.provider_time), ["rajaongkir_delivery"])
+        self.assertEqual(perf.get_registry().providers["rajaongkir_delivery"].count, 2)
+        # timeout default session tetap diteruskan
+        self.assertEqual(mock_request.call_args.kwargs["timeout"], (1, 1))
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram((0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        lines = list(histogram.lines("x", 'view="v"'))
+
+        self.assertEqual(
+            lines[:3],
+            [
+                'x_bucket{view="v",le="0.1"} 2',
+                'x_bucket{view="v",le="1"} 3',
+                'x_bucket{view="v",le="+Inf"} 4',
+            ],
+        )
+        self.assertEqual(lines[-1], 'x_count{view="v"} 4')
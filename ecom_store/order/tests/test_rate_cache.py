@@ -0,0 +1,261 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from django.test import SimpleTestCase, override_settings
+from order import rate_cache
+from order.utils import RajaOngkirException, fetch_shipping_rates_from_rajaongkir
+
+from .helper_setup import LOCMEM_CACHES
+
+RATES_PAYLOAD = {
+    "meta": {"status": "success"},
+    "data": {
+        "calculate_reguler": [{"shipping_name": "JNE", "shipping_cost_net": 7200}],
+        "calculate_cargo": [],
+        "calculate_instant": [],
+    },
+}
+
+
+class StubRajaOngkirHandler(BaseHTTPRequestHandler):
+    """
+    Stub endpoint /tariff/api/v1/calculate, mencatat query dan port client
+    yang masuk. HTTP/1.1 supaya koneksi keep-alive bisa dipakai ulang.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(parse_qs(urlparse(self.path).query))
+        server.client_ports.append(self.client_address[1])
+
+        status = server.statuses.pop(0) if server.statuses else 200
+        body = json.dumps(server.payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def best_shipping(shippings, is_cod):
+    return shippings[0] if shippings else None
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@patch("order.utils.get_best_shipping", side_effect=best_shipping)
+class ShippingRateCacheTest(SimpleTestCase):
+    """
+    fetch_shipping_rates_from_rajaongkir dijalankan lawan stub server HTTP
+    lokal (bukan mock requests.get), jadi yang diuji termasuk URL, query
+    string, dan parsing response yang sebenarnya.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubRajaOngkirHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.client_ports = []
+        self.server.payload = RATES_PAYLOAD
+        self.server.statuses = []
+        rate_cache.get_cache().clear()
+
+        patcher = override_settings(RAJA_ONGKIR_DELIVERY_BASE_URL=self.base_url)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def params(self, **overrides):
+        params = {
+            "shipper_destination_id": 10,
+            "receiver_destination_id": 20,
+            "weight": 1.23,
+            "item_value": 120_500,
+            "cod": "yes",
+            "origin_pin_point": "-8.58,116.11",
+            "destination_pin_point": "-8.60,116.12",
+        }
+        params.update(overrides)
+        return params
+
+    def test_repeat_quote_for_same_route_does_not_call_upstream(self, _):
+        first = fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+        second = fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first["reguler"]["shipping_name"], "JNE")
+        self.assertEqual(rate_cache.get_stats()["hit"], 1)
+
+    def test_cod_flag_reuses_cached_quote(self, mock_best):
+        """
+        is_cod hanya mempengaruhi pemilihan kurir, bukan request ke
+        RajaOngkir (cod selalu "yes"), jadi quote yang sama dipakai ulang.
+        """
+        fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+        fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=True)
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertIs(mock_best.call_args[0][1], True)
+
+    def test_weight_and_item_value_are_bucketed_upwards(self, _):
+        fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+        fetch_shipping_rates_from_rajaongkir(
+            self.params(weight=1.201, item_value=120_900), is_cod=False
+        )
+
+        self.assertEqual(len(self.server.requests), 1)
+        sent = self.server.requests[0]
+        self.assertEqual(sent["weight"], ["1.3"])
+        self.assertEqual(sent["item_value"], ["121000"])
+
+    def test_different_route_calls_upstream(self, _):
+        fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+        fetch_shipping_rates_from_rajaongkir(
+            self.params(receiver_destination_id=21), is_cod=False
+        )
+        fetch_shipping_rates_from_rajaongkir(
+            self.params(destination_pin_point="-8.70,116.20"), is_cod=False
+        )
+
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_provider_error_is_not_cached(self, _):
+        # 1 request + 2 retry, semuanya 500
+        self.server.statuses = [500, 500, 500]
+
+        with self.assertRaises(RajaOngkirException):
+            fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+
+        self.assertEqual(len(self.server.requests), 3)
+
+        fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_rate_limited_request_is_retried(self, _):
+        self.server.statuses = [429]
+
+        result = fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+
+        self.assertEqual(result["reguler"]["shipping_name"], "JNE")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_connection_is_reused_between_calls(self, _):
+        fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+        fetch_shipping_rates_from_rajaongkir(
+            self.params(receiver_destination_id=21), is_cod=False
+        )
+
+        self.assertEqual(len(self.server.requests), 2)
+        # port client sama = satu koneksi TCP keep-alive, tanpa handshake ulang
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+    @patch("order.rate_cache.logger")
+    def test_cache_unavailable_falls_back_to_upstream(self, mock_logger, _):
+        with patch.object(
+            rate_cache.get_cache(), "get", side_effect=ConnectionError("redis down")
+        ):
+            result = fetch_shipping_rates_from_rajaongkir(self.params(), is_cod=False)
+
+        self.assertEqual(result["reguler"]["shipping_name"], "JNE")
+        self.assertEqual(len(self.server.requests), 1)
+        mock_logger.warning.assert_called_once()
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SHIPPING_RATE_LOCK_TIMEOUT=5)
+class ShippingRateSingleFlightTest(SimpleTestCase):
+    """
+    Request identik yang datang bersamaan (cache masih kosong) hanya boleh
+    memanggil upstream sekali; sisanya menunggu hasil leader.
+    """
+
+    PARAMS = {"shipper_destination_id": 1, "receiver_destination_id": 2}
+
+    def setUp(self):
+        rate_cache.get_cache().clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def slow_loader(self, result=None, error=None):
+        def loader(params):
+            with self.calls_lock:
+                self.calls += 1
+            # tahan leader supaya request lain pasti datang saat lock dipegang
+            time.sleep(0.3)
+            if error is not None:
+                raise error
+            return result
+
+        return loader
+
+    def run_concurrently(self, loader, workers=8):
+        results, errors = [], []
+        barrier = threading.Barrier(workers)
+
+        def worker():
+            barrier.wait()
+            try:
+                results.append(rate_cache.read_through(self.PARAMS, loader))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_identical_concurrent_requests_call_upstream_once(self):
+        results, errors = self.run_concurrently(self.slow_loader({"rates": 1}))
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{"rates": 1}] * 8)
+
+        stats = rate_cache.get_stats()
+        self.assertEqual(stats["miss"], 1)
+        self.assertEqual(stats["coalesced"], 7)
+        self.assertEqual(stats["coalescing_ratio"], 0.875)
+
+    def test_followers_share_leader_failure(self):
+        results, errors = self.run_concurrently(
+            self.slow_loader(error=RajaOngkirException("Shipping provider timeout."))
+        )
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 8)
+        followers = [e for e in errors if isinstance(e, rate_cache.CoalescedFailure)]
+        self.assertEqual(len(followers), 7)
+        self.assertEqual(str(followers[0]), "Shipping provider timeout.")
+
+    def test_follower_fetches_itself_when_leader_disappears(self):
+        cache = rate_cache.get_cache()
+        lock_key = rate_cache._lock_key(rate_cache.build_key(self.PARAMS))
+        # lock yatim dari worker yang mati, habis sebelum hasil ada
+        cache.set(lock_key, 1, timeout=0.2)
+
+        result = rate_cache.read_through(self.PARAMS, lambda params: {"rates": 2})
+
+        self.assertEqual(result, {"rates": 2})
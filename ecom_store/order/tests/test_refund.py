@@ -3,13 +3,17 @@ from unittest.mock import patch
 from django.urls import reverse
 from django.test import TestCase
 from django.utils import timezone
+from django.core import mail
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from datetime import timedelta
 from order.models import Order, OrderItem, OrderShipping
 from product.models import Product, Category
-from order.services.refund import RefundService
+from order.services.refund import BulkRefundService, RefundService
+from order.tasks import send_refund_status_emails
 from order.models import RefundRequest
 
 from .helper_setup import set_location_fields, set_user, set_store, set_store_shipping_option
@@ -159,7 +163,7 @@ class RefundServiceCompleteTests(RefundTestBase):
         self.refund_request.status = RefundRequest.Status.APPROVED
         self.refund_request.save(update_fields=["status"])
 
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_fails_when_status_not_approved(self, mock_email):
         """
         Test: complete() dipanggil saat RefundRequest masih REQUESTED.
@@ -168,14 +172,15 @@ class RefundServiceCompleteTests(RefundTestBase):
         self.refund_request.status = RefundRequest.Status.REQUESTED
         self.refund_request.save(update_fields=["status"])
 
-        with self.assertRaises(ValidationError):
-            RefundService(self.refund_request).complete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValidationError):
+                RefundService(self.refund_request).complete()
 
         self.refund_request.refresh_from_db()
         self.assertEqual(self.refund_request.status, RefundRequest.Status.REQUESTED)
         mock_email.delay.assert_not_called()
 
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_fails_when_order_status_invalid(self, mock_email):
         """
         Test: Order.status di luar [PENDING, PROCESSING, SHIPPED, DELIVERED].
@@ -187,14 +192,15 @@ class RefundServiceCompleteTests(RefundTestBase):
         """
         Order.objects.filter(pk=self.order.pk).update(status="unknown_status")
 
-        with self.assertRaises(ValidationError):
-            RefundService(self.refund_request).complete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValidationError):
+                RefundService(self.refund_request).complete()
 
         self.refund_request.refresh_from_db()
         self.assertEqual(self.refund_request.status, RefundRequest.Status.APPROVED)
         mock_email.delay.assert_not_called()
 
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_fails_when_payment_failed(self, mock_email):
         """
         Test: Order.payment_status FAILED (pembayaran gagal/reversal).
@@ -203,8 +209,9 @@ class RefundServiceCompleteTests(RefundTestBase):
         self.order.payment_status = Order.PaymentStatus.FAILED
         self.order.save(update_fields=["payment_status"])
 
-        with self.assertRaises(ValidationError):
-            RefundService(self.refund_request).complete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValidationError):
+                RefundService(self.refund_request).complete()
 
         self.refund_request.refresh_from_db()
         self.assertEqual(self.refund_request.status, RefundRequest.Status.APPROVED)
@@ -212,7 +219,7 @@ class RefundServiceCompleteTests(RefundTestBase):
 
     @patch("order.services.refund.send_refund_anomaly_email")
     @patch("order.services.refund.logger_error")
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_fails_when_paid_but_not_reduced_stock_anomaly(
         self, mock_status_email, mock_logger_error, mock_anomaly_email
     ):
@@ -225,8 +232,9 @@ class RefundServiceCompleteTests(RefundTestBase):
         self.order.reduced_stock = False
         self.order.save(update_fields=["payment_status", "reduced_stock"])
     
-        with self.assertRaises(ValidationError):
-            RefundService(self.refund_request).complete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValidationError):
+                RefundService(self.refund_request).complete()
     
         self.refund_request.refresh_from_db()
         self.assertEqual(self.refund_request.status, RefundRequest.Status.APPROVED)
@@ -235,7 +243,7 @@ class RefundServiceCompleteTests(RefundTestBase):
         mock_anomaly_email.delay.assert_called_once_with(self.order.id, self.refund_request.id)
         mock_status_email.delay.assert_not_called()
     
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_success_restores_stock_when_reduced_stock_true(self, mock_email):
         """
         Test: happy path, stock sudah pernah dikurangi (reduced_stock=True).
@@ -248,7 +256,9 @@ class RefundServiceCompleteTests(RefundTestBase):
         stock_before = self.product.stock
         reserved_before = self.product.reserved_stock
 
-        RefundService(self.refund_request).complete()
+        # email dikirim lewat on_commit
+        with self.captureOnCommitCallbacks(execute=True):
+            RefundService(self.refund_request).complete()
 
         self.refund_request.refresh_from_db()
         self.product.refresh_from_db()
@@ -257,9 +267,9 @@ class RefundServiceCompleteTests(RefundTestBase):
         self.assertIsNotNone(self.refund_request.completed_at)
         self.assertEqual(self.product.stock, stock_before + self.order_item.qty)
         self.assertEqual(self.product.reserved_stock, reserved_before)
-        mock_email.delay.assert_called_once_with(self.refund_request.id)
+        mock_email.delay.assert_called_once_with([self.refund_request.id])
 
-    @patch("order.services.refund.send_refund_status_email")
+    @patch("order.services.refund.send_refund_status_emails")
     def test_success_releases_reserved_when_reduced_stock_false(self, mock_email):
         """
         Test: happy path, stock belum pernah dikurangi (reduced_stock=False, belum PAID).
@@ -273,7 +283,9 @@ class RefundServiceCompleteTests(RefundTestBase):
         stock_before = self.product.stock
         reserved_before = self.product.reserved_stock
 
-        RefundService(self.refund_request).complete()
+        # email dikirim lewat on_commit
+        with self.captureOnCommitCallbacks(execute=True):
+            RefundService(self.refund_request).complete()
 
         self.refund_request.refresh_from_db()
         self.product.refresh_from_db()
@@ -281,12 +293,59 @@ class RefundServiceCompleteTests(RefundTestBase):
         self.assertEqual(self.refund_request.status, RefundRequest.Status.COMPLETED)
         self.assertEqual(self.product.stock, stock_before)
         self.assertEqual(self.product.reserved_stock, reserved_before - self.order_item.qty)
-        mock_email.delay.assert_called_once_with(self.refund_request.id)
+        mock_email.delay.assert_called_once_with([self.refund_request.id])
+
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_locks_order_before_refund_request_and_item(self, mock_email):
+        """
+        Test: urutan lock complete() tunggal (lewat BulkRefundService).
+        Assert: Order di-SELECT (FOR UPDATE) sebelum RefundRequest + OrderItem,
+        supaya complete tunggal dan bulk tidak saling deadlock.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            RefundService(self.refund_request).complete()
+
+        selects = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+        order_lock = next(
+            i for i, sql in enumerate(selects) if 'FROM "order_order"' in sql
+        )
+        # SELECT refund pertama hanya membaca (pk, order_id) untuk batching;
+        # yang di-lock adalah SELECT baris penuh RefundRequest + OrderItem
+        refund_lock = next(
+            i
+            for i, sql in enumerate(selects)
+            if '"order_refundrequest"."account_holder_name"' in sql
+        )
+        self.assertLess(order_lock, refund_lock)
+
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_status_is_rechecked_under_lock(self, mock_email):
+        """
+        Test: instance yang dipegang caller masih APPROVED, tapi di DB refund
+        sudah COMPLETED (complete lain selesai duluan).
+        Assert: raise ValidationError, stok tidak dikembalikan dua kali.
+        """
+        RefundRequest.objects.filter(pk=self.refund_request.pk).update(
+            status=RefundRequest.Status.COMPLETED
+        )
+        stock = Product.objects.get(pk=self.product.pk).stock
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValidationError):
+                RefundService(self.refund_request).complete()
+
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, stock)
+        mock_email.delay.assert_not_called()
 
 
 # =====================================================================
 # 4. create (lewat RefundRequestCreateView)
 # =====================================================================
+
 class RefundRequestCreateViewTests(APITestCase):
 
     def setUp(self):
@@ -421,6 +480,28 @@ class RefundRequestCreateViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(RefundRequest.objects.filter(order_item=self.order_item).count(), 1)
 
+    def test_active_refund_check_reads_annotation(self):
+        """
+        Test: order_item sudah punya refund aktif.
+        Assert: item, order, dan status refund aktif dibaca dalam satu query
+        (with_refund_state), bukan query terpisah per pengecekan.
+        """
+        RefundRequest.objects.create(
+            order_item=self.order_item,
+            amount=self.order_item.subtotal,
+            reason=RefundRequest.Reason.CUSTOMER_CANCEL,
+            destination_type=RefundRequest.DestinationType.BANK,
+            destination_provider=RefundRequest.Provider.BCA,
+            destination_number="1234567890",
+            account_holder_name="Customer Satu",
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, self.valid_payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("order_item", response.data)
+
     def test_create_fails_when_bank_provider_invalid_for_destination_type(self):
         """
         Test: destination_type BANK tapi destination_provider GOPAY (bukan bank).
@@ -585,4 +666,174 @@ class RefundRequestByItemViewTests(APITestCase):
 
         response = self.client.get(reverse("refund_request_by_item", args=[other_item.id]))
 
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+# =====================================================================
+# 5. BulkRefundService (bulk action admin)
+# =====================================================================
+class BulkRefundServiceTests(RefundTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.order.payment_status = Order.PaymentStatus.PAID
+        self.order.save(update_fields=["payment_status"])
+
+    def _refund(self, order, product=None, qty=1, status=RefundRequest.Status.APPROVED):
+        order_item = OrderItem.objects.create(
+            order=order,
+            product=product or self.product,
+            product_price=self.product.price,
+            qty=qty,
+        )
+        return RefundRequest.objects.create(
+            order_item=order_item,
+            amount=order_item.subtotal,
+            reason=RefundRequest.Reason.RETURN,
+            status=status,
+            destination_type=RefundRequest.DestinationType.BANK,
+            destination_provider=RefundRequest.Provider.BCA,
+            destination_number="1234567890",
+            account_holder_name="Customer Satu",
+        )
+
+    def _paid_order(self, reduced_stock=True):
+        order = self._create_order(order_status=Order.Status.DELIVERED)
+        Order.objects.filter(pk=order.pk).update(reduced_stock=reduced_stock)
+        return order
+
+    def _statuses(self, refund_requests):
+        return list(
+            RefundRequest.objects.filter(pk__in=[r.pk for r in refund_requests])
+            .order_by("pk")
+            .values_list("status", flat=True)
+        )
+
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_complete_aggregates_stock_and_sends_one_email_per_customer(self, mock_email):
+        """
+        Test: 4 refund di 2 order milik customer yang sama, produk berulang.
+        Assert: semua COMPLETED, stock bertambah total qty, satu task email.
+        """
+        other_order = self._paid_order()
+        refunds = [
+            self._refund(self.order, qty=2),
+            self._refund(self.order, qty=3),
+            self._refund(other_order, qty=1),
+            self._refund(other_order, qty=4),
+        ]
+
+        # email dikirim lewat on_commit
+        with self.captureOnCommitCallbacks(execute=True):
+            results = BulkRefundService([r.pk for r in refunds]).complete()
+
+        self.assertEqual(set(results.values()), {BulkRefundService.OK})
+        self.assertEqual(self._statuses(refunds), [RefundRequest.Status.COMPLETED] * 4)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 20)
+        mock_email.delay.assert_called_once_with(sorted(r.pk for r in refunds))
+
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_complete_query_count_does_not_grow_with_refunds(self, mock_email):
+        def run(count):
+            refunds = [self._refund(self._paid_order()) for _ in range(count)]
+            service = BulkRefundService([r.pk for r in refunds])
+            with CaptureQueriesContext(connection) as ctx:
+                service.complete()
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(2), run(10))
+
+    @patch("order.services.refund.send_refund_anomaly_email")
+    @patch("order.services.refund.logger_error")
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_complete_reports_per_item_failures(
+        self, mock_email, mock_logger_error, mock_anomaly_email
+    ):
+        """
+        Test: satu refund masih REQUESTED, satu order anomali (PAID tapi
+        reduced_stock False), satu order valid.
+        Assert: yang valid tetap COMPLETED, sisanya dapat alasan masing-masing.
+        """
+        not_approved = self._refund(self.order, status=RefundRequest.Status.REQUESTED)
+        anomaly_order = self._paid_order(reduced_stock=False)
+        anomalies = [self._refund(anomaly_order), self._refund(anomaly_order)]
+        ok = self._refund(self.order)
+
+        # email dikirim lewat on_commit
+        with self.captureOnCommitCallbacks(execute=True):
+            results = BulkRefundService(
+                [not_approved.pk, ok.pk, 999_999] + [r.pk for r in anomalies]
+            ).complete()
+
+        self.assertEqual(results[ok.pk], BulkRefundService.OK)
+        self.assertIn("APPROVED", results[not_approved.pk])
+        self.assertIn("anomali", results[anomalies[0].pk])
+        self.assertIn("tidak ditemukan", results[999_999])
+        self.assertEqual(
+            self._statuses(anomalies), [RefundRequest.Status.APPROVED] * 2
+        )
+        # satu email anomali per order, bukan per refund
+        mock_anomaly_email.delay.assert_called_once_with(
+            anomaly_order.id, anomalies[0].pk
+        )
+        mock_email.delay.assert_called_once_with([ok.pk])
+
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_complete_release_drift_only_fails_that_order(self, mock_email):
+        """
+        Test: dua order pending (reduced_stock False), reserved_stock hanya 2
+        padahal total qty 3.
+        Assert: order yang reservasinya cukup tetap COMPLETED.
+        """
+        first = self._create_order(order_status=Order.Status.PENDING)
+        second = self._create_order(order_status=Order.Status.PENDING)
+        Order.objects.filter(pk__in=[first.pk, second.pk]).update(
+            payment_status=Order.PaymentStatus.PENDING
+        )
+        ok = self._refund(first, qty=2)
+        drifted = self._refund(second, qty=1)
+
+        results = BulkRefundService([ok.pk, drifted.pk]).complete()
+
+        self.assertEqual(results[ok.pk], BulkRefundService.OK)
+        self.assertIn("Stok tidak mencukupi", results[drifted.pk])
+        self.assertEqual(
+            self._statuses([ok, drifted]),
+            [RefundRequest.Status.COMPLETED, RefundRequest.Status.APPROVED],
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_stock, 0)
+
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_approve_groups_emails_per_customer(self, mock_email):
+        other_user = set_user(
+            username="customer2", email="customer2@test.com", phone_number="081111111111"
+        )
+        other_order = Order.objects.create(
+            user=other_user, store=self.store, payment_status=Order.PaymentStatus.PAID
+        )
+        requested = RefundRequest.Status.REQUESTED
+        mine = [self._refund(self.order, status=requested) for _ in range(2)]
+        theirs = self._refund(other_order, status=requested)
+
+        # email dikirim lewat on_commit
+        with self.captureOnCommitCallbacks(execute=True):
+            results = BulkRefundService([r.pk for r in mine + [theirs]]).approve()
+
+        self.assertEqual(set(results.values()), {BulkRefundService.OK})
+        self.assertEqual(
+            self._statuses(mine + [theirs]), [RefundRequest.Status.APPROVED] * 3
+        )
+        self.assertCountEqual(
+            [c.args[0] for c in mock_email.delay.call_args_list],
+            [[r.pk for r in mine], [theirs.pk]],
+        )
+
+    def test_status_digest_email_lists_every_refund(self):
+        refunds = [self._refund(self.order) for _ in range(3)]
+
+        send_refund_status_emails([r.pk for r in refunds])
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        self.assertEqual(mail.outbox[0].body.count("disetujui"), 3)
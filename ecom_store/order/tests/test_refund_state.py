@@ -0,0 +1,145 @@
+from django.db.models import Prefetch
+from order.models import Order, OrderItem, RefundRequest
+
+from .test_refund import RefundTestBase
+
+
+class RefundStateTestBase(RefundTestBase):
+    def _add_item(self, order, qty=1):
+        return OrderItem.objects.create(
+            order=order,
+            product=self.product,
+            product_price=self.product.price,
+            qty=qty,
+        )
+
+    def _refund(self, item, status, reason=RefundRequest.Reason.RETURN):
+        return RefundRequest.objects.create(
+            order_item=item,
+            amount=item.subtotal,
+            reason=reason,
+            status=status,
+            destination_type=RefundRequest.DestinationType.BANK,
+            destination_provider=RefundRequest.Provider.BCA,
+            destination_number="1234567890",
+            account_holder_name="Customer Satu",
+        )
+
+
+class OrderRefundStateTests(RefundStateTestBase):
+    def setUp(self):
+        super().setUp()
+        # setUp dasar sudah punya satu item dengan refund REQUESTED
+        self.item_b = self._add_item(self.order)
+
+    def _annotated(self):
+        return Order.objects.with_refund_state().get(pk=self.order.pk)
+
+    def test_no_completed_refund(self):
+        order = self._annotated()
+
+        self.assertEqual(order.item_count, 2)
+        self.assertEqual(order.refunded_item_count, 0)
+        self.assertIsNone(order.refund_status)
+        self.assertIsNone(self.order.refund_status)
+
+    def test_partially_refunded(self):
+        self._refund(self.item_b, RefundRequest.Status.COMPLETED)
+
+        self.assertEqual(self._annotated().refund_status, "partially_refunded")
+        self.assertEqual(self.order.refund_status, "partially_refunded")
+
+    def test_refunded_counts_item_once(self):
+        self.refund_request.status = RefundRequest.Status.COMPLETED
+        self.refund_request.save()
+        self._refund(self.item_b, RefundRequest.Status.COMPLETED)
+        self._refund(self.item_b, RefundRequest.Status.COMPLETED)
+
+        order = self._annotated()
+
+        self.assertEqual(order.refunded_item_count, 2)
+        self.assertEqual(order.refund_status, "refunded")
+        self.assertEqual(self.order.refund_status, "refunded")
+
+    def test_is_fully_canceled(self):
+        self._refund(
+            self.order_item,
+            RefundRequest.Status.COMPLETED,
+            RefundRequest.Reason.CUSTOMER_CANCEL,
+        )
+        self.assertFalse(self._annotated().is_fully_canceled)
+        self.assertFalse(self.order.is_fully_canceled)
+
+        self._refund(
+            self.item_b,
+            RefundRequest.Status.COMPLETED,
+            RefundRequest.Reason.CUSTOMER_CANCEL,
+        )
+        self.assertTrue(self._annotated().is_fully_canceled)
+        self.assertTrue(self.order.is_fully_canceled)
+
+    def test_return_refund_is_not_cancel(self):
+        self._refund(self.order_item, RefundRequest.Status.COMPLETED)
+        self._refund(
+            self.item_b,
+            RefundRequest.Status.COMPLETED,
+            RefundRequest.Reason.CUSTOMER_CANCEL,
+        )
+
+        self.assertFalse(self._annotated().is_fully_canceled)
+        self.assertFalse(self.order.is_fully_canceled)
+
+
+class OrderItemRefundStateTests(RefundStateTestBase):
+    def _annotated(self, item):
+        return OrderItem.objects.with_refund_state().get(pk=item.pk)
+
+    def test_active_refund(self):
+        item = self._annotated(self.order_item)
+
+        self.assertTrue(item.has_active_refund)
+        self.assertFalse(item.is_refunded)
+        self.assertEqual(item.has_active_refund, self.order_item.has_active_refund)
+
+    def test_completed_refund(self):
+        self.refund_request.status = RefundRequest.Status.COMPLETED
+        self.refund_request.reason = RefundRequest.Reason.CUSTOMER_CANCEL
+        self.refund_request.save()
+
+        item = self._annotated(self.order_item)
+
+        self.assertFalse(item.has_active_refund)
+        self.assertTrue(item.is_refunded)
+        self.assertTrue(item.is_canceled_by_customer)
+        self.assertTrue(self.order_item.is_canceled_by_customer)
+
+
+class RefundStateQueryCountTests(RefundStateTestBase):
+    def _create_orders(self, count, items_per_order):
+        for _ in range(count):
+            order = self._create_order(with_shipping=False)
+            for item in [self._add_item(order) for _ in range(items_per_order)]:
+                self._refund(item, RefundRequest.Status.COMPLETED)
+
+    def test_order_list_constant_queries(self):
+        self._create_orders(count=5, items_per_order=4)
+
+        with self.assertNumQueries(1):
+            badges = [
+                (order.refund_status, order.is_fully_canceled)
+                for order in Order.objects.with_refund_state()
+            ]
+
+        self.assertEqual(len(badges), 6)
+        self.assertIn(("refunded", False), badges)
+
+    def test_prefetched_items_constant_queries(self):
+        self._create_orders(count=5, items_per_order=4)
+        items = Prefetch("items", queryset=OrderItem.objects.with_refund_state())
+
+        with self.assertNumQueries(2):
+            statuses = [
+                order.refund_status for order in Order.objects.prefetch_related(items)
+            ]
+
+        self.assertEqual(statuses.count("refunded"), 5)
@@ -2,8 +2,9 @@ from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
 import requests
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils.timezone import now, timedelta
+from order import rate_cache
 from order.utils import CheckoutExpired, get_best_shipping, get_valid_checkout
 from order.views_order_process import (
     RajaOngkirException,
@@ -13,6 +14,8 @@ from order.views_order_process import (
 from rest_framework.exceptions import NotFound
 from rest_framework.test import APIRequestFactory, force_authenticate
 
+from .helper_setup import LOCMEM_CACHES
+
 
 # =====================================================================
 # get_best_shipping
@@ -181,7 +184,7 @@ class GetValidCheckoutTests(TestCase):
         harus terpanggil untuk mencatat kejadian ini.
         """
         mock_checkout_model.DoesNotExist = type("DoesNotExist", (Exception,), {})
-        mock_checkout_model.objects.select_related.return_value.prefetch_related.return_value.get.side_effect = (
+        mock_checkout_model.objects.select_related.return_value.get.side_effect = (
             mock_checkout_model.DoesNotExist
         )
 
@@ -197,7 +200,7 @@ class GetValidCheckoutTests(TestCase):
         """
         mock_checkout = MagicMock()
         mock_checkout.expires_at = now() - timedelta(minutes=1)
-        mock_checkout_model.objects.select_related.return_value.prefetch_related.return_value.get.return_value = (
+        mock_checkout_model.objects.select_related.return_value.get.return_value = (
             mock_checkout
         )
 
@@ -213,7 +216,7 @@ class GetValidCheckoutTests(TestCase):
         """
         mock_checkout = MagicMock()
         mock_checkout.expires_at = now() + timedelta(minutes=5)
-        mock_checkout_model.objects.select_related.return_value.prefetch_related.return_value.get.return_value = (
+        mock_checkout_model.objects.select_related.return_value.get.return_value = (
             mock_checkout
         )
 
@@ -224,12 +227,16 @@ class GetValidCheckoutTests(TestCase):
 # =====================================================================
 # fetch_shipping_rates_from_rajaongkir
 # =====================================================================
+@override_settings(CACHES=LOCMEM_CACHES)
 class FetchShippingRatesFromRajaongkirTests(TestCase):
 
-    @patch("requests.get")
+    def setUp(self):
+        rate_cache.get_cache().clear()
+
+    @patch("order.utils.rajaongkir_delivery.get")
     def test_raise_rajaongkir_exception_on_timeout(self, mock_get):
         """
-        Test: requests.get lempar requests.Timeout.
+        Test: session.get lempar requests.Timeout.
         Assert: harus raise RajaOngkirException (bukan requests.Timeout mentah),
         supaya caller di view bisa nangkep exception type yang seragam.
         """
@@ -237,17 +244,17 @@ class FetchShippingRatesFromRajaongkirTests(TestCase):
         with self.assertRaises(RajaOngkirException):
             fetch_shipping_rates_from_rajaongkir({}, is_cod=False)
 
-    @patch("requests.get")
+    @patch("order.utils.rajaongkir_delivery.get")
     def test_raise_rajaongkir_exception_on_connection_error(self, mock_get):
         """
-        Test: requests.get lempar requests.ConnectionError.
+        Test: session.get lempar requests.ConnectionError.
         Assert: harus raise RajaOngkirException.
         """
         mock_get.side_effect = requests.ConnectionError()
         with self.assertRaises(RajaOngkirException):
             fetch_shipping_rates_from_rajaongkir({}, is_cod=False)
 
-    @patch("requests.get")
+    @patch("order.utils.rajaongkir_delivery.get")
     def test_raise_rajaongkir_exception_on_http_error(self, mock_get):
         """
         Test: response.raise_for_status() lempar HTTPError (misal status 500 dari RajaOngkir).
@@ -261,7 +268,7 @@ class FetchShippingRatesFromRajaongkirTests(TestCase):
         with self.assertRaises(RajaOngkirException):
             fetch_shipping_rates_from_rajaongkir({}, is_cod=False)
 
-    @patch("requests.get")
+    @patch("order.utils.rajaongkir_delivery.get")
     def test_raise_rajaongkir_exception_on_invalid_json(self, mock_get):
         """
         Test: response.json() gagal parse (ValueError, misal body bukan JSON).
@@ -275,7 +282,7 @@ class FetchShippingRatesFromRajaongkirTests(TestCase):
         with self.assertRaises(RajaOngkirException):
             fetch_shipping_rates_from_rajaongkir({}, is_cod=False)
 
-    @patch("requests.get")
+    @patch("order.utils.rajaongkir_delivery.get")
     def test_raise_rajaongkir_exception_when_meta_status_not_success(self, mock_get):
         """
         Test: response JSON valid tapi meta.status bukan "success" (API RajaOngkir
@@ -294,7 +301,7 @@ class FetchShippingRatesFromRajaongkirTests(TestCase):
             fetch_shipping_rates_from_rajaongkir({}, is_cod=False)
 
     @patch("order.utils.get_best_shipping")
-    @patch("requests.get")
+    @patch("order.utils.rajaongkir_delivery.get")
     def test_return_dict_with_three_shipping_types_on_success(
         self, mock_get, mock_best_shipping
     ):
@@ -327,7 +334,7 @@ class FetchShippingRatesFromRajaongkirTests(TestCase):
         self.assertEqual(mock_best_shipping.call_count, 3)
 
     @patch("order.utils.get_best_shipping")
-    @patch("requests.get")
+    @patch("order.utils.rajaongkir_delivery.get")
     def test_return_none_values_when_data_keys_missing(
         self, mock_get, mock_best_shipping
     ):
@@ -362,11 +369,9 @@ class ShippingRatesViewTests(TestCase):
     def _build_mock_checkout(self):
         """Helper: bikin mock checkout dengan struktur relasi lengkap."""
         checkout = MagicMock()
-        item1 = MagicMock()
-        item1.product.weight = 1000
-        item1.product.price = 50000
-        item1.qty = 2
-        checkout.order.items.all.return_value = [item1]
+        # snapshot dari OrderService: 1 item, berat 1000 g x 2, harga 50000 x 2
+        checkout.order.total_weight = 2000
+        checkout.order.items_subtotal = 100000
         checkout.store.shipping_address.destination_id = "ORIGIN1"
         checkout.store.shipping_address.get_coordinates = "1.0,1.0"
         checkout.destination.destination_id = "DEST1"
@@ -464,25 +469,20 @@ class ShippingRatesViewTests(TestCase):
 
     @patch("order.views_order_process.fetch_shipping_rates_from_rajaongkir")
     @patch("order.views_order_process.get_valid_checkout")
-    def test_calculate_total_weight_and_price_from_multiple_items(
+    def test_use_order_totals_snapshot_for_weight_and_item_value(
         self, mock_get_checkout, mock_fetch
     ):
         """
-        Test: order punya lebih dari 1 item dengan qty berbeda-beda.
-        Assert: params yang dikirim ke fetch_shipping_rates_from_rajaongkir harus
-        berisi total_weight (gram->kg, dibagi 1000) dan total_price hasil
-        penjumlahan seluruh item (weight*qty dan price*qty), bukan cuma item pertama.
+        Test: order punya snapshot total_weight dan items_subtotal (dihitung
+        OrderService saat checkout dari seluruh item).
+        Assert: params yang dikirim ke fetch_shipping_rates_from_rajaongkir
+        memakai snapshot itu (berat gram->kg, dibagi 1000), tanpa iterasi
+        order.items sama sekali.
         """
         checkout = self._build_mock_checkout()
-        item1 = MagicMock()
-        item1.product.weight = 1000
-        item1.product.price = 50000
-        item1.qty = 2
-        item2 = MagicMock()
-        item2.product.weight = 500
-        item2.product.price = 20000
-        item2.qty = 1
-        checkout.order.items.all.return_value = [item1, item2]
+        # (1000*2 + 500*1) gram, 50000*2 + 20000*1
+        checkout.order.total_weight = 2500
+        checkout.order.items_subtotal = 120000
         mock_get_checkout.return_value = checkout
         mock_fetch.return_value = {"reguler": None, "cargo": None, "instant": None}
 
@@ -493,10 +493,9 @@ class ShippingRatesViewTests(TestCase):
         ShippingRates.as_view()(request)
 
         called_params = mock_fetch.call_args[0][0]
-        # total_weight = (1000*2 + 500*1) / 1000 = 2.5 kg
-        # self.assertEqual(called_params["weight"], 2.5)
-        # total_price = 50000*2 + 20000*1 = 120000
+        self.assertEqual(called_params["weight"], 2.5)
         self.assertEqual(called_params["item_value"], 120000)
+        checkout.order.items.all.assert_not_called()
 
     # @patch("order.views_order_process.fetch_shipping_rates_from_rajaongkir")
     # @patch("order.views_order_process.get_valid_checkout")
@@ -3,14 +3,16 @@ from unittest.mock import MagicMock, patch
 
 from cart.models import Cart
 from django.core.management import call_command
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
+from order import rate_cache
 from order.models import CheckoutSession, Order, OrderItem
 from product.models import Product
 from rest_framework.test import APIClient
 
 from .helper_setup import (
+    LOCMEM_CACHES,
     set_address,
     set_location_fields,
     set_store,
@@ -19,6 +21,7 @@ from .helper_setup import (
 )
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
 class ShippingRatesIntegrationTest(TransactionTestCase):
     """
     Integration test untuk ShippingRates endpoint.
@@ -36,6 +39,7 @@ class ShippingRatesIntegrationTest(TransactionTestCase):
 
     def setUp(self):
         self.client = APIClient()
+        rate_cache.get_cache().clear()
 
         call_command("seed_product")
 
@@ -87,7 +91,7 @@ class ShippingRatesIntegrationTest(TransactionTestCase):
     @patch("order.views_order_process.logger_error")
     @patch("order.utils.logger")
     @patch("order.utils.logger_error")
-    @patch("requests.get")
+    @patch("order.utils.rajaongkir_delivery.get")
     def test_return_200_with_valid_checkout_using_real_models(
         self,
         mock_requests_get,
@@ -100,7 +104,7 @@ class ShippingRatesIntegrationTest(TransactionTestCase):
         """
         Test: checkout dibuat lewat model asli (bukan mock), field/relasi
         (store, destination, order, order_item, product) benar-benar ada
-        di database. Yang di-mock cuma requests.get (panggilan network ke
+        di database. Yang di-mock cuma session.get (panggilan network ke
         RajaOngkir) -- seluruh logic sesudahnya (parsing JSON,
         get_best_shipping, get_active_shipping yang query StoreShippingOption
         asli, has_valid_etd, extract_min_etd) BENAR-BENAR JALAN, tidak ada
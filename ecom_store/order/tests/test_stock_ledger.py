@@ -0,0 +1,257 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from order.models import Order, OrderItem, RefundRequest
+from order.services.midtrans import WebhookMidtrans
+from order.services.refund import RefundService
+from order.services.stock import InsufficientStock, StockLedger
+from product.models import Product
+
+from .helper_setup import set_location_fields, set_store, set_user
+
+
+def item(product, qty):
+    return SimpleNamespace(product_id=product.id, qty=qty)
+
+
+class StockLedgerTest(TestCase):
+    """
+    Integration test StockLedger lawan database asli: semua mutasi stok satu
+    order harus jalan dalam satu conditional UPDATE, dan gagal secara utuh
+    (tanpa update parsial) kalau ada satu produk yang stoknya kurang.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+
+    def setUp(self):
+        self.product_a, self.product_b = Product.objects.order_by("id")[:2]
+        Product.objects.filter(pk__in=[self.product_a.pk, self.product_b.pk]).update(
+            stock=10, reserved_stock=0
+        )
+
+    def _refresh(self):
+        self.product_a.refresh_from_db()
+        self.product_b.refresh_from_db()
+
+    def test_reserve_updates_all_products_in_one_statement(self):
+        """
+        Assert: reserved_stock kedua produk naik, query yang jalan hanya
+        SAVEPOINT + satu UPDATE + RELEASE SAVEPOINT.
+        """
+        ledger = StockLedger.from_items(
+            [item(self.product_a, 2), item(self.product_b, 3)]
+        )
+
+        with self.assertNumQueries(3):
+            ledger.reserve()
+
+        self._refresh()
+        self.assertEqual(self.product_a.reserved_stock, 2)
+        self.assertEqual(self.product_b.reserved_stock, 3)
+        self.assertEqual(self.product_a.stock, 10)
+
+    def test_reserve_counts_other_reservations_as_used(self):
+        """
+        Test: stock 10, reserved 8 (checkout user lain), minta 3.
+        Assert: InsufficientStock, reserved_stock tetap 8.
+        """
+        Product.objects.filter(pk=self.product_a.pk).update(reserved_stock=8)
+
+        with self.assertRaises(InsufficientStock) as ctx:
+            StockLedger.from_items([item(self.product_a, 3)]).reserve()
+
+        self.assertEqual(ctx.exception.products, [self.product_a])
+        self._refresh()
+        self.assertEqual(self.product_a.reserved_stock, 8)
+
+    def test_reserve_failure_does_not_partially_update(self):
+        """
+        Test: produk A cukup, produk B kurang.
+        Assert: hanya B yang dilaporkan, reservasi A juga ikut batal.
+        """
+        with self.assertRaises(InsufficientStock) as ctx:
+            StockLedger.from_items(
+                [item(self.product_a, 2), item(self.product_b, 11)]
+            ).reserve()
+
+        self.assertEqual([p.pk for p in ctx.exception.products], [self.product_b.pk])
+        self._refresh()
+        self.assertEqual(self.product_a.reserved_stock, 0)
+        self.assertEqual(self.product_b.reserved_stock, 0)
+
+    def test_reserve_missing_product_reports_its_id(self):
+        """
+        Test: salah satu product id tidak ada (mis. dihapus bersamaan).
+        Assert: InsufficientStock tanpa produk kurang, id yang hilang ada di
+        missing_ids, reservasi produk lain ikut batal.
+        """
+        missing = SimpleNamespace(product_id=999_999, qty=1)
+
+        with self.assertRaises(InsufficientStock) as ctx:
+            StockLedger.from_items([item(self.product_a, 2), missing]).reserve()
+
+        self.assertEqual(ctx.exception.products, [])
+        self.assertEqual(ctx.exception.missing_ids, [999_999])
+        self._refresh()
+        self.assertEqual(self.product_a.reserved_stock, 0)
+
+    def test_repeated_product_quantities_are_aggregated(self):
+        StockLedger.from_items(
+            [item(self.product_a, 2), item(self.product_a, 4)]
+        ).reserve()
+
+        self._refresh()
+        self.assertEqual(self.product_a.reserved_stock, 6)
+
+    def test_commit_moves_reservation_into_stock(self):
+        Product.objects.filter(pk=self.product_a.pk).update(reserved_stock=2)
+
+        StockLedger.from_items([item(self.product_a, 2)]).commit()
+
+        self._refresh()
+        self.assertEqual(self.product_a.stock, 8)
+        self.assertEqual(self.product_a.reserved_stock, 0)
+
+    def test_commit_raises_value_error_when_stock_not_enough(self):
+        """
+        InsufficientStock turunan ValueError -- kontrak lama
+        reduce_product_stock() yang dipakai webhook tetap sama.
+        """
+        Product.objects.filter(pk=self.product_a.pk).update(stock=1, reserved_stock=3)
+
+        with self.assertRaises(ValueError):
+            StockLedger.from_items([item(self.product_a, 3)]).commit()
+
+        self._refresh()
+        self.assertEqual(self.product_a.stock, 1)
+        self.assertEqual(self.product_a.reserved_stock, 3)
+
+    def test_release_and_restore(self):
+        Product.objects.filter(pk=self.product_a.pk).update(reserved_stock=5)
+
+        StockLedger.from_items([item(self.product_a, 5)]).release()
+        StockLedger.from_items([item(self.product_b, 4)]).restore()
+
+        self._refresh()
+        self.assertEqual(self.product_a.reserved_stock, 0)
+        self.assertEqual(self.product_b.stock, 14)
+
+    def test_release_never_goes_below_zero(self):
+        with self.assertRaises(InsufficientStock):
+            StockLedger.from_items([item(self.product_a, 1)]).release()
+
+        self._refresh()
+        self.assertEqual(self.product_a.reserved_stock, 0)
+
+    def test_empty_ledger_runs_no_query(self):
+        with self.assertNumQueries(0):
+            StockLedger.from_items([]).reserve()
+
+
+class StockMutationPathQueryCountTest(TestCase):
+    """
+    Semua jalur mutasi stok order (reduce/reverse/release di webhook, refund
+    complete) harus O(1) statement: jumlah query tidak bertambah dengan
+    jumlah item, termasuk item dengan produk yang sama.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+        cls.user = set_user()
+        cls.store = set_store(*set_location_fields())
+        cls.products = list(Product.objects.order_by("id")[:3])
+
+    def setUp(self):
+        Product.objects.filter(pk__in=[p.pk for p in self.products]).update(
+            stock=100, reserved_stock=50
+        )
+
+    def _order(self, item_count, **fields):
+        order = Order.objects.create(user=self.user, store=self.store, **fields)
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                user=self.user,
+                # produk berulang: item ke-0, 3, 6, ... memakai produk yang sama
+                product=self.products[index % len(self.products)],
+                product_price=1_000,
+                qty=1,
+            )
+            for index in range(item_count)
+        )
+        return order
+
+    def _webhook(self, order):
+        webhook = WebhookMidtrans()
+        webhook.payload = {"order_id": str(order.order_id)}
+        webhook.get_order()
+        return webhook
+
+    def _count(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx.captured_queries)
+
+    def _stock(self):
+        return list(
+            Product.objects.filter(pk__in=[p.pk for p in self.products])
+            .order_by("id")
+            .values_list("stock", "reserved_stock")
+        )
+
+    def test_reduce_stock(self):
+        small = self._webhook(self._order(2))
+        large = self._webhook(self._order(9))
+
+        # SAVEPOINT + UPDATE + RELEASE, lalu Order.save() (full_clean + UPDATE)
+        self.assertEqual(self._count(small.reduce_stock), 7)
+        self.assertEqual(self._count(large.reduce_stock), 7)
+        # 11 item: produk 0 -> 1 + 3, produk 1 -> 1 + 3, produk 2 -> 3
+        self.assertEqual(self._stock(), [(96, 46), (96, 46), (97, 47)])
+
+    def test_reverse_stock(self):
+        small = self._webhook(self._order(2, reduced_stock=True))
+        large = self._webhook(self._order(9, reduced_stock=True))
+
+        # + SELECT item yang belum di-refund
+        self.assertEqual(self._count(small.reverse_stock), 8)
+        self.assertEqual(self._count(large.reverse_stock), 8)
+        self.assertEqual(self._stock(), [(104, 50), (104, 50), (103, 50)])
+
+    def test_release_reservation(self):
+        small = self._webhook(self._order(2))
+        large = self._webhook(self._order(9))
+
+        self.assertEqual(self._count(small.release_reservation), 4)
+        self.assertEqual(self._count(large.release_reservation), 4)
+        self.assertEqual(self._stock(), [(100, 46), (100, 46), (100, 47)])
+
+    @patch("order.services.refund.send_refund_status_emails")
+    def test_refund_complete(self, mock_email):
+        order = self._order(9, reduced_stock=True, payment_status="paid")
+        item = order.items.order_by("id").first()
+        refund_request = RefundRequest.objects.create(
+            order_item=item,
+            amount=item.subtotal,
+            reason=RefundRequest.Reason.RETURN,
+            status=RefundRequest.Status.APPROVED,
+            destination_type=RefundRequest.DestinationType.BANK,
+            destination_provider=RefundRequest.Provider.BCA,
+            destination_number="1234567890",
+            account_holder_name="Customer Satu",
+        )
+
+        # lewat BulkRefundService: SELECT (pk, order) untuk batching,
+        # SAVEPOINT, lock Order, lock RefundRequest + OrderItem, SAVEPOINT +
+        # UPDATE stok + RELEASE, UPDATE status, RELEASE, refresh instance
+        with self.assertNumQueries(10):
+            RefundService(refund_request).complete()
+
+        self.assertEqual(self._stock()[0], (101, 50))
@@ -3,10 +3,13 @@ from unittest.mock import MagicMock, patch
 
 from cart.models import Cart
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from order.models import CheckoutSession, Order, OrderItem, OrderShipping
+from order.services.order import calculate_order_totals
 from order.utils import CheckoutExpired, GrossAmountMismatch
 from order.views_order_process import TransactionView
 from product.models import Product
@@ -415,6 +418,10 @@ class TransactionViewIntegrationTest(TransactionTestCase):
             product_price=self.cart.product.price,
             qty=self.cart.qty,
         )
+        # snapshot total seperti yang diisi OrderService saat checkout
+        Order.objects.filter(pk=self.order.pk).update(
+            **calculate_order_totals([self.order_item])
+        )
 
         self.checkout = CheckoutSession.objects.create(
             user=self.user,
@@ -491,6 +498,31 @@ class TransactionViewIntegrationTest(TransactionTestCase):
             self.order.grand_total,
         )
 
+    @patch("order.views_order_process.snap")
+    def test_order_items_read_once_for_midtrans_payload(self, mock_snap):
+        """
+        Test: asuransi, grand_total dan validasi gross_amount memakai snapshot
+        total di Order (items_subtotal), bukan iterasi order.items.
+        Assert: tabel OrderItem hanya di-query sekali, yaitu saat membangun
+        item_details payload Midtrans.
+        """
+        self.handle_login()
+        mock_snap.create_transaction.return_value = {"token": "snap-token"}
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("transaction"), self._valid_payload(), format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        item_queries = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].lstrip().startswith("SELECT")
+            and "order_orderitem" in query["sql"]
+        ]
+        self.assertEqual(len(item_queries), 1)
+
     @patch("order.views_order_process.logger_error")
     @patch("order.views_order_process.snap")
     def test_shipping_record_persists_in_db_when_midtrans_fails(
@@ -3,17 +3,19 @@ import re
 
 import requests
 from cart.models import Cart
+from config.providers import rajaongkir_delivery
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils.timezone import localtime, now
-from product.models import Product
 from rest_framework import serializers
 from rest_framework.exceptions import APIException, NotFound
 
 # from shipping_address.utils import format_address
 from store.models import Store, StoreShippingOption
 
+from . import rate_cache
 from .models import CheckoutSession, Order, OrderItem, RefundRequest
+from .services.stock import StockLedger
 
 
 class RajaOngkirException(APIException):
@@ -104,17 +106,34 @@ def get_best_shipping(shippings, is_cod):
 
 
 def fetch_shipping_rates_from_rajaongkir(params, is_cod):
+    """
+    Tarif per rute di-cache (lihat order/rate_cache.py), jadi quote berulang
+    untuk rute + bucket berat/nilai yang sama tidak memanggil RajaOngkir lagi,
+    dan request identik yang datang bersamaan hanya memanggilnya sekali.
+    Yang di-cache data mentah semua kurir; pemilihan kurir terbaik (yang
+    tergantung is_cod) tetap dihitung per request.
+    """
+    try:
+        data = rate_cache.read_through(
+            rate_cache.bucket_params(params), request_shipping_rates
+        )
+    except rate_cache.CoalescedFailure as e:
+        raise RajaOngkirException(str(e))
+
+    return {
+        "reguler": get_best_shipping(data.get("calculate_reguler", []), is_cod),
+        "cargo": get_best_shipping(data.get("calculate_cargo", []), is_cod),
+        "instant": get_best_shipping(data.get("calculate_instant", []), is_cod),
+    }
+
+
+def request_shipping_rates(params):
     headers = {"x-api-key": settings.API_KEY_RAJA_ONGKIR_SHIPPING_DELIVERY}
 
-    url = "https://api-sandbox.collaborator.komerce.id/tariff/api/v1/calculate"
+    url = f"{settings.RAJA_ONGKIR_DELIVERY_BASE_URL}/tariff/api/v1/calculate"
 
     try:
-        res = requests.get(
-            url,
-            headers=headers,
-            params=params,
-            timeout=10,
-        )
+        res = rajaongkir_delivery.get(url, headers=headers, params=params)
 
         res.raise_for_status()
 
@@ -138,11 +157,7 @@ def fetch_shipping_rates_from_rajaongkir(params, is_cod):
     if meta.get("status") != "success":
         raise RajaOngkirException(meta.get("message", "Shipping calculation failed."))
 
-    return {
-        "reguler": get_best_shipping(data.get("calculate_reguler", []), is_cod),
-        "cargo": get_best_shipping(data.get("calculate_cargo", []), is_cod),
-        "instant": get_best_shipping(data.get("calculate_instant", []), is_cod),
-    }
+    return data
 
 
 def get_destination(user, shipping_address_id=None):
@@ -272,8 +287,8 @@ def fetch_order_rajaongkir(order):
     }
 
     headers = {"x-api-key": settings.API_KEY_RAJA_ONGKIR_SHIPPING_DELIVERY}
-    res = requests.post(
-        "https://api-sandbox.collaborator.komerce.id/order/api/v1/orders/store",
+    res = rajaongkir_delivery.post(
+        f"{settings.RAJA_ONGKIR_DELIVERY_BASE_URL}/order/api/v1/orders/store",
         json=order_data,
         headers=headers,
     )
@@ -294,41 +309,18 @@ def fetch_order_rajaongkir(order):
 
 
 def reduce_product_stock(order_items):
-    product_ids = order_items.values_list("product_id", flat=True)
-
-    products = (
-        Product.objects.select_for_update().filter(id__in=product_ids).order_by("id")
-    )
-
-    product_map = {p.id: p for p in products}
-
-    for item in order_items:
-        product = product_map[item.product_id]
-
-        if product.stock < item.qty:
-            raise ValueError("Stok tidak mencukupi")
-
-        product.stock -= item.qty
-        product.reserved_stock -= item.qty
-        product.save(update_fields=["stock", "reserved_stock"])
+    """
+    Potong stock fisik + lepas reservasi setelah pembayaran sukses.
+    Raise InsufficientStock (turunan ValueError) kalau stok tidak cukup.
+    """
+    StockLedger.from_items(order_items).commit()
 
 
 def restore_product_stock(order_items):
     if not order_items:
         return
-    
-    product_ids = order_items.values_list("product_id", flat=True)
-
-    products = (
-        Product.objects.select_for_update().filter(id__in=product_ids).order_by("id")
-    )
-
-    product_map = {p.id: p for p in products}
 
-    for item in order_items:
-        product = product_map[item.product_id]
-        product.stock += item.qty
-        product.save(update_fields=["stock"])
+    StockLedger.from_items(order_items).restore()
 
 
 def get_valid_checkout(user, checkout_id):
@@ -336,9 +328,7 @@ def get_valid_checkout(user, checkout_id):
         checkout = (
             CheckoutSession.objects.select_related(
                 "destination", "store", "user", "order"
-            )
-            .prefetch_related("order__items")
-            .get(id=checkout_id, user=user)
+            ).get(id=checkout_id, user=user)
         )
     except CheckoutSession.DoesNotExist:
         logger_error.error(
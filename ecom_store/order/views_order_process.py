@@ -5,7 +5,6 @@ from datetime import timedelta
 from config.exceptions import error_response
 from config.midtrans import snap
 from django.core.cache import cache
-from django.core.exceptions import ValidationError
 from django.db import transaction
 
 # from django.http import JsonResponse
@@ -17,7 +16,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from store.models import Store
 
-from .models import CheckoutSession, Order
+from .models import CheckoutSession, MidtransWebhookEvent
 from .serializers import ShippingSerializer, RefundRequestCreateSerializer, RefundRequestDetailSerializer
 from .services.checkout import CheckoutService
 from .services.midtrans import (
@@ -26,6 +25,12 @@ from .services.midtrans import (
     WebhookMidtrans,
 )
 from .services.order import OrderService, OrderShippingService
+from .services.webhook_events import (
+    apply_midtrans_notification,
+    mark_event,
+    record_midtrans_event,
+)
+from .tasks import process_midtrans_events
 from .utils import (
     GrossAmountMismatch,
     RajaOngkirException,
@@ -119,16 +124,14 @@ class ShippingRates(APIView):
 
         checkout = get_valid_checkout(request.user, checkout_id)
 
-        order_items = checkout.order.items.all()
-
-        total_weight = sum([item.product.weight * item.qty for item in order_items])
-        total_price = sum([item.product.price * item.qty for item in order_items])
+        # snapshot total dari OrderService, tidak perlu iterasi item
+        order = checkout.order
 
         params = {
             "shipper_destination_id": checkout.store.shipping_address.destination_id,
             "receiver_destination_id": checkout.destination.destination_id,
-            "weight": total_weight / 1000,  # grams to kilograms
-            "item_value": int(total_price),
+            "weight": order.total_weight / 1000,  # grams to kilograms
+            "item_value": order.items_subtotal,
             "cod": "yes",
             "origin_pin_point": checkout.store.shipping_address.get_coordinates,
             "destination_pin_point": checkout.destination.get_coordinates,
@@ -245,52 +248,33 @@ class MidtransWebhookView(APIView):
 
         logger.info(f"Webhook diterima untuk order_id: {payload['order_id']}")
 
-        try:
-            with transaction.atomic():
-                webhook_midtrans.get_order()
-                is_paid = webhook_midtrans.change_payment_status_order()
-        except (Order.DoesNotExist, ValidationError):
-            return Response({"detail": "Order tidak ditemukan"}, status=404)
-        except Exception as e:
-            logger_error.error(f"Webhook error: {e}")
-            return Response({"detail": "Terjadi kesalahan"}, status=500)
+        # retry Midtrans untuk event yang sudah diproses: jawab OK tanpa lock Order
+        event, is_duplicate = record_midtrans_event(payload)
+        if is_duplicate:
+            logger.info(
+                f"Webhook duplikat untuk order_id: {payload['order_id']}, dilewati"
+            )
+            return Response({"detail": "OK"}, status=200)
 
-        if is_paid:
+        if settings.MIDTRANS_WEBHOOK_ASYNC:
+            # transisi status diterapkan worker, serial per order_id
             try:
-                with transaction.atomic():
-                    webhook_midtrans.reduce_stock()
-            except Exception:
-                logger_error.critical(
-                    "Order paid tapi reduce_stock gagal - butuh review manual",
-                    extra={
-                        "event_type": "transaction",
-                        "order_id": webhook_midtrans.order.order_id,
-                    },
-                )
-                return Response({"detail": "Terjadi kesalahan"}, status=500)
-        else:
-            try:
-                with transaction.atomic():
-                    webhook_midtrans.reverse_stock()
-                    if (
-                        webhook_midtrans.new_status == "failed"
-                        and webhook_midtrans.old_status not in ("paid", "failed")
-                    ):
-                        webhook_midtrans.release_reservation()
-            except Exception:
-                logger_error.critical(
-                    "Reversal terjadi tapi reverse_stock gagal - butuh review manual",
-                    extra={
-                        "event_type": "transaction",
-                        "order_id": webhook_midtrans.order.order_id,
-                    },
-                )
+                process_midtrans_events.delay(event.order_id)
+            except Exception as e:
+                logger_error.error(f"Gagal enqueue webhook: {e}")
                 return Response({"detail": "Terjadi kesalahan"}, status=500)
-
-        logger.info(
-            f"Transaksi Midtrans untuk order id {payload['order_id']} berhasil di proses"
+            return Response({"detail": "OK"}, status=200)
+
+        status_code, detail = apply_midtrans_notification(webhook_midtrans)
+        mark_event(
+            event,
+            (
+                MidtransWebhookEvent.Status.PROCESSED
+                if status_code == 200
+                else MidtransWebhookEvent.Status.FAILED
+            ),
         )
-        return Response({"detail": "OK"}, status=200)
+        return Response({"detail": detail}, status=status_code)
 
 class RefundRequestCreateView(APIView):
     def post(self, request):
@@ -1,12 +1,16 @@
+from django.db.models import Prefetch
 from rest_framework import status as rest_status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import OrderItem, RefundRequest
+from .models import Order, OrderItem, RefundRequest
+from .pagination import OrderHistoryPagination
 from .serializers import OrderItemSerializer, OrderSerializer, RefundRequestDetailSerializer
 
 
 class GetOrderByFilter(APIView):
+    pagination_class = OrderHistoryPagination
+
     def get(self, request):
         status = request.query_params.get("status")
         payment_status = request.query_params.get("payment_status")
@@ -17,52 +21,60 @@ class GetOrderByFilter(APIView):
                 status=rest_status.HTTP_400_BAD_REQUEST,
             )
 
-        filter_parameter = {"is_archived": False, "order__user": request.user}
+        # user di OrderItem (salinan order.user): filter + urutan keyset
+        # dilayani index orderitem_user_created_idx tanpa sort semua item user
+        filter_parameter = {"is_archived": False, "user": request.user}
         if status:
             filter_parameter["order__status"] = status
         if payment_status:
             filter_parameter["order__payment_status"] = payment_status
 
+        # filter isnull=False -> INNER JOIN ke shipping, bukan NOT (... IS NULL)
         queryset = (
             OrderItem.objects.select_related("order", "product")
             .filter(**filter_parameter)
-            .exclude(order__shipping__isnull=True)
-            .order_by("-created_at")
+            .filter(order__shipping__isnull=False)
         )
-        serializer = OrderItemSerializer(queryset, many=True)
-        return Response(serializer.data)
+
+        paginator = self.pagination_class()
+        if not paginator.is_requested(request):
+            # client lama tanpa page_size/cursor tetap dapat list penuh
+            queryset = queryset.order_by("-created_at", "-id")
+            return Response(OrderItemSerializer(queryset, many=True).data)
+
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = OrderItemSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class GetOrderDetail(APIView):
     def get(self, request, order_id):
-        filter_parameter = {
-            "is_archived": False,
-            "order__user": request.user,
-            "order__order_id": order_id,
-        }
-
-        order_items = (
-            OrderItem.objects.select_related("order", "product")
-            .filter(**filter_parameter)
-            .exclude(order__shipping__isnull=True)
-            .order_by("created_at")
+        # satu query untuk order + shipping, satu query untuk item + produk
+        items = Prefetch(
+            "items",
+            queryset=OrderItem.objects.filter(is_archived=False)
+            .select_related("product")
+            .order_by("created_at", "id"),
+            to_attr="visible_items",
         )
-        if not order_items.exists():
+        order = (
+            Order.objects.select_related("shipping")
+            .prefetch_related(items)
+            .filter(user=request.user, order_id=order_id, shipping__isnull=False)
+            .first()
+        )
+        if order is None or not order.visible_items:
             return Response(
                 {"detail": "Order item not found"},
                 status=rest_status.HTTP_404_NOT_FOUND,
             )
 
-        order = order_items.first().order
-        order_serializer = OrderSerializer(order)
-        order_item_serializer = OrderItemSerializer(order_items, many=True)
-
-        order_item_data = order_item_serializer.data
+        order_item_data = OrderItemSerializer(order.visible_items, many=True).data
         for item in order_item_data:
             item.pop("order_id", None)
 
-        data = dict(order_serializer.data)
-        data["items"] = order_item_serializer.data
+        data = dict(OrderSerializer(order).data)
+        data["items"] = order_item_data
         return Response(data)
 
     def delete(self, request, order_id):
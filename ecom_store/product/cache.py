@@ -0,0 +1,151 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger("product")
+
+CATALOG_CACHE_ALIAS = "catalog"
+
+# namespace versi; entry lama tidak dihapus, cukup "ditinggal" lewat bump versi
+# dan habis sendiri karena TTL
+PRODUCT_LIST = "product_list"
+CATEGORY_LIST = "category_list"
+CATEGORY_ALL = "category_all"
+
+STATS_HIT = "stats:hit"
+STATS_MISS = "stats:miss"
+STATS_ERROR = "stats:error"
+
+
+def get_cache():
+    return caches[CATALOG_CACHE_ALIAS]
+
+
+def product_namespace(pk):
+    return f"product:{pk}"
+
+
+def _version_key(namespace):
+    return f"v:{namespace}"
+
+
+def _incr(cache, key):
+    # add() no-op kalau key sudah ada, jadi incr() tidak pernah kena key kosong
+    cache.add(key, 0, timeout=None)
+    return cache.incr(key)
+
+
+def get_versions(cache, namespaces):
+    keys = [_version_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    return [found.get(key, 0) for key in keys]
+
+
+def build_key(cache, name, namespaces, extra=""):
+    """
+    Key = nama entry + versi semua namespace yang mempengaruhinya.
+    Contoh: detail produk dipengaruhi versi produk itu sendiri dan versi
+    semua category (karena category ikut di-nest di response).
+    """
+    versions = get_versions(cache, namespaces)
+    version_part = ":".join(
+        f"{namespace}={version}" for namespace, version in zip(namespaces, versions)
+    )
+    digest = hashlib.md5(extra.encode()).hexdigest() if extra else ""
+    return f"{name}:{version_part}:{digest}"
+
+
+def read_through(name, namespaces, loader, extra=""):
+    """
+    Ambil data dari cache catalog, atau panggil loader() lalu simpan hasilnya.
+
+    Return (data, status) dengan status "HIT", "MISS", atau "BYPASS" kalau
+    Redis tidak bisa dihubungi -- cache bersifat fail-open, request tetap
+    dilayani dari database.
+    """
+    cache = get_cache()
+
+    try:
+        key = build_key(cache, name, namespaces, extra)
+        data = cache.get(key)
+    except Exception:
+        logger.warning("Catalog cache tidak tersedia, fallback ke database")
+        return loader(), "BYPASS"
+
+    if data is not None:
+        _record(cache, STATS_HIT)
+        return data, "HIT"
+
+    data = loader()
+    if data is None:
+        # hasil kosong (mis. 404) tidak di-cache
+        _record(cache, STATS_MISS)
+        return data, "MISS"
+
+    try:
+        cache.set(key, data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    except Exception:
+        logger.warning("Gagal menyimpan data ke catalog cache")
+        return data, "BYPASS"
+
+    _record(cache, STATS_MISS)
+    return data, "MISS"
+
+
+def _record(cache, stats_key):
+    try:
+        _incr(cache, stats_key)
+    except Exception:
+        pass
+
+
+def bump(*namespaces):
+    """
+    Naikkan versi namespace setelah transaksi commit. Kalau dijalankan
+    sebelum commit, request lain bisa membaca data lama dari DB lalu
+    menyimpannya di bawah versi baru.
+    """
+
+    def _bump():
+        cache = get_cache()
+        try:
+            for namespace in namespaces:
+                _incr(cache, _version_key(namespace))
+        except Exception:
+            logger.warning(
+                "Gagal invalidasi catalog cache", extra={"namespaces": namespaces}
+            )
+            _record(cache, STATS_ERROR)
+
+    transaction.on_commit(_bump)
+
+
+def invalidate_products(product_ids):
+    """Dipakai juga untuk write yang tidak memicu signal (bulk_update/update())."""
+    bump(PRODUCT_LIST, *(product_namespace(pk) for pk in set(product_ids)))
+
+
+def invalidate_categories():
+    # category di-nest di response produk, jadi list produk ikut basi
+    bump(CATEGORY_LIST, CATEGORY_ALL, PRODUCT_LIST)
+
+
+def get_stats():
+    cache = get_cache()
+    found = cache.get_many([STATS_HIT, STATS_MISS, STATS_ERROR])
+    hit = found.get(STATS_HIT, 0)
+    miss = found.get(STATS_MISS, 0)
+    total = hit + miss
+    return {
+        "hit": hit,
+        "miss": miss,
+        "error": found.get(STATS_ERROR, 0),
+        "hit_ratio": round(hit / total, 4) if total else 0.0,
+    }
+
+
+def reset_stats():
+    get_cache().delete_many([STATS_HIT, STATS_MISS, STATS_ERROR])
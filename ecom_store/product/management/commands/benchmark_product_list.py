@@ -0,0 +1,136 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from product.models import Category, Product
+from product.pagination import KeysetPagination
+from rest_framework.test import APIClient
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ProductList: full listing vs keyset pagination (first & deep page) "
+        "across catalog sizes. Seeded data di-rollback setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[100, 10_000, 100_000],
+            help="Jumlah produk per skenario.",
+        )
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--full-limit",
+            type=int,
+            default=20_000,
+            help="Lewati benchmark full listing (tanpa pagination) di atas ukuran ini.",
+        )
+        parser.add_argument(
+            "--fields",
+            default="",
+            help="Projection opsional, contoh: id,name,price",
+        )
+
+    def handle(self, *args, **options):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.url = reverse("product")
+
+        self.stdout.write(
+            f"{'size':>9} | {'full (ms)':>10} | {'first page (ms)':>15} | "
+            f"{'deep page (ms)':>14} | {'queries/page':>12}"
+        )
+
+        for size in options["sizes"]:
+            with transaction.atomic():
+                self.seed(size)
+                row = self.run_case(size, options)
+                # data benchmark tidak boleh tertinggal di DB
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{size:>9} | {row['full']:>10} | {row['first']:>15.2f} | "
+                f"{row['deep']:>14.2f} | {row['queries']:>12}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("benchmark selesai"))
+
+    def seed(self, size):
+        category, _ = Category.objects.get_or_create(
+            name="Benchmark Category", defaults={"desc": "Benchmark"}
+        )
+        missing = size - Product.objects.count()
+        if missing <= 0:
+            return
+
+        Product.objects.bulk_create(
+            (
+                Product(
+                    name=f"Benchmark Product {i}",
+                    variant_name=f"Variant {i}",
+                    category=category,
+                    price=10_000,
+                    stock=50,
+                    weight=500,
+                    width=10,
+                    height=10,
+                    length=10,
+                )
+                for i in range(missing)
+            ),
+            batch_size=5_000,
+        )
+
+    def timed_get(self, params, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            res = self.client.get(self.url, params)
+            samples.append((time.perf_counter() - start) * 1000)
+
+            if res.status_code != 200:
+                raise RuntimeError(
+                    f"ProductList returned {res.status_code}: {res.content[:200]}"
+                )
+
+        return statistics.median(samples), res
+
+    def run_case(self, size, options):
+        page_params = {"page_size": options["page_size"], "ordering": "created_at"}
+        if options["fields"]:
+            page_params["fields"] = options["fields"]
+
+        full = "skipped"
+        if size <= options["full_limit"]:
+            full_ms, _ = self.timed_get(
+                {"fields": options["fields"]} if options["fields"] else {}, 3
+            )
+            full = f"{full_ms:.2f}"
+
+        first_ms, _ = self.timed_get(page_params, options["repeat"])
+
+        # cursor untuk halaman terakhir: mulai dari baris ke (size - page_size)
+        anchor = Product.objects.order_by("created_at", "id").only("id", "created_at")[
+            max(size - options["page_size"] - 1, 0)
+        ]
+        deep_params = dict(page_params)
+        deep_params["cursor"] = KeysetPagination().encode_cursor(
+            anchor, ("created_at", "id")
+        )
+        deep_ms, _ = self.timed_get(deep_params, options["repeat"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, deep_params)
+
+        return {
+            "full": full,
+            "first": first_ms,
+            "deep": deep_ms,
+            "queries": len(ctx.captured_queries),
+        }
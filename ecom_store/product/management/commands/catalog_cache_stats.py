@@ -0,0 +1,20 @@
+import json
+
+from django.core.management.base import BaseCommand
+from product.cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Tampilkan hit/miss counter cache catalog (product & category)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset counter setelah ditampilkan."
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(get_stats(), indent=2))
+
+        if options["reset"]:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("counter direset"))
@@ -32,5 +32,11 @@ class Product(BaseModel):
     )
     price = models.DecimalField(max_digits=18, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            # keyset pagination ProductList untuk ordering (created_at, id)
+            models.Index(fields=["created_at", "id"], name="product_created_id_idx"),
+        ]
+
     def __str__(self):
         return self.name
@@ -0,0 +1,189 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a fixed, unique ordering.
+
+    Unlike OFFSET pagination, the next page is located with a
+    `WHERE (created_at, id) > (last_created_at, last_id)` style filter,
+    so the database seeks straight into the index instead of scanning
+    and discarding every previous row. Page cost stays flat no matter
+    how deep the client goes or how big the table grows.
+
+    Every ordering ends with `id` as tie-breaker, so rows sharing the
+    same `created_at` are never skipped or repeated between pages.
+
+    Query params:
+        page_size : rows per page (default 20, max 100)
+        ordering  : one of `orderings` keys (default "id")
+        cursor    : opaque token taken from the previous response's "next"
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    default_ordering = "id"
+    orderings = {
+        "id": ("id",),
+        "-id": ("-id",),
+        "created_at": ("created_at", "id"),
+        "-created_at": ("-created_at", "-id"),
+    }
+
+    def is_requested(self, request):
+        """
+        Pagination is opt-in so existing clients that expect a plain list
+        keep working; sending page_size or cursor switches it on.
+        """
+        return (
+            self.page_size_query_param in request.query_params
+            or self.cursor_query_param in request.query_params
+        )
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(
+            self.ordering_query_param, self.default_ordering
+        )
+        if ordering not in self.orderings:
+            raise ValidationError(
+                {
+                    self.ordering_query_param: (
+                        f"Ordering harus salah satu dari: {', '.join(self.orderings)}."
+                    )
+                }
+            )
+        return self.orderings[ordering]
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+
+        try:
+            page_size = int(raw)
+        except ValueError:
+            raise ValidationError(
+                {self.page_size_query_param: "page_size harus berupa angka."}
+            )
+
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: "page_size minimal 1."})
+
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request, ordering, model):
+        """
+        Cursor berisi nilai mentah dari JSON, jadi tiap nilai dikonversi
+        lewat field ordering-nya (to_python + validator) sebelum dipakai
+        di filter. Nilai yang tidak cocok dengan tipe kolom jadi 400,
+        bukan error saat query dijalankan.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (binascii.Error, ValueError, UnicodeDecodeError):
+            raise ValidationError({self.cursor_query_param: "Cursor tidak valid."})
+
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValidationError({self.cursor_query_param: "Cursor tidak valid."})
+
+        decoded = []
+        for field_name, raw in zip(ordering, values):
+            field = model._meta.get_field(field_name.lstrip("-"))
+            try:
+                value = field.to_python(raw)
+                if value is None:
+                    raise ValueError("nilai cursor kosong")
+                field.run_validators(value)
+            except (ValueError, TypeError, DjangoValidationError):
+                raise ValidationError({self.cursor_query_param: "Cursor tidak valid."})
+            decoded.append(value)
+
+        return decoded
+
+    def encode_cursor(self, instance, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(instance, field.lstrip("-"))
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def build_keyset_filter(self, ordering, values):
+        """
+        Expand (a, b) > (x, y) into `a >= x AND (a > x OR (a = x AND b > y))`,
+        flipping the comparison for descending fields. Row-value comparison
+        is not used directly because the MySQL optimizer does not always use
+        the index for it; the redundant `a >= x` bound gives the planner
+        (MySQL and SQLite alike) a range to seek to, instead of walking the
+        index from the start and discarding rows against the OR.
+        """
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+
+            branch = Q(**{f"{name}__{lookup}": values[i]})
+            for prev_field, prev_value in zip(ordering[:i], values[:i]):
+                branch &= Q(**{prev_field.lstrip("-"): prev_value})
+
+            condition |= branch
+
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(request)
+        page_size = self.get_page_size(request)
+        values = self.decode_cursor(request, ordering, queryset.model)
+
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.build_keyset_filter(ordering, values))
+
+        # ambil 1 baris lebih untuk tahu masih ada halaman berikutnya atau tidak
+        rows = list(queryset[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+
+        self.next_cursor = (
+            self.encode_cursor(self.page[-1], ordering) if self.has_next else None
+        )
+        return self.page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
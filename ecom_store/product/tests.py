@@ -1,23 +1,38 @@
+import base64
+import json
 from unittest.mock import patch
 
 from allauth.account.models import EmailAddress
+from cart.models import Cart
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.test import TransactionTestCase, override_settings
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from freezegun import freeze_time
+from order.services.checkout import CheckoutService
+from product.cache import get_cache, get_stats
+from product.models import Category, Product
 from rest_framework.test import APIClient
 
 User = get_user_model()
 
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog-test",
+    },
+}
+
 
 @freeze_time("2025-12-08T11:45:00+07:00")
-@override_settings(USE_TZ=True)
+@override_settings(USE_TZ=True, CACHES=LOCMEM_CACHES)
 class ProductTest(TransactionTestCase):
     reset_sequences = True
 
     def setUp(self):
         self.client = APIClient()
+        get_cache().clear()
 
         call_command("seed_product")
 
@@ -122,3 +137,188 @@ class ProductTest(TransactionTestCase):
         data = res.data
 
         self.assertEqual(data["detail"], "Product not found")
+
+    @patch("accounts.signals.logger")
+    def test_product_keyset_pagination(self, mock_logger):
+        """
+        page_size dikirim -> response berbentuk {"next", "results"}.
+        Semua produk created_at-nya sama (freeze_time), jadi ordering
+        created_at harus tetap lengkap tanpa duplikat berkat tie-breaker id.
+        """
+        seen = []
+        params = {"page_size": 4, "ordering": "created_at"}
+        url = reverse("product")
+
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, 200)
+            self.assertLessEqual(len(res.data["results"]), 4)
+            seen.extend(item["id"] for item in res.data["results"])
+            url, params = res.data["next"], None
+
+        self.assertEqual(seen, list(range(1, 11)))
+
+    @patch("accounts.signals.logger")
+    def test_product_keyset_pagination_descending(self, mock_logger):
+        res = self.client.get(reverse("product"), {"page_size": 3, "ordering": "-id"})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([item["id"] for item in res.data["results"]], [10, 9, 8])
+        self.assertIsNotNone(res.data["next"])
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual([item["id"] for item in res.data["results"]], [7, 6, 5])
+
+    @patch("accounts.signals.logger")
+    def test_product_fields_projection(self, mock_logger):
+        """
+        fields=id,name -> hanya kolom itu yang di-serialize, tanpa join category.
+        """
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                reverse("product"), {"fields": "id,name", "page_size": 5}
+            )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["results"][0], {"id": 1, "name": "Sample Product 1"})
+
+    @patch("accounts.signals.logger")
+    def test_product_pagination_invalid_params(self, mock_logger):
+        url = reverse("product")
+
+        res = self.client.get(url, {"fields": "id,secret"})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("secret", str(res.data["fields"]))
+
+        res = self.client.get(url, {"cursor": "bukan-cursor"})
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.get(url, {"page_size": 5, "ordering": "price"})
+        self.assertEqual(res.status_code, 400)
+
+    @patch("accounts.signals.logger")
+    def test_product_pagination_cursor_with_bad_values(self, mock_logger):
+        """
+        Cursor yang lolos base64/JSON tapi nilainya tidak cocok dengan
+        tipe kolom ordering -> 400, bukan 500 saat query dijalankan.
+        """
+        url = reverse("product")
+        cases = [
+            ("id", ["abc"]),
+            ("id", [{"a": 1}]),
+            ("id", [None]),
+            ("created_at", ["bukan-tanggal", 1]),
+        ]
+
+        for ordering, values in cases:
+            with self.subTest(ordering=ordering, values=values):
+                cursor = base64.urlsafe_b64encode(json.dumps(values).encode())
+                res = self.client.get(
+                    url, {"ordering": ordering, "cursor": cursor.decode()}
+                )
+
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("cursor", res.data)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CatalogCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_product")
+        cls.user = User.objects.create_user(
+            username="test",
+            email="test@gmail.com",
+            password="test2938484jr",
+            phone_number="089384442947",
+        )
+        cls.product = Product.objects.order_by("id").first()
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_product_list_hit_after_first_miss(self):
+        """
+        Request kedua dengan query yang sama harus dilayani dari cache
+        tanpa query ke database, counter hit/miss ikut bertambah.
+        """
+        res = self.client.get(reverse("product"))
+        self.assertEqual(res["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            res = self.client.get(reverse("product"))
+
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(len(res.data), 10)
+        self.assertEqual(get_stats()["hit"], 1)
+        self.assertEqual(get_stats()["miss"], 1)
+
+    def test_product_save_invalidates_list_and_detail(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("product"))
+            self.client.get(reverse("product_detail", args=[self.product.id]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.stock = 7
+            self.product.save(update_fields=["stock"])
+
+        res = self.client.get(reverse("product"))
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data[0]["stock"], 7)
+
+        res = self.client.get(reverse("product_detail", args=[self.product.id]))
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["stock"], 7)
+
+    def test_category_save_invalidates_nested_product_data(self):
+        self.client.get(reverse("category"))
+        self.client.get(reverse("product_detail", args=[self.product.id]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.get(pk=self.product.category_id)
+            category.name = "Renamed Category"
+            category.save()
+
+        res = self.client.get(reverse("category"))
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data[0]["name"], "Renamed Category")
+
+        res = self.client.get(reverse("product_detail", args=[self.product.id]))
+        self.assertEqual(res.data["category"]["name"], "Renamed Category")
+
+    def test_reserve_stock_bulk_update_invalidates_product(self):
+        """
+        _validate_and_reserve_stock memakai bulk_update (tanpa post_save),
+        tetap harus membuat versi produk naik.
+        """
+        self.client.get(reverse("product_detail", args=[self.product.id]))
+
+        carts = Cart.objects.filter(
+            pk=Cart.objects.create(user=self.user, product=self.product, qty=1).pk
+        ).select_related("product")
+        service = CheckoutService(self.user, [], None, None)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            service._validate_and_reserve_stock(carts)
+
+        res = self.client.get(reverse("product_detail", args=[self.product.id]))
+        self.assertEqual(res["X-Cache"], "MISS")
+
+    def test_product_detail_not_found_is_not_cached(self):
+        self.client.get(reverse("product_detail", args=[999]))
+        res = self.client.get(reverse("product_detail", args=[999]))
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(get_stats()["hit"], 0)
+
+    @patch("product.cache.logger")
+    def test_cache_unavailable_falls_back_to_database(self, mock_logger):
+        with patch("product.cache.get_cache") as mock_get_cache:
+            mock_get_cache.return_value.get_many.side_effect = ConnectionError
+            res = self.client.get(reverse("product"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["X-Cache"], "BYPASS")
+        self.assertEqual(len(res.data), 10)
@@ -1,35 +1,105 @@
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .cache import (
+    CATEGORY_ALL,
+    CATEGORY_LIST,
+    PRODUCT_LIST,
+    product_namespace,
+    read_through,
+)
 from .models import Category, Product
+from .pagination import KeysetPagination
 from .serializers import CategorySerializer, ProductSerializer
 
 
+def get_requested_fields(request, allowed):
+    """
+    Parse `?fields=id,name,price` jadi list field, divalidasi terhadap
+    field yang tersedia di serializer. Return None kalau tidak dikirim.
+    """
+    raw = request.query_params.get("fields")
+    if not raw:
+        return None
+
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise serializers.ValidationError(
+            {"fields": f"Field tidak dikenal: {', '.join(unknown)}"}
+        )
+
+    return fields
+
+
 class CategoryList(APIView):
     def get(self, request):
+        data, cache_status = read_through(
+            "category_list", [CATEGORY_LIST], self.build_data
+        )
+        return Response(data, headers={"X-Cache": cache_status})
+
+    def build_data(self):
         queryset = Category.objects.all().order_by("id")
-        serializer = CategorySerializer(queryset, many=True)
-        return Response(serializer.data)
+        return CategorySerializer(queryset, many=True).data
 
 
 class ProductList(APIView):
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
 
     def get(self, request):
-        queryset = Product.objects.all().order_by("id")
-        serializer = ProductSerializer(queryset, many=True)
-        return Response(serializer.data)
+        # key per halaman: query string (cursor, page_size, fields, ...) + host
+        # karena link "next" berisi absolute URL
+        data, cache_status = read_through(
+            "product_list",
+            [PRODUCT_LIST],
+            lambda: self.build_data(request),
+            extra=request.build_absolute_uri(),
+        )
+        return Response(data, headers={"X-Cache": cache_status})
+
+    def build_data(self, request):
+        fields = get_requested_fields(request, ProductSerializer.Meta.fields)
+        paginator = self.pagination_class()
+
+        queryset = Product.objects.all()
+        if fields is None or "category" in fields:
+            queryset = queryset.select_related("category")
+        if fields is not None:
+            # kolom ordering wajib ikut di-load, dipakai untuk membangun cursor
+            ordering = paginator.get_ordering(request)
+            columns = {field.lstrip("-") for field in ordering} | set(fields)
+            queryset = queryset.only(*columns)
+
+        if not paginator.is_requested(request):
+            queryset = queryset.order_by("id")
+            return ProductSerializer(queryset, many=True, fields=fields).data
+
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = ProductSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data).data
 
 
 class ProductDetail(APIView):
     def get(self, request, pk):
-        product = Product.objects.filter(pk=pk).first()
-        if not product:
+        data, cache_status = read_through(
+            "product_detail",
+            [product_namespace(pk), CATEGORY_ALL],
+            lambda: self.build_data(pk),
+        )
+        if data is None:
             return Response(
                 {"detail": "Product not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = ProductSerializer(product)
-        return Response(serializer.data)
+        return Response(data, headers={"X-Cache": cache_status})
+
+    def build_data(self, pk):
+        product = Product.objects.filter(pk=pk).select_related("category").first()
+        if not product:
+            return None
+
+        return ProductSerializer(product).data
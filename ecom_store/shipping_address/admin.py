@@ -1,7 +1,14 @@
 from config.admin import ReadOnlyForStaffMixin
 from django.contrib import admin
 
-from .models import City, District, Province, ShippingAddress, SubDistrict
+from .models import (
+    City,
+    Destination,
+    District,
+    Province,
+    ShippingAddress,
+    SubDistrict,
+)
 
 
 # Register your models here.
@@ -64,6 +71,20 @@ class SubDistrictAdmin(ReadOnlyForStaffMixin):
         return qs.select_related("district")
 
 
+@admin.register(Destination)
+class DestinationAdmin(ReadOnlyForStaffMixin):
+    list_display = [
+        "destination_id",
+        "zip_code",
+        "subdistrict_name",
+        "district_name",
+        "city_name",
+    ]
+    search_fields = ["destination_id", "zip_code", "subdistrict_name"]
+    readonly_fields = ["created_at", "updated_at"]
+    date_hierarchy = "created_at"
+
+
 @admin.register(ShippingAddress)
 class ShippingAddressAdmin(ReadOnlyForStaffMixin):
     list_display = [
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ShippingAddressConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "shipping_address"
+
+    def ready(self):
+        import shipping_address.signals
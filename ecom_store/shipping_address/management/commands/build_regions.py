@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from shipping_address.regions import rebuild_regions
+
+
+class Command(BaseCommand):
+    help = "Bangun ulang tabel Region (hierarki wilayah flat) dari data province/city/district/subdistrict"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = rebuild_regions(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{total} region dibangun"))
@@ -0,0 +1,76 @@
+import csv
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from shipping_address.models import Destination, SubDistrict
+from shipping_address.utils import save_destinations, search_destinations
+
+
+class Command(BaseCommand):
+    help = (
+        "Isi index lokal destination id RajaOngkir (tabel Destination), dari file "
+        "JSON/CSV hasil destination search, atau dengan search per kode pos "
+        "SubDistrict yang belum ter-index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            help=(
+                "JSON (list item destination search / response {'data': [...]}) "
+                "atau CSV dengan kolom id,zip_code,subdistrict_name,district_name,city_name."
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["file"]:
+            items = self.read_file(Path(options["file"]))
+            total = save_destinations(items, batch_size=options["batch_size"])
+        else:
+            total = self.import_remote(options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} destination diproses, total index: {Destination.objects.count()}"
+            )
+        )
+
+    def read_file(self, path):
+        if not path.exists():
+            raise CommandError(f"File {path} tidak ditemukan")
+
+        if path.suffix.lower() == ".csv":
+            with path.open(newline="", encoding="utf-8") as f:
+                return [{**row, "id": int(row["id"])} for row in csv.DictReader(f)]
+
+        with path.open(encoding="utf-8") as f:
+            payload = json.load(f)
+        return payload["data"] if isinstance(payload, dict) else payload
+
+    def import_remote(self, batch_size):
+        indexed = Destination.objects.values_list("zip_code", flat=True).distinct()
+        zip_codes = (
+            SubDistrict.objects.exclude(zip_code__in=indexed)
+            .order_by("zip_code")
+            .values_list("zip_code", flat=True)
+            .distinct()
+        )
+
+        total = 0
+        for zip_code in zip_codes:
+            try:
+                items = search_destinations(zip_code)
+            except serializers.ValidationError as e:
+                # retry 429/5xx sudah habis di session, berhenti di sini;
+                # jalankan ulang nanti, kode pos yang sudah masuk di-skip
+                self.stdout.write(
+                    self.style.WARNING(f"Berhenti di zip_code {zip_code}: {e.detail}")
+                )
+                break
+
+            total += save_destinations(items, batch_size=batch_size)
+
+        return total
@@ -1,6 +1,6 @@
 import random
 
-import requests as req
+from config.providers import rajaongkir_cost
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
@@ -22,7 +22,7 @@ class Command(BaseCommand):
             provinces = provinces.exclude(ro_id__in=city_data)
 
         for province in provinces:
-            city_req = req.get(
+            city_req = rajaongkir_cost.get(
                 f"https://rajaongkir.komerce.id/api/v1/destination/city/{province.ro_id}",
                 headers=headers,
             )
@@ -1,6 +1,6 @@
 import random
 
-import requests as req
+from config.providers import rajaongkir_cost
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
@@ -14,7 +14,7 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         headers = {"Key": settings.API_KEY_RAJA_ONGKIR_SHIPPING_COST}
-        province_req = req.get(
+        province_req = rajaongkir_cost.get(
             "https://rajaongkir.komerce.id/api/v1/destination/province", headers=headers
         )
 
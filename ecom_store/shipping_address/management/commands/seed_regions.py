@@ -0,0 +1,264 @@
+import csv
+import json
+import os
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+from config.providers import rajaongkir_cost
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from shipping_address.models import City, District, Province, SubDistrict
+from shipping_address.regions import rebuild_regions
+
+BASE_URL = "https://rajaongkir.komerce.id/api/v1/destination"
+
+# (level, model, parent model, FK ke parent, path endpoint per parent)
+LEVELS = [
+    ("province", Province, None, None, "province"),
+    ("city", City, Province, "province", "city/{ro_id}"),
+    ("district", District, City, "city", "district/{ro_id}"),
+    ("subdistrict", SubDistrict, District, "district", "sub-district/{ro_id}"),
+]
+
+
+class SeedInterrupted(Exception):
+    """Limit API belum pulih / provider tidak bisa dihubungi; lanjutkan nanti."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed province -> city -> district -> subdistrict dari RajaOngkir dengan "
+        "worker pool terbatas, bulk insert, dan checkpoint supaya bisa dilanjutkan. "
+        "Bisa juga dari snapshot offline (--snapshot)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--levels",
+            nargs="+",
+            choices=[level[0] for level in LEVELS],
+            default=[level[0] for level in LEVELS],
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Request paralel maksimal ke RajaOngkir.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--checkpoint",
+            # di luar source tree supaya state run tidak ikut ter-commit
+            default=str(Path(tempfile.gettempdir()) / "seed_regions.checkpoint.json"),
+            help="File progress; parent yang sudah selesai tidak di-request ulang.",
+        )
+        parser.add_argument(
+            "--reset-checkpoint",
+            action="store_true",
+            help="Abaikan checkpoint lama dan mulai dari awal.",
+        )
+        parser.add_argument(
+            "--snapshot",
+            help=(
+                "Load tanpa request API dari JSON {'provinces': [...], 'cities': [...], "
+                "'districts': [...], 'subdistricts': [...]} (item: id, name, parent_id, "
+                "zip_code) atau CSV dengan kolom level,id,name,parent_id,zip_code."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        levels = [level for level in LEVELS if level[0] in options["levels"]]
+
+        if options["snapshot"]:
+            rows = self.read_snapshot(Path(options["snapshot"]))
+            for level in levels:
+                created = self.save_rows(level, rows[level[0]])
+                self.stdout.write(f"{level[0]}: {created} baris dari snapshot")
+            self.rebuild_regions()
+            self.stdout.write(self.style.SUCCESS("seed regions dari snapshot selesai"))
+            return
+
+        self.headers = {"Key": settings.API_KEY_RAJA_ONGKIR_SHIPPING_COST}
+        self.checkpoint_path = Path(options["checkpoint"])
+        self.checkpoint = {} if options["reset_checkpoint"] else self.load_checkpoint()
+
+        for level in levels:
+            try:
+                self.seed_level(level, options["workers"])
+            except SeedInterrupted as e:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Berhenti di {level[0]} ({e}). Progress tersimpan di "
+                        f"{self.checkpoint_path}, jalankan ulang untuk melanjutkan."
+                    )
+                )
+                break
+        else:
+            self.stdout.write(self.style.SUCCESS("seed regions selesai"))
+
+        self.rebuild_regions()
+
+    def rebuild_regions(self):
+        # bulk_create tidak memicu signal, tabel Region dibangun ulang sekali
+        total = rebuild_regions(batch_size=self.batch_size)
+        self.stdout.write(f"region lookup: {total} baris")
+
+    # ------------------------------------------------------------------ #
+    #  API                                                                 #
+    # ------------------------------------------------------------------ #
+
+    def fetch(self, path):
+        """
+        Dipanggil dari worker thread; tidak boleh menyentuh database.
+        429/5xx sudah di-retry dengan backoff oleh session rajaongkir_cost,
+        kalau masih 429 berarti limit belum pulih -> hentikan run ini. Status
+        non-2xx lain juga menghentikan run lewat SeedInterrupted.
+        """
+        try:
+            res = rajaongkir_cost.get(f"{BASE_URL}/{path}", headers=self.headers)
+        except requests.RequestException as e:
+            raise SeedInterrupted(f"request gagal: {e}")
+
+        if res.status_code == 429:
+            raise SeedInterrupted(f"API limit di {path}")
+
+        try:
+            res.raise_for_status()
+        except requests.HTTPError as e:
+            # 5xx yang lolos retry / 4xx lain: simpan progress lalu berhenti
+            raise SeedInterrupted(f"HTTP {res.status_code} di {path}: {e}")
+        return res.json()["data"] or []
+
+    def seed_level(self, level, workers):
+        name, model, parent_model, _, path = level
+
+        if parent_model is None:
+            created = self.save_rows(level, self.fetch(path))
+            self.stdout.write(f"{name}: {created} baris")
+            return
+
+        done = set(self.checkpoint.get(name, []))
+        # parent yang sudah punya child di DB juga dianggap selesai
+        done.update(
+            model.objects.values_list(f"{level[3]}__ro_id", flat=True).distinct()
+        )
+        parents = list(
+            parent_model.objects.exclude(ro_id__in=done)
+            .order_by("ro_id")
+            .values_list("ro_id", flat=True)
+        )
+
+        pending_rows, pending_parents, created = [], [], 0
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self.fetch, path.format(ro_id=ro_id)): ro_id
+                for ro_id in parents
+            }
+            try:
+                for future in as_completed(futures):
+                    parent_ro_id = futures[future]
+                    for row in future.result():
+                        pending_rows.append({**row, "parent_id": parent_ro_id})
+                    pending_parents.append(parent_ro_id)
+
+                    if len(pending_rows) >= self.batch_size:
+                        created += self.flush(level, pending_rows, pending_parents)
+                        pending_rows, pending_parents = [], []
+            except SeedInterrupted:
+                for future in futures:
+                    future.cancel()
+                # yang sudah selesai tetap disimpan sebelum berhenti
+                self.flush(level, pending_rows, pending_parents)
+                raise
+
+        created += self.flush(level, pending_rows, pending_parents)
+        self.stdout.write(f"{name}: {created} baris dari {len(parents)} parent")
+
+    # ------------------------------------------------------------------ #
+    #  Database                                                            #
+    # ------------------------------------------------------------------ #
+
+    def flush(self, level, rows, parents):
+        created = self.save_rows(level, rows)
+        # parent dicatat selesai hanya setelah child-nya tersimpan
+        self.checkpoint.setdefault(level[0], []).extend(parents)
+        self.save_checkpoint()
+        return created
+
+    def save_rows(self, level, rows):
+        name, model, parent_model, parent_field, _ = level
+        if not rows:
+            return 0
+
+        parent_ids = {}
+        if parent_model is not None:
+            parent_ids = dict(
+                parent_model.objects.filter(
+                    ro_id__in={int(row["parent_id"]) for row in rows}
+                ).values_list("ro_id", "id")
+            )
+
+        objs = []
+        for row in rows:
+            fields = {"ro_id": int(row["id"]), "name": row["name"]}
+            if parent_model is not None:
+                parent_id = parent_ids.get(int(row["parent_id"]))
+                if parent_id is None:
+                    continue
+                fields[f"{parent_field}_id"] = parent_id
+            if name == "subdistrict":
+                fields["zip_code"] = row["zip_code"]
+            objs.append(model(**fields))
+
+        # ro_id unique, baris yang sudah ada di-skip tanpa query per baris
+        model.objects.bulk_create(
+            objs, batch_size=self.batch_size, ignore_conflicts=True
+        )
+        return len(objs)
+
+    # ------------------------------------------------------------------ #
+    #  File                                                                #
+    # ------------------------------------------------------------------ #
+
+    def load_checkpoint(self):
+        if not self.checkpoint_path.exists():
+            return {}
+        with self.checkpoint_path.open(encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_checkpoint(self):
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.checkpoint, f)
+        # replace atomic, checkpoint tidak pernah setengah tertulis
+        os.replace(tmp, self.checkpoint_path)
+
+    def read_snapshot(self, path):
+        if not path.exists():
+            raise CommandError(f"File {path} tidak ditemukan")
+
+        rows = defaultdict(list)
+
+        if path.suffix.lower() == ".csv":
+            with path.open(newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    rows[row["level"]].append(row)
+            return rows
+
+        with path.open(encoding="utf-8") as f:
+            payload = json.load(f)
+
+        keys = {
+            "province": "provinces",
+            "city": "cities",
+            "district": "districts",
+            "subdistrict": "subdistricts",
+        }
+        for level, key in keys.items():
+            rows[level] = payload.get(key, [])
+        return rows
@@ -1,6 +1,6 @@
 import random
 
-import requests as req
+from config.providers import rajaongkir_cost
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
@@ -24,7 +24,7 @@ class Command(BaseCommand):
             districts = districts.exclude(ro_id__in=subdistrict_data)
 
         for district in districts:
-            subdistrict_req = req.get(
+            subdistrict_req = rajaongkir_cost.get(
                 f"https://rajaongkir.komerce.id/api/v1/destination/sub-district/{district.ro_id}",
                 headers=headers,
             )
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shipping_address", "0008_alter_shippingaddress_latitude_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Destination",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, editable=False
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("destination_id", models.IntegerField()),
+                ("zip_code", models.CharField(max_length=10)),
+                ("subdistrict_name", models.CharField(max_length=100)),
+                ("district_name", models.CharField(max_length=100)),
+                ("city_name", models.CharField(max_length=100)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "zip_code",
+                            "subdistrict_name",
+                            "district_name",
+                            "city_name",
+                        ),
+                        name="unique_destination_per_location",
+                    )
+                ],
+            },
+        ),
+    ]
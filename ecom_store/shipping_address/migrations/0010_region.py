@@ -0,0 +1,88 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_regions(apps, schema_editor):
+    # isi awal dari data wilayah yang sudah ada; setelah ini dijaga oleh
+    # signal dan command build_regions
+    SubDistrict = apps.get_model("shipping_address", "SubDistrict")
+    Region = apps.get_model("shipping_address", "Region")
+
+    subdistricts = SubDistrict.objects.select_related("district__city__province")
+    batch = []
+    for sub in subdistricts.iterator(chunk_size=2000):
+        district = sub.district
+        city = district.city
+        province = city.province
+        batch.append(
+            Region(
+                subdistrict_id=sub.id,
+                subdistrict_ro_id=sub.ro_id,
+                subdistrict_name=sub.name,
+                zip_code=sub.zip_code,
+                district_id=district.id,
+                district_ro_id=district.ro_id,
+                district_name=district.name,
+                city_id=city.id,
+                city_ro_id=city.ro_id,
+                city_name=city.name,
+                province_id=province.id,
+                province_ro_id=province.ro_id,
+                province_name=province.name,
+            )
+        )
+        if len(batch) >= 2000:
+            Region.objects.bulk_create(batch)
+            batch = []
+    Region.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shipping_address", "0009_destination"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Region",
+            fields=[
+                (
+                    "subdistrict",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="region",
+                        serialize=False,
+                        to="shipping_address.subdistrict",
+                    ),
+                ),
+                ("subdistrict_ro_id", models.IntegerField()),
+                ("subdistrict_name", models.CharField(max_length=100)),
+                ("zip_code", models.CharField(max_length=10)),
+                ("district_id", models.BigIntegerField()),
+                ("district_ro_id", models.IntegerField()),
+                ("district_name", models.CharField(max_length=100)),
+                ("city_id", models.BigIntegerField()),
+                ("city_ro_id", models.IntegerField()),
+                ("city_name", models.CharField(max_length=100)),
+                ("province_id", models.BigIntegerField()),
+                ("province_ro_id", models.IntegerField()),
+                ("province_name", models.CharField(max_length=100)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["zip_code"], name="region_zip_code_idx"),
+                    models.Index(
+                        fields=["subdistrict_name"], name="region_subdistrict_idx"
+                    ),
+                    models.Index(fields=["district_id"], name="region_district_idx"),
+                    models.Index(fields=["city_id"], name="region_city_idx"),
+                    models.Index(fields=["province_id"], name="region_province_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_regions, migrations.RunPython.noop),
+    ]
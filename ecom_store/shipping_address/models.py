@@ -41,6 +41,74 @@ class SubDistrict(BaseModel):
         return f"{self.name} - {self.zip_code}"
 
 
+class Region(models.Model):
+    """
+    Hierarki wilayah yang sudah di-flatten, satu baris per subdistrict.
+    Dipakai endpoint region/autocomplete supaya cukup satu query tanpa join
+    (lihat shipping_address/regions.py). Diisi ulang oleh build_regions dan
+    dijaga sinkron lewat signal untuk save satu per satu.
+    """
+
+    subdistrict = models.OneToOneField(
+        SubDistrict, on_delete=models.CASCADE, primary_key=True, related_name="region"
+    )
+    subdistrict_ro_id = models.IntegerField()
+    subdistrict_name = models.CharField(max_length=100)
+    zip_code = models.CharField(max_length=10)
+
+    district_id = models.BigIntegerField()
+    district_ro_id = models.IntegerField()
+    district_name = models.CharField(max_length=100)
+
+    city_id = models.BigIntegerField()
+    city_ro_id = models.IntegerField()
+    city_name = models.CharField(max_length=100)
+
+    province_id = models.BigIntegerField()
+    province_ro_id = models.IntegerField()
+    province_name = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            # zip_code exact & prefix (LIKE '831%') sama-sama pakai index ini
+            models.Index(fields=["zip_code"], name="region_zip_code_idx"),
+            models.Index(fields=["subdistrict_name"], name="region_subdistrict_idx"),
+            models.Index(fields=["district_id"], name="region_district_idx"),
+            models.Index(fields=["city_id"], name="region_city_idx"),
+            models.Index(fields=["province_id"], name="region_province_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subdistrict_name}, {self.district_name}, {self.city_name}"
+
+
+class Destination(BaseModel):
+    """
+    Index lokal destination id RajaOngkir (API Komerce collaborator) per
+    (zip_code, subdistrict, district, city), supaya simpan alamat tidak perlu
+    memanggil destination search. Nama disimpan UPPERCASE, sama dengan cara
+    get_destination_id mencocokkan hasil search.
+    """
+
+    destination_id = models.IntegerField()
+    zip_code = models.CharField(max_length=10)
+    subdistrict_name = models.CharField(max_length=100)
+    district_name = models.CharField(max_length=100)
+    city_name = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            # sekaligus jadi index lookup, zip_code di depan paling selektif
+            models.UniqueConstraint(
+                fields=["zip_code", "subdistrict_name", "district_name", "city_name"],
+                name="unique_destination_per_location",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.subdistrict_name}, {self.district_name} - {self.destination_id}"
+
+
 class ShippingAddress(BaseModel):
     province = models.ForeignKey(Province, on_delete=models.PROTECT)
     city = models.ForeignKey(City, on_delete=models.PROTECT)
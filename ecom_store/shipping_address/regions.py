@@ -0,0 +1,134 @@
+from django.db import transaction
+
+from .models import City, District, Province, Region, SubDistrict
+
+REGION_FIELDS = [
+    "subdistrict_ro_id",
+    "subdistrict_name",
+    "zip_code",
+    "district_ro_id",
+    "district_name",
+    "city_ro_id",
+    "city_name",
+    "province_ro_id",
+    "province_name",
+]
+
+
+def build_region(subdistrict):
+    """subdistrict harus sudah select_related("district__city__province")."""
+    district = subdistrict.district
+    city = district.city
+    province = city.province
+    return Region(
+        subdistrict_id=subdistrict.id,
+        subdistrict_ro_id=subdistrict.ro_id,
+        subdistrict_name=subdistrict.name,
+        zip_code=subdistrict.zip_code,
+        district_id=district.id,
+        district_ro_id=district.ro_id,
+        district_name=district.name,
+        city_id=city.id,
+        city_ro_id=city.ro_id,
+        city_name=city.name,
+        province_id=province.id,
+        province_ro_id=province.ro_id,
+        province_name=province.name,
+    )
+
+
+def rebuild_regions(batch_size=2000):
+    """
+    Bangun ulang seluruh tabel Region dari tabel wilayah normal. Dipakai
+    setelah seed/import yang menulis lewat bulk_create (tanpa signal).
+    """
+    subdistricts = SubDistrict.objects.select_related(
+        "district__city__province"
+    ).order_by("id")
+
+    with transaction.atomic():
+        Region.objects.all().delete()
+
+        batch, total = [], 0
+        for subdistrict in subdistricts.iterator(chunk_size=batch_size):
+            batch.append(build_region(subdistrict))
+            if len(batch) >= batch_size:
+                Region.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+
+        Region.objects.bulk_create(batch)
+        total += len(batch)
+
+    return total
+
+
+def sync_subdistrict(subdistrict_id):
+    subdistrict = SubDistrict.objects.select_related("district__city__province").get(
+        pk=subdistrict_id
+    )
+    region = build_region(subdistrict)
+    Region.objects.update_or_create(
+        subdistrict_id=subdistrict_id,
+        defaults={
+            field.attname: getattr(region, field.attname)
+            for field in Region._meta.concrete_fields
+            if not field.primary_key
+        },
+    )
+
+
+def sync_parent(instance):
+    """
+    Rename/pindah parent (district/city/province) cukup satu UPDATE ke
+    semua baris Region di bawahnya.
+    """
+    if isinstance(instance, District):
+        city = instance.city
+        Region.objects.filter(district_id=instance.id).update(
+            district_ro_id=instance.ro_id,
+            district_name=instance.name,
+            city_id=city.id,
+            city_ro_id=city.ro_id,
+            city_name=city.name,
+            province_id=city.province.id,
+            province_ro_id=city.province.ro_id,
+            province_name=city.province.name,
+        )
+    elif isinstance(instance, City):
+        Region.objects.filter(city_id=instance.id).update(
+            city_ro_id=instance.ro_id,
+            city_name=instance.name,
+            province_id=instance.province.id,
+            province_ro_id=instance.province.ro_id,
+            province_name=instance.province.name,
+        )
+    elif isinstance(instance, Province):
+        Region.objects.filter(province_id=instance.id).update(
+            province_ro_id=instance.ro_id,
+            province_name=instance.name,
+        )
+
+
+def serialize_region(row):
+    """
+    Bentuk response sama persis dengan SubDistrictSerializer (nested
+    district -> city -> province), tapi dari satu baris flat.
+    """
+    return {
+        "ro_id": row["subdistrict_ro_id"],
+        "name": row["subdistrict_name"],
+        "zip_code": row["zip_code"],
+        "district": {
+            "ro_id": row["district_ro_id"],
+            "name": row["district_name"],
+            "city": {
+                "ro_id": row["city_ro_id"],
+                "name": row["city_name"],
+                "province": {
+                    "ro_id": row["province_ro_id"],
+                    "name": row["province_name"],
+                },
+            },
+        },
+    }
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import City, District, Province, SubDistrict
+from .regions import sync_parent, sync_subdistrict
+
+
+# delete tidak perlu ditangani: Region ikut terhapus lewat CASCADE subdistrict
+@receiver(post_save, sender=SubDistrict)
+def sync_region(sender, instance, **kwargs):
+    sync_subdistrict(instance.pk)
+
+
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=City)
+@receiver(post_save, sender=Province)
+def sync_region_parent(sender, instance, created, **kwargs):
+    if not created:
+        sync_parent(instance)
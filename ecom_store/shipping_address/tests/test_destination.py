@@ -0,0 +1,157 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework import serializers
+from shipping_address.models import City, Destination, District, Province, SubDistrict
+from shipping_address.utils import get_destination_id, save_destinations
+
+
+def search_item(destination_id, subdistrict="MATARAM TIMUR", zip_code="83121"):
+    return {
+        "id": destination_id,
+        "subdistrict_name": subdistrict,
+        "district_name": "MATARAM",
+        "city_name": "MATARAM",
+        "zip_code": zip_code,
+    }
+
+
+def search_response(items, status_code=200):
+    res = MagicMock()
+    res.status_code = status_code
+    res.json.return_value = {"meta": {"message": "ok"}, "data": items}
+    return res
+
+
+class DestinationIndexTest(TestCase):
+    """
+    get_destination_id harus memakai index lokal lebih dulu dan hanya
+    memanggil destination search RajaOngkir saat miss.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(ro_id=1, name="NUSA TENGGARA BARAT (NTB)")
+        cls.city = City.objects.create(ro_id=1, name="Mataram", province=province)
+        cls.district = District.objects.create(ro_id=1, name="Mataram", city=cls.city)
+        cls.subdistrict = SubDistrict.objects.create(
+            ro_id=1, name="Mataram Timur", zip_code="83121", district=cls.district
+        )
+        cls.serializer_data = {
+            "city": cls.city,
+            "district": cls.district,
+            "subdistrict": cls.subdistrict,
+        }
+
+    @patch("shipping_address.utils.rajaongkir_delivery.get")
+    def test_local_hit_is_single_query_without_remote_call(self, mock_get):
+        Destination.objects.create(
+            destination_id=17,
+            zip_code="83121",
+            subdistrict_name="MATARAM TIMUR",
+            district_name="MATARAM",
+            city_name="MATARAM",
+        )
+
+        with self.assertNumQueries(1):
+            destination_id = get_destination_id(self.serializer_data)
+
+        self.assertEqual(destination_id, 17)
+        mock_get.assert_not_called()
+
+    @patch("shipping_address.utils.rajaongkir_delivery.get")
+    def test_miss_calls_remote_once_and_writes_back(self, mock_get):
+        """
+        Test: index kosong, search mengembalikan 2 kelurahan di kode pos sama.
+        Assert: hasil yang cocok dikembalikan, keduanya tersimpan, panggilan
+        kedua tidak ke remote lagi.
+        """
+        mock_get.return_value = search_response(
+            [search_item(17), search_item(18, subdistrict="CAKRANEGARA")]
+        )
+
+        self.assertEqual(get_destination_id(self.serializer_data), 17)
+        self.assertEqual(get_destination_id(self.serializer_data), 17)
+
+        mock_get.assert_called_once()
+        self.assertEqual(Destination.objects.count(), 2)
+
+    @patch("shipping_address.utils.rajaongkir_delivery.get")
+    def test_ambiguous_location_is_not_indexed(self, mock_get):
+        mock_get.return_value = search_response([search_item(17), search_item(19)])
+
+        with self.assertRaises(serializers.ValidationError):
+            get_destination_id(self.serializer_data)
+
+        self.assertFalse(Destination.objects.exists())
+
+    @patch("shipping_address.utils.rajaongkir_delivery.get")
+    def test_remote_error_is_raised_as_validation_error(self, mock_get):
+        mock_get.return_value = search_response([], status_code=429)
+
+        with self.assertRaises(serializers.ValidationError):
+            get_destination_id(self.serializer_data)
+
+    def test_save_destinations_ignores_existing_rows(self):
+        save_destinations([search_item(17)])
+        save_destinations([search_item(17), search_item(18, subdistrict="AMPENAN")])
+
+        self.assertEqual(Destination.objects.count(), 2)
+
+
+class ImportDestinationsCommandTest(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_import_from_json_response(self):
+        path = Path(self.tmp.name) / "destinations.json"
+        path.write_text(
+            json.dumps({"data": [search_item(17), search_item(18, "AMPENAN")]})
+        )
+
+        call_command("import_destinations", file=str(path), stdout=MagicMock())
+
+        self.assertEqual(
+            set(Destination.objects.values_list("destination_id", flat=True)), {17, 18}
+        )
+
+    def test_import_from_csv(self):
+        path = Path(self.tmp.name) / "destinations.csv"
+        path.write_text(
+            "id,zip_code,subdistrict_name,district_name,city_name\n"
+            "17,83121,Mataram Timur,Mataram,Mataram\n"
+        )
+
+        call_command("import_destinations", file=str(path), stdout=MagicMock())
+
+        destination = Destination.objects.get()
+        self.assertEqual(destination.destination_id, 17)
+        self.assertEqual(destination.subdistrict_name, "MATARAM TIMUR")
+
+    @patch("shipping_address.utils.rajaongkir_delivery.get")
+    def test_remote_import_skips_indexed_zip_codes(self, mock_get):
+        province = Province.objects.create(ro_id=1, name="NTB")
+        city = City.objects.create(ro_id=1, name="MATARAM", province=province)
+        district = District.objects.create(ro_id=1, name="MATARAM", city=city)
+        SubDistrict.objects.create(
+            ro_id=1, name="MATARAM TIMUR", zip_code="83121", district=district
+        )
+        SubDistrict.objects.create(
+            ro_id=2, name="PAGESANGAN", zip_code="83127", district=district
+        )
+        save_destinations([search_item(17)])
+        mock_get.return_value = search_response(
+            [search_item(20, "PAGESANGAN", "83127")]
+        )
+
+        call_command("import_destinations", stdout=MagicMock())
+
+        mock_get.assert_called_once()
+        self.assertEqual(mock_get.call_args.kwargs["params"], {"keyword": "83127"})
+        self.assertEqual(Destination.objects.count(), 2)
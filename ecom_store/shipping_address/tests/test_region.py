@@ -0,0 +1,138 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from shipping_address.models import City, District, Province, Region, SubDistrict
+
+User = get_user_model()
+
+
+class RegionLookupTest(TestCase):
+    """
+    Endpoint subdistrict dilayani dari tabel Region yang sudah di-flatten:
+    satu query, bentuk response tetap nested seperti SubDistrictSerializer.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="test",
+            email="test@gmail.com",
+            password="test2938484jr",
+            phone_number="089384442947",
+        )
+        cls.province = Province.objects.create(ro_id=1, name="NTB")
+        cls.city = City.objects.create(ro_id=11, name="MATARAM", province=cls.province)
+        cls.district = District.objects.create(ro_id=111, name="AMPENAN", city=cls.city)
+        for ro_id, name, zip_code in [
+            (1111, "AMPENAN TENGAH", "83112"),
+            (1112, "PEJERUK", "83113"),
+            (1113, "PEJARAKAN KARYA", "83114"),
+        ]:
+            SubDistrict.objects.create(
+                ro_id=ro_id, name=name, zip_code=zip_code, district=cls.district
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("subdistrict")
+
+    def test_list_by_zip_code_is_single_query_with_nested_shape(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(self.url, {"zip_code": "83113"})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "ro_id": 1112,
+                    "name": "PEJERUK",
+                    "zip_code": "83113",
+                    "district": {
+                        "ro_id": 111,
+                        "name": "AMPENAN",
+                        "city": {
+                            "ro_id": 11,
+                            "name": "MATARAM",
+                            "province": {"ro_id": 1, "name": "NTB"},
+                        },
+                    },
+                }
+            ],
+        )
+
+    def test_search_prefix_by_zip_code_and_name(self):
+        res = self.client.get(self.url, {"search": "8311"})
+        self.assertEqual(len(res.data), 3)
+
+        res = self.client.get(self.url, {"search": "peja"})
+        self.assertEqual([row["ro_id"] for row in res.data], [1113])
+
+    def test_name_filter_is_case_insensitive(self):
+        res = self.client.get(self.url, {"name": "pejeruk"})
+
+        self.assertEqual([row["ro_id"] for row in res.data], [1112])
+
+    def test_etag_returns_304_when_unchanged(self):
+        res = self.client.get(self.url, {"zip_code": "83112"})
+        etag = res["ETag"]
+
+        res = self.client.get(self.url, {"zip_code": "83112"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        SubDistrict.objects.filter(ro_id=1111).update(name="AMPENAN TENGAH BARU")
+        call_command("build_regions", stdout=StringIO())
+
+        res = self.client.get(self.url, {"zip_code": "83112"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_detail_served_from_region(self):
+        subdistrict = SubDistrict.objects.get(ro_id=1112)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("subdistrict", args=[subdistrict.pk]))
+
+        self.assertEqual(res.data["district"]["city"]["province"]["name"], "NTB")
+
+        res = self.client.get(reverse("subdistrict", args=[9999]))
+        self.assertEqual(res.status_code, 404)
+
+    def test_parent_rename_is_synced_by_signal(self):
+        self.city.name = "KOTA MATARAM"
+        self.city.save()
+
+        self.assertEqual(
+            set(Region.objects.values_list("city_name", flat=True)), {"KOTA MATARAM"}
+        )
+
+    def test_subdistrict_save_and_delete_are_synced(self):
+        subdistrict = SubDistrict.objects.create(
+            ro_id=1114, name="BANJAR", zip_code="83115", district=self.district
+        )
+        self.assertEqual(Region.objects.get(pk=subdistrict.pk).zip_code, "83115")
+
+        subdistrict.delete()
+        self.assertFalse(Region.objects.filter(pk=subdistrict.pk).exists())
+
+    def test_build_regions_after_bulk_insert(self):
+        SubDistrict.objects.bulk_create(
+            [
+                SubDistrict(
+                    ro_id=1115,
+                    name="DAYAN PEKEN",
+                    zip_code="83116",
+                    district=self.district,
+                )
+            ]
+        )
+        self.assertEqual(Region.objects.count(), 3)
+
+        call_command("build_regions", stdout=StringIO())
+
+        self.assertEqual(Region.objects.count(), 4)
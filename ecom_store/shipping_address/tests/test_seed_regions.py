@@ -0,0 +1,156 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.core.management import call_command
+from django.test import TestCase
+from shipping_address.models import City, District, Province, SubDistrict
+
+BASE_URL = "https://rajaongkir.komerce.id/api/v1/destination"
+
+# respons RajaOngkir per path endpoint
+API_DATA = {
+    "province": [{"id": 1, "name": "NTB"}, {"id": 2, "name": "BALI"}],
+    "city/1": [{"id": 11, "name": "MATARAM"}],
+    "city/2": [{"id": 21, "name": "DENPASAR"}],
+    "district/11": [{"id": 111, "name": "AMPENAN"}],
+    "district/21": [],
+    "sub-district/111": [
+        {"id": 1111, "name": "AMPENAN TENGAH", "zip_code": "83112"},
+        {"id": 1112, "name": "PEJERUK", "zip_code": "83113"},
+    ],
+}
+
+
+def fake_get(limited=(), failing=()):
+    def get(url, headers=None):
+        path = url.removeprefix(f"{BASE_URL}/")
+        res = MagicMock()
+        res.status_code = 429 if path in limited else 200
+        if path in failing:
+            res.status_code = 503
+            res.raise_for_status.side_effect = requests.HTTPError("503 Server Error")
+        res.json.return_value = {"data": API_DATA.get(path, [])}
+        return res
+
+    return get
+
+
+class SeedRegionsTest(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.checkpoint = Path(self.tmp.name) / "checkpoint.json"
+
+    def seed(self, **options):
+        out = StringIO()
+        call_command(
+            "seed_regions", checkpoint=str(self.checkpoint), stdout=out, **options
+        )
+        return out.getvalue()
+
+    @patch("shipping_address.management.commands.seed_regions.rajaongkir_cost")
+    def test_seed_full_hierarchy_from_api(self, mock_session):
+        mock_session.get.side_effect = fake_get()
+
+        self.seed(workers=2)
+
+        self.assertEqual(Province.objects.count(), 2)
+        self.assertEqual(City.objects.get(ro_id=21).province.ro_id, 2)
+        self.assertEqual(District.objects.get(ro_id=111).city.ro_id, 11)
+        self.assertEqual(SubDistrict.objects.get(ro_id=1112).district.ro_id, 111)
+        self.assertEqual(SubDistrict.objects.get(ro_id=1112).zip_code, "83113")
+
+    @patch("shipping_address.management.commands.seed_regions.rajaongkir_cost")
+    def test_rerun_skips_finished_parents(self, mock_session):
+        """
+        Test: run kedua setelah run pertama selesai.
+        Assert: parent tanpa child (district/21 kosong) tidak di-request lagi
+        karena tercatat di checkpoint, parent lain di-skip karena child-nya
+        sudah ada; hanya endpoint province yang dipanggil ulang.
+        """
+        mock_session.get.side_effect = fake_get()
+        self.seed()
+        mock_session.get.reset_mock()
+
+        self.seed()
+
+        paths = [
+            c.args[0].removeprefix(f"{BASE_URL}/")
+            for c in mock_session.get.call_args_list
+        ]
+        self.assertEqual(paths, ["province"])
+
+    @patch("shipping_address.management.commands.seed_regions.rajaongkir_cost")
+    def test_rate_limit_stops_and_resume_continues(self, mock_session):
+        mock_session.get.side_effect = fake_get(limited={"sub-district/111"})
+
+        output = self.seed()
+
+        self.assertIn("Berhenti di subdistrict", output)
+        self.assertEqual(District.objects.count(), 1)
+        self.assertFalse(SubDistrict.objects.exists())
+        checkpoint = json.loads(self.checkpoint.read_text())
+        self.assertEqual(sorted(checkpoint["district"]), [11, 21])
+
+        mock_session.get.side_effect = fake_get()
+        self.seed(levels=["subdistrict"])
+
+        self.assertEqual(SubDistrict.objects.count(), 2)
+
+    @patch("shipping_address.management.commands.seed_regions.rajaongkir_cost")
+    def test_server_error_stops_and_keeps_progress(self, mock_session):
+        mock_session.get.side_effect = fake_get(failing={"district/21"})
+
+        output = self.seed(workers=1)
+
+        self.assertIn("Berhenti di district (HTTP 503 di district/21", output)
+        self.assertIn("region lookup:", output)
+        self.assertEqual(District.objects.get().ro_id, 111)
+        checkpoint = json.loads(self.checkpoint.read_text())
+        self.assertEqual(checkpoint["district"], [11])
+
+    def test_seed_from_json_snapshot(self):
+        snapshot = Path(self.tmp.name) / "regions.json"
+        snapshot.write_text(
+            json.dumps(
+                {
+                    "provinces": [{"id": 1, "name": "NTB"}],
+                    "cities": [{"id": 11, "name": "MATARAM", "parent_id": 1}],
+                    "districts": [{"id": 111, "name": "AMPENAN", "parent_id": 11}],
+                    "subdistricts": [
+                        {
+                            "id": 1111,
+                            "name": "AMPENAN TENGAH",
+                            "parent_id": 111,
+                            "zip_code": "83112",
+                        }
+                    ],
+                }
+            )
+        )
+
+        self.seed(snapshot=str(snapshot))
+        # idempotent, baris yang sudah ada di-skip
+        self.seed(snapshot=str(snapshot))
+
+        self.assertEqual(SubDistrict.objects.count(), 1)
+        self.assertEqual(SubDistrict.objects.get().district.city.province.name, "NTB")
+
+    def test_seed_from_csv_snapshot(self):
+        snapshot = Path(self.tmp.name) / "regions.csv"
+        snapshot.write_text(
+            "level,id,name,parent_id,zip_code\n"
+            "province,1,NTB,,\n"
+            "city,11,MATARAM,1,\n"
+            "district,111,AMPENAN,11,\n"
+            "subdistrict,1111,AMPENAN TENGAH,111,83112\n"
+        )
+
+        self.seed(snapshot=str(snapshot))
+
+        self.assertEqual(SubDistrict.objects.get().zip_code, "83112")
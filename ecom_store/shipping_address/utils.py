@@ -14,43 +14,47 @@
 #     # Filter jika ada data yang None/Kosong agar tidak muncul koma berlebih
 #     return ", ".join([str(p) for p in address_parts if p])
 
-import requests
+from config.providers import rajaongkir_delivery
 from django.conf import settings
 from rest_framework import serializers
 
+from .models import Destination
 
-def get_destination_id(serializer_data):
-    headers = {"x-api-key": settings.API_KEY_RAJA_ONGKIR_SHIPPING_DELIVERY}
-
-    url = (
-        "https://api-sandbox.collaborator.komerce.id"
-        "/tariff/api/v1/destination/search"
-    )
 
-    params = {"keyword": serializer_data["subdistrict"].zip_code}
+def get_destination_id(serializer_data):
+    """
+    Cari destination id di index lokal (tabel Destination) dulu; destination
+    search RajaOngkir hanya dipanggil kalau belum ada, dan hasilnya ditulis
+    balik ke index supaya alamat berikutnya di kode pos yang sama cukup
+    satu query.
+    """
+    subdistrict = serializer_data["subdistrict"]
+    key = {
+        "zip_code": subdistrict.zip_code,
+        "subdistrict_name": subdistrict.name.upper(),
+        "district_name": serializer_data["district"].name.upper(),
+        "city_name": serializer_data["city"].name.upper(),
+    }
 
-    res = requests.get(
-        url,
-        headers=headers,
-        params=params,
-        timeout=10,
+    destination_id = (
+        Destination.objects.filter(**key)
+        .values_list("destination_id", flat=True)
+        .first()
     )
+    if destination_id is not None:
+        return destination_id
 
-    data = res.json()
-
-    if res.status_code != 200:
-        raise serializers.ValidationError({"error": data["meta"]["message"]})
+    results = search_destinations(subdistrict.zip_code)
+    save_destinations(results)
 
     matches = [
         item
-        for item in data["data"]
+        for item in results
         if (
-            item["subdistrict_name"].upper()
-            == serializer_data["subdistrict"].name.upper()
-            and item["district_name"].upper()
-            == serializer_data["district"].name.upper()
-            and item["city_name"].upper() == serializer_data["city"].name.upper()
-            and item["zip_code"] == serializer_data["subdistrict"].zip_code
+            item["subdistrict_name"].upper() == key["subdistrict_name"]
+            and item["district_name"].upper() == key["district_name"]
+            and item["city_name"].upper() == key["city_name"]
+            and item["zip_code"] == key["zip_code"]
         )
     ]
 
@@ -65,3 +69,52 @@ def get_destination_id(serializer_data):
         )
 
     return matches[0]["id"]
+
+
+def search_destinations(keyword):
+    headers = {"x-api-key": settings.API_KEY_RAJA_ONGKIR_SHIPPING_DELIVERY}
+
+    url = f"{settings.RAJA_ONGKIR_DELIVERY_BASE_URL}/tariff/api/v1/destination/search"
+
+    res = rajaongkir_delivery.get(url, headers=headers, params={"keyword": keyword})
+
+    data = res.json()
+
+    if res.status_code != 200:
+        raise serializers.ValidationError({"error": data["meta"]["message"]})
+
+    return data["data"] or []
+
+
+def save_destinations(items, batch_size=1000):
+    """
+    Simpan hasil destination search ke index lokal. Lokasi yang muncul lebih
+    dari sekali dengan id berbeda (ambigu) tidak disimpan, supaya lookup
+    lokal tidak pernah memilih salah satunya secara diam-diam -- lookup itu
+    tetap jatuh ke remote dan error seperti biasa.
+    """
+    found = {}
+    ambiguous = set()
+
+    for item in items:
+        key = (
+            str(item["zip_code"]),
+            item["subdistrict_name"].upper(),
+            item["district_name"].upper(),
+            item["city_name"].upper(),
+        )
+        if key in found and found[key] != item["id"]:
+            ambiguous.add(key)
+        found[key] = item["id"]
+
+    fields = ("zip_code", "subdistrict_name", "district_name", "city_name")
+    destinations = [
+        Destination(destination_id=destination_id, **dict(zip(fields, key)))
+        for key, destination_id in found.items()
+        if key not in ambiguous
+    ]
+
+    Destination.objects.bulk_create(
+        destinations, batch_size=batch_size, ignore_conflicts=True
+    )
+    return len(destinations)
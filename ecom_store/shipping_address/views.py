@@ -1,10 +1,15 @@
+import hashlib
+import json
+
 from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import City, District, Province, ShippingAddress, SubDistrict
+from .models import City, District, Province, Region, ShippingAddress, SubDistrict
+from .regions import REGION_FIELDS, serialize_region
 from .serializers import (
     CitySerializer,
     DistrictSerializer,
@@ -15,29 +20,42 @@ from .serializers import (
 from .utils import get_destination_id
 
 
+def etag_response(request, data):
+    """
+    Data wilayah jarang berubah: ETag dari hash isi response, kalau client
+    kirim If-None-Match yang sama dibalas 304 tanpa body.
+    """
+    payload = json.dumps(data, sort_keys=True, default=str).encode()
+    etag = quote_etag(hashlib.md5(payload).hexdigest())
+
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    return Response(data, headers={"ETag": etag})
+
+
 class BaseAddressView(APIView):
     def get(self, request, pk=None):
         model = self.Meta.model
         cls_serializer = self.Meta.serializer
+        select_related = getattr(self.Meta, "select_related", [])
+
+        queryset = model.objects.all()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
 
         if pk is not None:
-            instance = get_object_or_404(model, pk=pk)
+            instance = get_object_or_404(queryset, pk=pk)
             serializer = cls_serializer(instance)
-            return Response(serializer.data)
+            return etag_response(request, serializer.data)
 
         name = request.GET.get("name")
-        queryset = model.objects.all()
-
-        select_related = getattr(self.Meta, "select_related", [])
-        if select_related:
-            queryset.select_related(*select_related)
-
         if name:
             queryset = queryset.filter(name__iexact=name)
 
         queryset = queryset.order_by("id")
         serializer = cls_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return etag_response(request, serializer.data)
 
 
 class ProvinceView(BaseAddressView):
@@ -57,33 +75,59 @@ class DistrictView(BaseAddressView):
     class Meta:
         model = District
         serializer = DistrictSerializer
-        select_related = ["city"]
+        # DistrictSerializer nest city -> province
+        select_related = ["city__province"]
 
 
 class SubDistrictView(BaseAddressView):
+    """
+    Dilayani dari tabel Region (hierarki yang sudah di-flatten), jadi list
+    maupun detail cukup satu query tanpa join.
+
+    Query params list:
+        zip_code : kode pos persis
+        name     : nama subdistrict persis (case-insensitive)
+        search   : autocomplete prefix; angka = prefix kode pos, selain itu
+                   prefix nama subdistrict (maks. `search_limit` baris)
+    """
+
+    search_limit = 50
+
     class Meta:
         model = SubDistrict
         serializer = SubDistrictSerializer
 
     def get(self, request, pk=None):
+        queryset = Region.objects.order_by("subdistrict_id")
+
         if pk:
-            return super().get(request, pk)
+            row = queryset.filter(subdistrict_id=pk).values(*REGION_FIELDS).first()
+            if row is None:
+                return Response(
+                    {"detail": "No SubDistrict matches the given query."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            return etag_response(request, serialize_region(row))
 
         zip_code = request.GET.get("zip_code")
         name = request.GET.get("name")
-        model = self.Meta.model
-
-        queryset = model.objects.all().select_related("district")
+        search = request.GET.get("search")
 
         if zip_code:
             queryset = queryset.filter(zip_code=zip_code)
 
         if name:
-            queryset = queryset.filter(name__iexact=name)
+            queryset = queryset.filter(subdistrict_name__iexact=name)
 
-        queryset = queryset.order_by("id")
-        serializer = self.Meta.serializer(queryset, many=True)
-        return Response(serializer.data)
+        if search:
+            if search.isdigit():
+                queryset = queryset.filter(zip_code__startswith=search)
+            else:
+                queryset = queryset.filter(subdistrict_name__istartswith=search)
+            queryset = queryset[: self.search_limit]
+
+        data = [serialize_region(row) for row in queryset.values(*REGION_FIELDS)]
+        return etag_response(request, data)
 
 
 class ShippingAddressView(APIView):